@@ -1,22 +1,146 @@
+import asyncio
+import hashlib
+import math
 import os
+import re
+import sqlite3
+import sys
+import threading
+import time
 import logging
-from openai import OpenAI
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.utils.cache import cache_path
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-class EmbeddingService:
+# Limits for text-embedding-ada-002.
+MAX_TOKENS_PER_INPUT = 8191
+MAX_INPUTS_PER_REQUEST = 2048
+MAX_TOKENS_PER_REQUEST = 300_000
+
+# We don't ship a tokenizer, so token counts are estimated from the character length.
+# Three characters per token is conservative for English and German prose.
+# Requests rejected because of a low estimate are split and retried by `get_embeddings`.
+CHARS_PER_TOKEN = 3
+
+def estimate_tokens(text: str) -> int:
+    """
+    Returns a conservative estimate of the number of tokens in the text.
     """
-    A service to generate text embeddings using OpenAI's API.
+    return len(text) // CHARS_PER_TOKEN + 1
+
+class OpenAIEmbeddingBackend:
+    """
+    Generates embeddings with OpenAI's API. Accepts many inputs per request.
     """
-    def __init__(self):
+    def __init__(self, model: str = "text-embedding-ada-002"):
+        from openai import OpenAI
         # The OpenAI client will automatically use the OPENAI_API_KEY environment variable.
-        try:
-            self.client = OpenAI()
-            self.model = "text-embedding-ada-002"
-            logging.info("OpenAI client initialized successfully.")
-        except Exception as e:
-            logging.error(f"Failed to initialize OpenAI client: {e}", exc_info=True)
-            self.client = None
+        self.client = OpenAI()
+        self.model = model
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        response = self.client.embeddings.create(input=texts, model=self.model)
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+class FakeEmbeddingBackend:
+    """
+    A deterministic, offline embedding backend for tests and local runs.
+    Words are hashed into a fixed number of dimensions, so texts that share
+    words get similar vectors.
+    """
+    def __init__(self, dimensions: int = 64, latency: float = 0.0):
+        self.model = f"fake-embedding-{dimensions}"
+        self.dimensions = dimensions
+        self.latency = latency
+        self.calls = 0
+        self.inputs_embedded = 0
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        self.inputs_embedded += len(texts)
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._embed_one(text) for text in texts]
+
+    def _embed_one(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for word in re.findall(r'\w+', text.lower()):
+            digest = hashlib.blake2b(word.encode(), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], 'little') % self.dimensions
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+def create_backend():
+    """
+    Creates the backend selected by the EMBEDDING_BACKEND environment variable ('openai' or 'fake').
+    """
+    if os.getenv("EMBEDDING_BACKEND", "openai").lower() == "fake":
+        return FakeEmbeddingBackend()
+    return OpenAIEmbeddingBackend()
+
+class EmbeddingCache:
+    """
+    An on-disk cache of embeddings keyed by a hash of the model and the input text,
+    so unchanged texts are never re-embedded.
+    """
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        self._conn.commit()
+
+    @staticmethod
+    def key(model: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\0{text}".encode()).hexdigest()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        found = {}
+        keys = list(keys)
+        with self._lock:
+            # Stay below SQLite's bound-parameter limit.
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk)
+                for key, blob in rows:
+                    found[key] = array('f', blob).tolist()
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, array('f', vector).tobytes()) for key, vector in items.items()]
+            )
+            self._conn.commit()
+
+class EmbeddingService:
+    """
+    A service to generate text embeddings, by default using OpenAI's API.
+    """
+    def __init__(self, backend=None, cache_file: Optional[str] = None, use_cache: bool = True, max_concurrency: int = 4):
+        if backend is None:
+            try:
+                backend = create_backend()
+                logging.info("Embedding backend initialized successfully.")
+            except Exception as e:
+                logging.error(f"Failed to initialize embedding backend: {e}", exc_info=True)
+        self.backend = backend
+        self.model = getattr(backend, "model", None)
+        self.cache = EmbeddingCache(cache_file or cache_path("embeddings.sqlite3")) if use_cache else None
+        self.max_concurrency = max_concurrency
+
+    @staticmethod
+    def _prepare(text: str) -> str:
+        # Replace newlines, which can negatively affect performance, and clip to the input limit.
+        return text.replace("\n", " ")[:MAX_TOKENS_PER_INPUT * CHARS_PER_TOKEN]
 
     def get_embedding(self, text: str):
         """
@@ -28,8 +152,8 @@ class EmbeddingService:
         Returns:
             A list of floats representing the embedding, or None if an error occurs.
         """
-        if not self.client:
-            logging.error("OpenAI client is not available. Cannot generate embedding.")
+        if not self.backend:
+            logging.error("Embedding backend is not available. Cannot generate embedding.")
             return None
 
         if not text or not isinstance(text, str):
@@ -37,25 +161,110 @@ class EmbeddingService:
             return None
 
         try:
-            # Replace newlines, which can negatively affect performance.
-            text = text.replace("\n", " ")
-            response = self.client.embeddings.create(input=[text], model=self.model)
-            embedding = response.data[0].embedding
+            text = self._prepare(text)
+            key = EmbeddingCache.key(self.model, text)
+            if self.cache:
+                cached = self.cache.get_many([key])
+                if key in cached:
+                    return cached[key]
+            embedding = self.backend.embed([text])[0]
+            if self.cache:
+                self.cache.put_many({key: embedding})
             logging.info(f"Successfully generated embedding for text snippet: '{text[:50]}...'")
             return embedding
         except Exception as e:
             logging.error(f"An error occurred while generating embedding: {e}", exc_info=True)
             return None
 
+    async def get_embeddings(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """
+        Generates embeddings for many texts at once.
+
+        Texts are looked up in the cache first. The remaining ones are de-duplicated,
+        packed into requests that respect the model's token and input limits, and
+        the requests are sent concurrently (at most `max_concurrency` at a time).
+        Token counts are estimates, so a request the API rejects as invalid (400) is
+        split in halves and retried, until only the offending input is left out.
+
+        Args:
+            texts: The texts to embed.
+
+        Returns:
+            A list aligned with `texts`. Entries are None for invalid inputs or failed batches.
+        """
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        if not self.backend:
+            logging.error("Embedding backend is not available. Cannot generate embeddings.")
+            return results
+
+        # Map each distinct cache key to its prepared text and the positions that need it.
+        pending: Dict[str, Tuple[str, List[int]]] = {}
+        for i, text in enumerate(texts):
+            if not text or not isinstance(text, str):
+                logging.warning(f"Invalid input text provided for embedding at position {i}.")
+                continue
+            prepared = self._prepare(text)
+            key = EmbeddingCache.key(self.model, prepared)
+            pending.setdefault(key, (prepared, []))[1].append(i)
+
+        if self.cache and pending:
+            for key, embedding in self.cache.get_many(pending.keys()).items():
+                for i in pending.pop(key)[1]:
+                    results[i] = embedding
+
+        batches = self._make_batches([(key, text) for key, (text, _) in pending.items()])
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def embed_batch(batch: List[Tuple[str, str]]):
+            try:
+                async with semaphore:
+                    embeddings = await asyncio.to_thread(self.backend.embed, [text for _, text in batch])
+            except Exception as e:
+                if len(batch) > 1 and getattr(e, "status_code", None) == 400:
+                    logging.warning(f"A batch of {len(batch)} texts was rejected ({e}); retrying it in halves.")
+                    middle = len(batch) // 2
+                    await asyncio.gather(embed_batch(batch[:middle]), embed_batch(batch[middle:]))
+                else:
+                    logging.error(f"An error occurred while embedding a batch of {len(batch)} texts: {e}", exc_info=True)
+                return
+            new_entries = {key: embedding for (key, _), embedding in zip(batch, embeddings)}
+            if self.cache:
+                self.cache.put_many(new_entries)
+            for key, embedding in new_entries.items():
+                for i in pending[key][1]:
+                    results[i] = embedding
+
+        await asyncio.gather(*(embed_batch(batch) for batch in batches))
+        logging.info(f"Embedded {len(texts)} texts: {len(pending)} new in {len(batches)} requests, the rest from cache.")
+        return results
+
+    @staticmethod
+    def _make_batches(items: List[Tuple[str, str]]) -> List[List[Tuple[str, str]]]:
+        """
+        Greedily packs (key, text) pairs into request-sized batches.
+        """
+        batches, batch, batch_tokens = [], [], 0
+        for item in items:
+            tokens = estimate_tokens(item[1])
+            if batch and (len(batch) >= MAX_INPUTS_PER_REQUEST or batch_tokens + tokens > MAX_TOKENS_PER_REQUEST):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(item)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
 # Example usage:
 if __name__ == '__main__':
-    # This requires the OPENAI_API_KEY to be set as an environment variable.
+    # This requires the OPENAI_API_KEY to be set as an environment variable
+    # (or EMBEDDING_BACKEND=fake to run offline).
     # You can set it in your .env file at the project root.
     from dotenv import load_dotenv
     dotenv_path = os.path.join(os.path.dirname(__file__), '../../.env')
     load_dotenv(dotenv_path=dotenv_path)
 
-    if not os.getenv("OPENAI_API_KEY"):
+    if not os.getenv("OPENAI_API_KEY") and os.getenv("EMBEDDING_BACKEND", "openai").lower() != "fake":
         print("Error: OPENAI_API_KEY environment variable not set.")
     else:
         service = EmbeddingService()
@@ -0,0 +1,276 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.utils.cache import cache_path
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+PROMPT_TEMPLATE = """
+Analyze the following job description and candidate profile. Provide a match score from 0 to 100
+and a brief, one-sentence explanation for your score.
+
+Job Description:
+---
+{job_text}
+---
+
+Candidate Profile:
+---
+{candidate_text}
+---
+
+Return your response as a JSON object with two keys: "score" (integer) and "explanation" (string).
+"""
+
+# Cached scores are only reused for the prompt (and model) they were produced with.
+PROMPT_VERSION = hashlib.sha256(PROMPT_TEMPLATE.encode()).hexdigest()[:16]
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def parse_match_result(content: str) -> Dict[str, Any]:
+    """
+    Parses the JSON answer of the model into a score in [0, 100] and an explanation.
+    """
+    if not content:
+        raise ValueError("Received empty content from the model.")
+    result = json.loads(content)
+    return {"score": max(0, min(100, int(result["score"]))), "explanation": str(result.get("explanation", ""))}
+
+class OpenAIMatchBackend:
+    """
+    Scores pairs with an OpenAI chat model. One async client is shared by all calls.
+    """
+    def __init__(self, model: str = "gpt-4-turbo"):
+        from openai import AsyncOpenAI
+        # The OpenAI client will automatically use the OPENAI_API_KEY environment variable.
+        self.client = AsyncOpenAI()
+        self.model = model
+
+    async def score(self, candidate_text: str, job_text: str) -> Dict[str, Any]:
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": PROMPT_TEMPLATE.format(job_text=job_text, candidate_text=candidate_text)}],
+            response_format={"type": "json_object"},
+            temperature=0.2,
+        )
+        return parse_match_result(response.choices[0].message.content)
+
+class FakeMatchBackend:
+    """
+    A deterministic, offline stand-in for the LLM, for tests and load tests.
+    Scores the share of the job's words found in the candidate text after an optional delay.
+    """
+    def __init__(self, latency: float = 0.0):
+        self.model = "fake-llm"
+        self.latency = latency
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def score(self, candidate_text: str, job_text: str) -> Dict[str, Any]:
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            candidate_words = set(re.findall(r'\w+', candidate_text.lower()))
+            job_words = set(re.findall(r'\w+', job_text.lower()))
+            overlap = len(candidate_words & job_words) / len(job_words) if job_words else 0.0
+            content = json.dumps({"score": round(overlap * 100), "explanation": f"{overlap:.0%} of the job's words match."})
+            return parse_match_result(content)
+        finally:
+            self.in_flight -= 1
+
+def create_match_backend():
+    """
+    Creates the backend selected by the MATCH_LLM_BACKEND environment variable ('openai' or 'fake').
+    """
+    if os.getenv("MATCH_LLM_BACKEND", "openai").lower() == "fake":
+        return FakeMatchBackend()
+    return OpenAIMatchBackend()
+
+class MatchCache:
+    """
+    An on-disk cache of LLM match results keyed by the hashes of the candidate and
+    job texts and the prompt version, so unchanged pairs are never scored twice.
+    """
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS match_results (candidate_hash TEXT NOT NULL, job_hash TEXT NOT NULL, "
+            "prompt_version TEXT NOT NULL, score INTEGER NOT NULL, explanation TEXT, "
+            "PRIMARY KEY (candidate_hash, job_hash, prompt_version))"
+        )
+        self._conn.commit()
+
+    def get_many(self, keys: Sequence[Tuple[str, str, str]]) -> Dict[Tuple[str, str, str], Dict[str, Any]]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                row = self._conn.execute(
+                    "SELECT score, explanation FROM match_results WHERE candidate_hash = ? AND job_hash = ? AND prompt_version = ?",
+                    key
+                ).fetchone()
+                if row:
+                    found[key] = {"score": row[0], "explanation": row[1]}
+        return found
+
+    def put_many(self, items: Dict[Tuple[str, str, str], Dict[str, Any]]):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO match_results (candidate_hash, job_hash, prompt_version, score, explanation) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(*key, result["score"], result["explanation"]) for key, result in items.items()]
+            )
+            self._conn.commit()
+
+class LLMMatcher:
+    """
+    Matches candidates to jobs with a cascade: a cheap prefilter ('tfidf' over the
+    whole corpus, or 'embedding' similarity) shortlists the `top_k` jobs of each
+    candidate, and only those pairs are scored by the LLM, with at most
+    `max_concurrency` calls in flight. LLM results are cached on disk.
+    """
+    def __init__(self, backend=None, cache_file: Optional[str] = None, use_cache: bool = True, top_k: int = 5,
+                 max_concurrency: int = 8, prefilter: str = "tfidf", embedding_service=None):
+        if prefilter not in ("tfidf", "embedding"):
+            raise ValueError(f"Unknown prefilter '{prefilter}'.")
+        if backend is None:
+            try:
+                backend = create_match_backend()
+                logging.info("Match LLM backend initialized successfully.")
+            except Exception as e:
+                logging.error(f"Failed to initialize match LLM backend: {e}", exc_info=True)
+        self.backend = backend
+        self.prompt_version = f"{PROMPT_VERSION}:{getattr(backend, 'model', None)}"
+        self.cache = MatchCache(cache_file or cache_path("llm_matches.sqlite3")) if use_cache else None
+        self.top_k = top_k
+        self.max_concurrency = max_concurrency
+        self.prefilter = prefilter
+        self.embedding_service = embedding_service
+        self.llm_calls = 0
+        self.cache_hits = 0
+
+    async def match(self, candidate_texts: Sequence[str], job_texts: Sequence[str]) -> List[List[Dict[str, Any]]]:
+        """
+        Returns, for each candidate, their shortlisted jobs as dicts with the job's
+        index in `job_texts`, its prefilter similarity and the LLM score and
+        explanation, best score first.
+        """
+        shortlists = await self.shortlist(candidate_texts, job_texts)
+        pairs = [(candidate_texts[i], job_texts[j]) for i, shortlist in enumerate(shortlists) for j, _ in shortlist]
+        results = iter(await self.score_pairs(pairs, [similarity for shortlist in shortlists for _, similarity in shortlist]))
+
+        matches = []
+        for shortlist in shortlists:
+            candidate_matches = [{"job_index": j, "similarity": similarity, **next(results)} for j, similarity in shortlist]
+            candidate_matches.sort(key=lambda match: match["score"], reverse=True)
+            matches.append(candidate_matches)
+        return matches
+
+    async def shortlist(self, candidate_texts: Sequence[str], job_texts: Sequence[str]) -> List[List[Tuple[int, float]]]:
+        """
+        Returns the `top_k` (job index, similarity) pairs of each candidate, most similar first.
+        Jobs with no similarity at all are never shortlisted.
+        """
+        if self.prefilter == "embedding":
+            return await self._shortlist_by_embedding(candidate_texts, job_texts)
+
+        from job_scraper.analysis.matching_service import calculate_match_matrix
+        matrix = await asyncio.to_thread(calculate_match_matrix, list(candidate_texts), list(job_texts), self.top_k)
+        shortlists = []
+        for row in range(matrix.shape[0]):
+            start, end = matrix.indptr[row], matrix.indptr[row + 1]
+            pairs = [(int(j), float(s)) for j, s in zip(matrix.indices[start:end], matrix.data[start:end]) if s > 0]
+            shortlists.append(sorted(pairs, key=lambda pair: pair[1], reverse=True))
+        return shortlists
+
+    async def _shortlist_by_embedding(self, candidate_texts: Sequence[str], job_texts: Sequence[str]) -> List[List[Tuple[int, float]]]:
+        from job_scraper.analysis.embedding_service import EmbeddingService
+        from job_scraper.analysis.vector_index import VectorIndex
+
+        service = self.embedding_service or EmbeddingService()
+        embeddings = await service.get_embeddings(list(candidate_texts) + list(job_texts))
+        candidate_vectors, job_vectors = embeddings[:len(candidate_texts)], embeddings[len(candidate_texts):]
+        job_ids = [j for j, vector in enumerate(job_vectors) if vector is not None]
+        if not job_ids:
+            return [[] for _ in candidate_texts]
+
+        index = VectorIndex(len(job_vectors[job_ids[0]]))
+        index.add(job_ids, [job_vectors[j] for j in job_ids])
+        queries = [i for i, vector in enumerate(candidate_vectors) if vector is not None]
+        shortlists: List[List[Tuple[int, float]]] = [[] for _ in candidate_texts]
+        if queries:
+            for i, results in zip(queries, index.search_many([candidate_vectors[i] for i in queries], k=self.top_k)):
+                shortlists[i] = [(j, similarity) for j, similarity in results if similarity > 0]
+        return shortlists
+
+    async def score_pairs(self, pairs: Sequence[Tuple[str, str]], fallback_similarities: Optional[Sequence[float]] = None) -> List[Dict[str, Any]]:
+        """
+        Scores (candidate_text, job_text) pairs with the LLM, reusing cached results.
+        Repeated pairs are scored once. When a call fails, the pair gets its prefilter
+        similarity (or its TF-IDF score) as a fallback, which is not cached.
+        """
+        keys = [(text_hash(candidate), text_hash(job), self.prompt_version) for candidate, job in pairs]
+        results: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        if self.cache and keys:
+            results.update(self.cache.get_many(list(dict.fromkeys(keys))))
+        self.cache_hits += sum(1 for key in keys if key in results)
+
+        pending = {key: i for i, key in enumerate(keys) if key not in results}
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def score(key, i):
+            candidate_text, job_text = pairs[i]
+            try:
+                if not self.backend:
+                    raise RuntimeError("Match LLM backend is not available.")
+                async with semaphore:
+                    self.llm_calls += 1
+                    result = await self.backend.score(candidate_text, job_text)
+                if self.cache:
+                    self.cache.put_many({key: result})
+            except Exception as e:
+                logging.error(f"Error getting LLM match score: {e}", exc_info=True)
+                if fallback_similarities is not None:
+                    fallback_score = int(fallback_similarities[i] * 100)
+                else:
+                    from job_scraper.analysis.matching_service import calculate_match_score
+                    fallback_score = calculate_match_score(candidate_text, job_text)
+                result = {"score": fallback_score, "explanation": f"AI analysis failed. Using basic keyword match. (Error: {e})"}
+            results[key] = result
+
+        await asyncio.gather(*(score(key, i) for key, i in pending.items()))
+        logging.info(f"Scored {len(keys)} pairs: {len(pending)} LLM calls, the rest from cache.")
+        return [dict(results[key]) for key in keys]
+
+if __name__ == '__main__':
+    # Scores every candidate against every job in two JSON files (lists of strings),
+    # with MATCH_LLM_BACKEND=fake to run offline.
+    from dotenv import load_dotenv
+    dotenv_path = os.path.join(os.path.dirname(__file__), '../../.env')
+    load_dotenv(dotenv_path=dotenv_path)
+
+    if len(sys.argv) < 3:
+        print("Usage: python llm_matcher.py <candidates.json> <jobs.json> [top_k]")
+        sys.exit(1)
+    with open(sys.argv[1]) as f:
+        candidates = json.load(f)
+    with open(sys.argv[2]) as f:
+        jobs = json.load(f)
+    matcher = LLMMatcher(top_k=int(sys.argv[3]) if len(sys.argv) > 3 else 5)
+    print(json.dumps(asyncio.run(matcher.match(candidates, jobs)), indent=2))
@@ -1,123 +1,192 @@
 import sys
+import os
 import json
 import logging
-import nltk
-from nltk.stem import WordNetLemmatizer
-from nltk.tokenize import word_tokenize
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from openai import OpenAI
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+# NLTK, scikit-learn, SciPy and OpenAI take seconds to import, so they are only
+# loaded by the functions that need them; importing this module stays cheap.
+from job_scraper.analysis.nlp_resources import NLTK_RESOURCES, ensure_nltk_data, get_lemma_cache, make_vectorizer
+
+if TYPE_CHECKING:
+    from scipy import sparse
+    from job_scraper.analysis.tfidf_model import CorpusTfidfModel
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 def download_nltk_data():
     """
     Downloads the necessary NLTK data if not already present.
+    Resources are also fetched on first use, so calling this is only needed to warm up.
     """
-    try:
-        nltk.data.find('tokenizers/punkt')
-    except LookupError:
-        print("Downloading NLTK 'punkt' data...")
-        nltk.download('punkt', quiet=True)
-    try:
-        nltk.data.find('corpora/wordnet')
-    except LookupError:
-        print("Downloading NLTK 'wordnet' data...")
-        nltk.download('wordnet', quiet=True)
-    try:
-        nltk.data.find('tokenizers/punkt_tab')
-    except LookupError:
-        print("Downloading NLTK 'punkt_tab' data...")
-        nltk.download('punkt_tab', quiet=True)
-
-# Call this once when the module is loaded
-download_nltk_data()
-
-lemmatizer = WordNetLemmatizer()
+    for name in NLTK_RESOURCES:
+        ensure_nltk_data(name)
 
 def lemmatize_text(text: str) -> str:
     """
-    Tokenizes and lemmatizes the text.
+    Tokenizes and lemmatizes the text. Results are memoized per document and per token;
+    see `get_lemma_cache().stats()` for the hit ratios.
     """
-    tokens = word_tokenize(text)
-    lemmatized_tokens = [lemmatizer.lemmatize(token) for token in tokens]
-    return ' '.join(lemmatized_tokens)
+    return get_lemma_cache().lemmatize(text)
 
-def calculate_match_score(candidate_text: str, job_text: str) -> int:
+# Loaded corpus models by directory. Missing models are not remembered, so a model built later is picked up.
+_corpus_models: Dict[str, "CorpusTfidfModel"] = {}
+
+def get_corpus_model(model_dir: Optional[str] = None) -> Optional["CorpusTfidfModel"]:
+    """
+    Returns the corpus TF-IDF model saved in `model_dir` (by default TFIDF_MODEL_DIR),
+    memory-mapped on first use. Returns None if no directory is given or no model
+    was built there yet; the corpus model is only used when asked for.
+    """
+    model_dir = model_dir or os.environ.get('TFIDF_MODEL_DIR')
+    if not model_dir:
+        return None
+    if model_dir not in _corpus_models:
+        from job_scraper.analysis.tfidf_model import CorpusTfidfModel
+        model = CorpusTfidfModel.load(model_dir)
+        if model is None:
+            return None
+        _corpus_models[model_dir] = model
+    return _corpus_models[model_dir]
+
+def calculate_match_score(candidate_text: str, job_text: str, model: Optional["CorpusTfidfModel"] = None) -> int:
     """
     Calculates a match score between a candidate and a job based on text similarity.
+    Texts are weighted with the IDF of the corpus `model`, or of the one in
+    TFIDF_MODEL_DIR if that is set (see tfidf_model.py), otherwise with an IDF
+    fitted on the two texts alone.
     """
     if not candidate_text or not job_text:
         return 0
 
+    if model is None:
+        model = get_corpus_model()
+    if model is not None:
+        return model.score_texts(candidate_text, job_text)
+
     # Lemmatize the texts to improve similarity matching
     processed_candidate_text = lemmatize_text(candidate_text)
     processed_job_text = lemmatize_text(job_text)
 
     documents = [processed_candidate_text, processed_job_text]
 
-    vectorizer = TfidfVectorizer(stop_words='english')
+    vectorizer = make_vectorizer()
 
     try:
         tfidf_matrix = vectorizer.fit_transform(documents)
     except ValueError:
         return 0
 
+    from sklearn.metrics.pairwise import cosine_similarity
     cosine_sim = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])
     score = int(cosine_sim[0][0] * 100)
 
     return score
 
+def calculate_match_matrix(candidate_texts: List[str], job_texts: List[str], top_k: Optional[int] = None,
+                           block_size: int = 1024) -> "sparse.csr_matrix":
+    """
+    Scores every candidate against every job in one go.
+
+    All texts are lemmatized once and vectorized with a single TF-IDF model fitted
+    on the combined corpus, so the similarities are one sparse matrix product
+    instead of N x M vectorizer fits. Candidates are processed in blocks of
+    `block_size` rows to keep memory bounded when there are many jobs.
+
+    Because IDF is computed over the whole corpus rather than over a single pair,
+    scores differ from `calculate_match_score`; use `int(score * 100)` for the same scale.
+
+    Args:
+        candidate_texts: N candidate profiles.
+        job_texts: M job descriptions.
+        top_k: If set, only the k best jobs are kept for each candidate.
+        block_size: Number of candidate rows scored at a time.
+
+    Returns:
+        A sparse N x M matrix of cosine similarities in [0, 1]. Empty texts score 0.
+    """
+    from scipy import sparse
+
+    n, m = len(candidate_texts), len(job_texts)
+    documents = [lemmatize_text(text) if text else "" for text in list(candidate_texts) + list(job_texts)]
+
+    vectorizer = make_vectorizer()
+    try:
+        # Rows are L2-normalized, so the dot product is the cosine similarity.
+        tfidf_matrix = vectorizer.fit_transform(documents)
+    except ValueError:
+        return sparse.csr_matrix((n, m))
+
+    candidate_vectors = tfidf_matrix[:n]
+    job_vectors_t = tfidf_matrix[n:].T.tocsr()
+
+    blocks = []
+    for start in range(0, n, block_size):
+        block = (candidate_vectors[start:start + block_size] @ job_vectors_t).tocsr()
+        if top_k is not None:
+            block = _keep_top_k(block, top_k)
+        blocks.append(block)
+
+    if not blocks:
+        return sparse.csr_matrix((n, m))
+    return sparse.vstack(blocks, format='csr')
+
+def _keep_top_k(matrix: "sparse.csr_matrix", k: int) -> "sparse.csr_matrix":
+    """
+    Keeps only the k largest entries of each row of a CSR matrix.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    if k <= 0:
+        return sparse.csr_matrix(matrix.shape)
+    data, indices, indptr = [], [], [0]
+    for row in range(matrix.shape[0]):
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        row_data, row_indices = matrix.data[start:end], matrix.indices[start:end]
+        if len(row_data) > k:
+            keep = np.argpartition(-row_data, k - 1)[:k]
+            row_data, row_indices = row_data[keep], row_indices[keep]
+        data.append(row_data)
+        indices.append(row_indices)
+        indptr.append(indptr[-1] + len(row_data))
+    return sparse.csr_matrix(
+        (np.concatenate(data) if data else [], np.concatenate(indices) if indices else [], indptr),
+        shape=matrix.shape
+    )
+
 def get_gpt4_match_score(candidate_text: str, job_text: str):
     """
     Uses GPT-4 to calculate a detailed match score and provide an explanation.
+    Results are cached on disk per pair of texts; to score many pairs, use
+    `llm_matcher.LLMMatcher`, which shortlists jobs first and shares one client.
+
+    This is a blocking call. From a running event loop it is run on a worker
+    thread and blocks the loop until it returns; await
+    `LLMMatcher.score_pairs` there instead.
     """
     if not candidate_text or not job_text:
         return {"score": 0, "explanation": "Missing candidate or job information."}
 
+    import asyncio
+    from job_scraper.analysis.llm_matcher import LLMMatcher
+    logging.info("Calling GPT-4 for match score analysis...")
+    scoring = LLMMatcher().score_pairs([(candidate_text, job_text)])
     try:
-        client = OpenAI() # Assumes OPENAI_API_KEY is set in environment
-        prompt = f"""
-        Analyze the following job description and candidate profile. Provide a match score from 0 to 100
-        and a brief, one-sentence explanation for your score.
-
-        Job Description:
-        ---
-        {job_text}
-        ---
-
-        Candidate Profile:
-        ---
-        {candidate_text}
-        ---
-
-        Return your response as a JSON object with two keys: "score" (integer) and "explanation" (string).
-        """
-
-        logging.info("Calling GPT-4 for match score analysis...")
-        response = client.chat.completions.create(
-            model="gpt-4-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"},
-            temperature=0.2,
-        )
-
-        content = response.choices[0].message.content
-        if not content:
-            raise ValueError("Received empty content from OpenAI.")
-
-        result = json.loads(content)
-        logging.info(f"Received match score from GPT-4: {result.get('score')}")
-        return result
-
-    except Exception as e:
-        logging.error(f"Error getting GPT-4 match score: {e}", exc_info=True)
-        # Fallback to TF-IDF score in case of GPT-4 failure
-        fallback_score = calculate_match_score(candidate_text, job_text)
-        return {
-            "score": fallback_score,
-            "explanation": f"AI analysis failed. Using basic keyword match. (Error: {e})"
-        }
+        asyncio.get_running_loop()
+    except RuntimeError:
+        result = asyncio.run(scoring)[0]
+    else:
+        # asyncio.run cannot be nested in a running loop, so the scoring gets its own loop on a thread.
+        logging.warning("get_gpt4_match_score called from a running event loop; await LLMMatcher.score_pairs instead.")
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            result = executor.submit(asyncio.run, scoring).result()[0]
+    logging.info(f"Received match score from GPT-4: {result.get('score')}")
+    return result
 
 
 if __name__ == "__main__":
@@ -134,7 +203,6 @@ if __name__ == "__main__":
         print("--- Using GPT-4 Matcher ---")
         # Note: Requires OPENAI_API_KEY to be set as an environment variable.
         from dotenv import load_dotenv
-        import os
         dotenv_path = os.path.join(os.path.dirname(__file__), '../../.env')
         load_dotenv(dotenv_path=dotenv_path)
         if not os.getenv("OPENAI_API_KEY"):
@@ -0,0 +1,213 @@
+"""
+NLP resources (NLTK data, the lemmatizer, the tokenizer and the TF-IDF vectorizer),
+loaded on first use and shared by the whole process.
+
+Nothing heavy is imported at module load, so importing the services that use these
+resources stays cheap. Run this module while building an image to download the NLTK
+data ahead of time:
+
+    python job_scraper/analysis/nlp_resources.py --download-dir /usr/share/nltk_data
+
+With NLTK_OFFLINE set, missing data raises instead of being downloaded at runtime.
+
+Lemmatization is memoized by `LemmaCache`; set LEMMA_CACHE_PATH to keep the
+lemmatized documents on disk across runs.
+"""
+import argparse
+import atexit
+import functools
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+# NLTK package name -> path probed with nltk.data.find.
+NLTK_RESOURCES = {
+    'punkt': 'tokenizers/punkt',
+    'punkt_tab': 'tokenizers/punkt_tab',
+    'wordnet': 'corpora/wordnet',
+}
+
+@functools.lru_cache(maxsize=None)
+def ensure_nltk_data(name: str) -> None:
+    """
+    Makes sure an NLTK resource is installed, downloading it unless NLTK_OFFLINE is set.
+    Each resource is probed at most once per process.
+    """
+    import nltk
+
+    try:
+        nltk.data.find(NLTK_RESOURCES[name])
+        return
+    except LookupError:
+        if os.environ.get('NLTK_OFFLINE'):
+            raise LookupError(
+                f"NLTK resource '{name}' is not installed and NLTK_OFFLINE is set. "
+                f"Prefetch it with `python job_scraper/analysis/nlp_resources.py`."
+            )
+    logging.info(f"Downloading NLTK '{name}' data...")
+    nltk.download(name, quiet=True)
+
+@functools.lru_cache(maxsize=None)
+def get_lemmatizer():
+    """
+    Returns the shared WordNet lemmatizer.
+    """
+    ensure_nltk_data('wordnet')
+    from nltk.stem import WordNetLemmatizer
+    return WordNetLemmatizer()
+
+@functools.lru_cache(maxsize=None)
+def get_tokenizer() -> Callable[[str], List[str]]:
+    """
+    Returns NLTK's word tokenizer once its data is installed.
+    """
+    ensure_nltk_data('punkt')
+    ensure_nltk_data('punkt_tab')
+    from nltk.tokenize import word_tokenize
+    return word_tokenize
+
+class LemmaCache:
+    """
+    Memoizes lemmatization at two levels. Whole documents are cached by the hash of
+    their text in an LRU of `max_documents`, so a job description scored against many
+    candidates is lemmatized once; single tokens are cached in an LRU of `max_tokens`,
+    so documents that do miss only lemmatize words never seen before.
+
+    With `path`, lemmatized documents are also stored in SQLite and survive restarts.
+    Writes are buffered and flushed every `flush_every` documents and at exit.
+    """
+    def __init__(self, max_documents: int = 10_000, max_tokens: int = 100_000, path: Optional[str] = None,
+                 flush_every: int = 256):
+        self.max_documents = max_documents
+        self.flush_every = flush_every
+        self.document_hits = 0
+        self.disk_hits = 0
+        self.document_misses = 0
+        self._documents: "OrderedDict[str, str]" = OrderedDict()
+        self._pending: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._lemmatize_token = functools.lru_cache(maxsize=max_tokens)(self._lemmatize_uncached)
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("CREATE TABLE IF NOT EXISTS lemmatized (key TEXT PRIMARY KEY, text TEXT NOT NULL)")
+            self._conn.commit()
+            atexit.register(self.flush)
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def lemmatize(self, text: str) -> str:
+        """
+        Returns the text tokenized and lemmatized, joined by spaces.
+        """
+        key = self.key(text)
+        with self._lock:
+            if key in self._documents:
+                self._documents.move_to_end(key)
+                self.document_hits += 1
+                return self._documents[key]
+            stored = self._pending.get(key) or self._read(key)
+            if stored is not None:
+                self.disk_hits += 1
+                self._remember(key, stored)
+                return stored
+            self.document_misses += 1
+
+        lemmatized = ' '.join(self._lemmatize_token(token) for token in get_tokenizer()(text))
+        with self._lock:
+            self._remember(key, lemmatized)
+            if self._conn is not None:
+                self._pending[key] = lemmatized
+                if len(self._pending) >= self.flush_every:
+                    self._flush()
+        return lemmatized
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns the hit counts and hit ratios of both cache levels. Disk hits count as document hits.
+        """
+        tokens = self._lemmatize_token.cache_info()
+        document_hits = self.document_hits + self.disk_hits
+        return {
+            'document_hits': document_hits,
+            'document_disk_hits': self.disk_hits,
+            'document_misses': self.document_misses,
+            'document_hit_ratio': _ratio(document_hits, self.document_misses),
+            'token_hits': tokens.hits,
+            'token_misses': tokens.misses,
+            'token_hit_ratio': _ratio(tokens.hits, tokens.misses),
+        }
+
+    def flush(self):
+        """
+        Writes buffered documents to the disk store.
+        """
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if self._conn is None or not self._pending:
+            return
+        self._conn.executemany("INSERT OR REPLACE INTO lemmatized (key, text) VALUES (?, ?)", list(self._pending.items()))
+        self._conn.commit()
+        self._pending.clear()
+
+    def _read(self, key: str) -> Optional[str]:
+        if self._conn is None:
+            return None
+        row = self._conn.execute("SELECT text FROM lemmatized WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _remember(self, key: str, lemmatized: str):
+        self._documents[key] = lemmatized
+        if len(self._documents) > self.max_documents:
+            self._documents.popitem(last=False)
+
+    @staticmethod
+    def _lemmatize_uncached(token: str) -> str:
+        return get_lemmatizer().lemmatize(token)
+
+def _ratio(hits: int, misses: int) -> float:
+    return hits / (hits + misses) if hits + misses else 0.0
+
+@functools.lru_cache(maxsize=None)
+def get_lemma_cache() -> LemmaCache:
+    """
+    Returns the process-wide lemmatization cache, stored on disk at LEMMA_CACHE_PATH if it is set.
+    """
+    return LemmaCache(path=os.environ.get('LEMMA_CACHE_PATH'))
+
+def make_vectorizer(**kwargs):
+    """
+    Returns a new, unfitted English TF-IDF vectorizer. scikit-learn is imported on first call.
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    return TfidfVectorizer(stop_words='english', **kwargs)
+
+def prefetch(download_dir: Optional[str] = None):
+    """
+    Downloads every NLTK resource into `download_dir` (NLTK's default location if None)
+    and checks that the lemmatizer and tokenizer load from it.
+    """
+    import nltk
+
+    for name in NLTK_RESOURCES:
+        if not nltk.download(name, download_dir=download_dir, quiet=True, raise_on_error=True):
+            raise RuntimeError(f"Could not download NLTK '{name}' data.")
+    if download_dir and download_dir not in nltk.data.path:
+        nltk.data.path.insert(0, download_dir)
+    get_lemmatizer().lemmatize('warming')
+    get_tokenizer()('Prefetched.')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Download the NLTK data the job scraper needs.")
+    parser.add_argument('--download-dir', help="Target directory; point NLTK_DATA at it at runtime.")
+    args = parser.parse_args()
+    prefetch(args.download_dir)
+    print(f"NLTK data installed in {args.download_dir or 'the default NLTK data directory'}.")
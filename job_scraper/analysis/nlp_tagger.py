@@ -1,12 +1,16 @@
 import sys
 import os
-import re
-from typing import List, Dict, Set
+import hashlib
+import json
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, List, Dict, Optional, Set, Tuple
 
 # Add the parent directory to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
-from job_scraper.db.supabase_client import SupabaseClient
+from job_scraper.db.supabase_client import SupabaseClient, input_hash
+from job_scraper.utils.batching import chunked, map_chunks
+from job_scraper.utils.phrase_matcher import PhraseMatcher
 
 # --- Keyword Definitions for Tagging ---
 
@@ -26,17 +30,98 @@ CULTURE_KEYWORDS: Dict[str, List[str]] = {
     'innovative': ['innovative', 'cutting-edge', 'state-of-the-art'],
 }
 
+def load_tag_dictionaries(path: str) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Loads tag dictionaries from a JSON file of the form
+    {"industry": {"fintech": ["fintech", "banking"]}, "culture": {...}}.
+    """
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def default_tag_dictionaries() -> Dict[str, Dict[str, List[str]]]:
+    """
+    Returns the built-in dictionaries, extended with the file at TAG_DICTIONARIES_PATH if set.
+    Tags in the file replace built-in tags of the same name.
+    """
+    dictionaries = {
+        category: {tag: list(patterns) for tag, patterns in keywords.items()}
+        for category, keywords in (('industry', INDUSTRY_KEYWORDS), ('culture', CULTURE_KEYWORDS))
+    }
+    path = os.environ.get("TAG_DICTIONARIES_PATH")
+    if path:
+        for category, keywords in load_tag_dictionaries(path).items():
+            dictionaries.setdefault(category, {}).update(keywords)
+    return dictionaries
+
+def build_tag_matcher(tag_dictionaries: Dict[str, Dict[str, List[str]]]) -> PhraseMatcher:
+    """
+    Compiles every keyword of every category into one whole-word matcher labelled with its tag.
+    """
+    return PhraseMatcher({
+        pattern: tag
+        for keywords in tag_dictionaries.values()
+        for tag, patterns in keywords.items()
+        for pattern in patterns
+    })
+
+def dictionary_version(tag_dictionaries: Dict[str, Dict[str, List[str]]]) -> str:
+    """
+    Returns a short fingerprint of the dictionaries; any edit to a keyword changes it.
+    """
+    canonical = json.dumps(tag_dictionaries, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+_worker_matcher: Optional[PhraseMatcher] = None
+_worker_version: Optional[str] = None
+
+def _init_worker(matcher: PhraseMatcher, version: Optional[str] = None):
+    # Each pool process unpickles the matcher once instead of once per chunk.
+    global _worker_matcher, _worker_version
+    _worker_matcher, _worker_version = matcher, version
+
+def _tag_chunk(descriptions: List[str]) -> List[Set[str]]:
+    return [_worker_matcher.labels(description) if description else set() for description in descriptions]
+
+def tag_companies(matcher: PhraseMatcher, version: str, companies: List[Tuple[Any, Optional[str]]]) -> List[Tuple[Any, List[str], str]]:
+    """
+    Tags (company_id, description) pairs. Returns each company's ID, sorted tags
+    and the input hash of its description under the dictionary `version`.
+    """
+    return [
+        (company_id, sorted(matcher.labels(description)) if description else [], input_hash(version, description))
+        for company_id, description in companies
+    ]
+
+def _tag_company_chunk(companies: List[Tuple[Any, Optional[str]]]) -> List[Tuple[Any, List[str], str]]:
+    return tag_companies(_worker_matcher, _worker_version, companies)
 
 class NLPTagger:
     """
     Analyzes company descriptions to generate descriptive tags.
+
+    All keywords are compiled into a single `PhraseMatcher`, so a description is
+    tagged in one pass whatever the size of the dictionaries, and keywords only
+    match whole words ('ai' does not match "maintain").
+
+    With `incremental` (the default), every tagged company stores a hash of its
+    description and the dictionary version, and a run only tags the companies
+    whose description or dictionaries changed since. Otherwise a run tags the
+    companies without tags.
+
+    A run streams companies to one process pool of `max_workers` in chunks of
+    `chunk_size`, and writes their tags every `flush_size` companies.
     """
-    def __init__(self):
-        self.db_client = SupabaseClient()
-        self.tag_dictionaries = {
-            'industry': INDUSTRY_KEYWORDS,
-            'culture': CULTURE_KEYWORDS
-        }
+    def __init__(self, flush_size: int = 1000, db_client: Optional[SupabaseClient] = None,
+                 tag_dictionaries: Optional[Dict[str, Dict[str, List[str]]]] = None,
+                 max_workers: Optional[int] = None, incremental: bool = True, chunk_size: int = 500):
+        self.db_client = db_client or SupabaseClient()
+        self.flush_size = flush_size
+        self.chunk_size = chunk_size
+        self.tag_dictionaries = tag_dictionaries or default_tag_dictionaries()
+        self.dictionary_version = dictionary_version(self.tag_dictionaries)
+        self.matcher = build_tag_matcher(self.tag_dictionaries)
+        self.incremental = incremental
+        self.max_workers = max_workers or os.cpu_count() or 1
 
     def generate_tags(self, description: str) -> Set[str]:
         """
@@ -44,21 +129,35 @@ class NLPTagger:
         """
         if not description:
             return set()
+        return self.matcher.labels(description)
 
-        found_tags = set()
-        text_lower = description.lower()
+    def match_tags(self, description: str) -> Dict[str, List[Tuple[int, int]]]:
+        """
+        Returns the (start, end) positions of every keyword occurrence, grouped by tag.
+        The number of positions per tag can be used to weight tags.
+        """
+        positions: Dict[str, List[Tuple[int, int]]] = {}
+        for tag, start, end in self.matcher.finditer(description):
+            positions.setdefault(tag, []).append((start, end))
+        return positions
 
-        for category, keywords in self.tag_dictionaries.items():
-            for tag, patterns in keywords.items():
-                for pattern in patterns:
-                    # Using simple 'in' for now, can be upgraded to regex for whole words
-                    if pattern in text_lower:
-                        found_tags.add(tag)
-                        # Once a tag is found for a category, we could break
-                        # to avoid multiple tags from the same keyword list,
-                        # but for now, let's be inclusive.
+    def tag_counts(self, description: str) -> Dict[str, int]:
+        """
+        Returns how many keyword occurrences each tag has in the text.
+        """
+        return self.matcher.counts(description) if description else {}
 
-        return found_tags
+    def tag_many(self, descriptions: List[str], chunk_size: int = 500) -> List[Set[str]]:
+        """
+        Tags many descriptions, in chunks of `chunk_size` spread over `max_workers`
+        processes. Returns the tags of each description, in order.
+        """
+        if self.max_workers <= 1 or len(descriptions) <= chunk_size:
+            return [self.generate_tags(description) for description in descriptions]
+        with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                 initargs=(self.matcher,)) as executor:
+            return [tags for chunk_tags in executor.map(_tag_chunk, chunked(descriptions, chunk_size))
+                    for tags in chunk_tags]
 
     def run(self):
         """
@@ -66,24 +165,41 @@ class NLPTagger:
         """
         print("Starting NLP tagging process...")
 
-        companies_to_tag = self.db_client.get_companies_for_tagging()
-
-        if not companies_to_tag:
-            print("No companies with descriptions found to tag.")
+        if self.incremental:
+            companies_to_tag = self.db_client.iter_companies_needing_tags(self.dictionary_version)
+        else:
+            companies_to_tag = self.db_client.iter_companies_for_tagging()
+
+        num_companies = 0
+        tags_by_company = {}
+        input_hashes = {}
+        # Companies are streamed page by page to the pool and their tags written every `flush_size` companies.
+        # Tagged companies drop out of the filter behind the keyset cursor, so none are skipped.
+        companies = ((company.get('id'), company.get('description')) for company in companies_to_tag)
+        for results in map_chunks(_tag_company_chunk, chunked(companies, self.chunk_size), self.max_workers,
+                                  initializer=_init_worker, initargs=(self.matcher, self.dictionary_version)):
+            for company_id, tags, description_hash in results:
+                num_companies += 1
+                if self.incremental:
+                    # Companies without tags get a hash too, so they are not re-tagged until something changes.
+                    input_hashes[company_id] = description_hash
+                if tags:
+                    print(f"  - Company {company_id}: Generated tags -> {tags}")
+                else:
+                    print(f"  - Company {company_id}: No tags generated.")
+                tags_by_company[company_id] = tags
+
+            if len(tags_by_company) >= self.flush_size:
+                self.db_client.update_companies_tags(tags_by_company, input_hashes=input_hashes)
+                tags_by_company, input_hashes = {}, {}
+
+        if tags_by_company:
+            self.db_client.update_companies_tags(tags_by_company, input_hashes=input_hashes)
+
+        if not num_companies:
+            print("No new or changed company descriptions found to tag.")
             return
 
-        for company in companies_to_tag:
-            company_id = company.get('id')
-            description = company.get('description')
-
-            tags = self.generate_tags(description)
-
-            if tags:
-                print(f"  - Company {company_id}: Generated tags -> {tags}")
-                self.db_client.update_company_tags(company_id, list(tags))
-            else:
-                print(f"  - Company {company_id}: No tags generated.")
-
         print("\nNLP tagging process finished.")
 
 if __name__ == '__main__':
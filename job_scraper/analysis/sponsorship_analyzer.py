@@ -1,27 +1,136 @@
+import hashlib
 import sys
 import os
 import re
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
 # Add the parent directory to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
-from job_scraper.db.supabase_client import SupabaseClient
+from job_scraper.db.supabase_client import SupabaseClient, input_hash
+from job_scraper.utils.batching import chunked, map_chunks
 
-# Define keywords that suggest visa sponsorship.
-# Using regex patterns for more flexible matching (e.g., case-insensitivity).
+# Define keywords that suggest visa sponsorship, per language.
+# They are fused into one alternation below, so adding a pattern costs no extra pass over the text.
 SPONSORSHIP_KEYWORDS = [
-    re.compile(r'visa\s(sponsorship|support)', re.IGNORECASE),
-    re.compile(r'sponsorship\s(available|provided)', re.IGNORECASE),
-    re.compile(r'work\spermit', re.IGNORECASE),
-    re.compile(r'relocation\s(assistance|package|support)', re.IGNORECASE),
+    # English
+    r'visa\s+(?:sponsorship|support)',
+    r'sponsorship\s+(?:available|provided)',
+    r'work\s+permits?',
+    r'relocation\s+(?:assistance|package|support)',
+    # German
+    r'arbeitsbewilligung',
+    r'arbeitserlaubnis',
+    r'visums?unterst[üu]tzung',
+    r'unterst[üu]tzung\s+(?:beim|bei\s+der)\s+(?:visum|umzug|relocation)',
+    r'umzugs(?:hilfe|unterst[üu]tzung|paket)',
+    # French
+    r'permis\s+de\s+travail',
+    r'parrainage\s+(?:de|du)\s+visa',
+    r'aide\s+(?:à|a)\s+la\s+relocalisation',
+    r'aide\s+au\s+d[ée]m[ée]nagement',
+    # Italian
+    r'permess[oi]\s+di\s+lavoro',
+    r'sponsorizzazione\s+(?:del|per\s+il)\s+visto',
+    r'supporto\s+(?:al|per\s+il)\s+(?:visto|trasferimento)',
 ]
 
+# Matched against lowercased text: with every branch starting on a plain letter the regex
+# engine can skip ahead to candidate positions, which IGNORECASE and a leading \b both prevent.
+SPONSORSHIP_PATTERN = re.compile('|'.join(SPONSORSHIP_KEYWORDS))
+
+# Stored with every scanned job, so editing the keywords triggers a rescan.
+SPONSORSHIP_KEYWORDS_VERSION = hashlib.sha256('|'.join(SPONSORSHIP_KEYWORDS).encode('utf-8')).hexdigest()[:16]
+
+def mentions_sponsorship(description: str) -> bool:
+    """
+    Returns True if the text mentions visa sponsorship, a work permit or relocation support.
+    """
+    return SPONSORSHIP_PATTERN.search(description.lower()) is not None
+
+def find_sponsors(jobs: Iterable[Tuple[Any, str]]) -> Set[Any]:
+    """
+    Returns the IDs of the companies with at least one (company_id, description)
+    pair mentioning sponsorship. Each company's remaining jobs are skipped once it matches.
+    """
+    sponsors = set()
+    for company_id, description in jobs:
+        if company_id not in sponsors and mentions_sponsorship(description):
+            sponsors.add(company_id)
+    return sponsors
+
+def scan_jobs(jobs: Iterable[Tuple[Any, Any, Optional[str]]]) -> Dict[Any, Tuple[bool, Optional[str]]]:
+    """
+    Maps each (job_id, company_id, description) to whether the description mentions
+    sponsorship and the `input_hash` of what was scanned. Jobs without a company get
+    no hash, so they are scanned again once they are linked.
+    """
+    return {
+        job_id: (bool(description) and mentions_sponsorship(description),
+                 input_hash(SPONSORSHIP_KEYWORDS_VERSION, company_id, description or '') if company_id else None)
+        for job_id, company_id, description in jobs
+    }
+
 class SponsorshipAnalyzer:
     """
     Analyzes job descriptions to identify companies that may offer visa sponsorship.
+
+    Jobs are streamed from the database in pages and scanned in chunks of
+    `chunk_size` on a pool of `max_workers` processes (all CPUs by default; 1
+    scans in-process).
+
+    With `incremental` (the default), every scanned job stores whether it mentions
+    sponsorship and a hash of its company, description and the keyword version.
+    A run only scans the jobs where one of those changed, including jobs that lost
+    their company, and the database re-derives the flag of their current and
+    previous companies (deleting a job does so too, see migration 012). Otherwise
+    every linked job is scanned, skipping the jobs of companies already flagged,
+    and the companies found are flagged; such a run never clears a flag.
     """
-    def __init__(self):
-        self.db_client = SupabaseClient()
+    def __init__(self, db_client: Optional[SupabaseClient] = None, max_workers: Optional[int] = None,
+                 chunk_size: int = 2000, incremental: bool = True):
+        self.db_client = db_client or SupabaseClient()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.incremental = incremental
+
+    def _jobs_to_scan(self, companies_that_sponsor: Set[Any]):
+        """
+        Yields (company_id, description) for every job with both, skipping known sponsors.
+        """
+        self.num_jobs = 0
+        for job in self.db_client.iter_jobs_with_company():
+            self.num_jobs += 1
+            description = job.get('description', '')
+            company_id = job.get('company_id')
+            if description and company_id and company_id not in companies_that_sponsor:
+                yield company_id, description
+
+    def find_companies_that_sponsor(self) -> Set[Any]:
+        """
+        Scans every job with a linked company and returns the IDs of the companies that mention sponsorship.
+        """
+        companies_that_sponsor: Set[Any] = set()
+        for sponsors in map_chunks(find_sponsors, chunked(self._jobs_to_scan(companies_that_sponsor), self.chunk_size), self.max_workers):
+            companies_that_sponsor |= sponsors
+        return companies_that_sponsor
+
+    def scan_changed_jobs(self) -> Tuple[int, int]:
+        """
+        Scans the jobs that are new or changed since they were last scanned and stores their flags.
+        Returns the number of jobs scanned and how many of them mention sponsorship.
+        """
+        jobs = (
+            (job.get('id'), job.get('company_id'), job.get('description'))
+            for job in self.db_client.iter_jobs_needing_sponsorship_scan(SPONSORSHIP_KEYWORDS_VERSION)
+        )
+        num_jobs = num_mentions = 0
+        # Stored jobs drop out of the function's results behind the keyset cursor, so none are skipped.
+        for results in map_chunks(scan_jobs, chunked(jobs, self.chunk_size), self.max_workers):
+            self.db_client.update_jobs_sponsorship(results)
+            num_jobs += len(results)
+            num_mentions += sum(1 for mentions, _ in results.values() if mentions)
+        return num_jobs, num_mentions
 
     def analyze(self):
         """
@@ -29,37 +138,29 @@ class SponsorshipAnalyzer:
         """
         print("Starting sponsorship analysis...")
 
-        all_jobs = self.db_client.get_all_jobs_with_company()
-
-        if not all_jobs:
-            print("No jobs with linked companies found to analyze.")
+        if self.incremental:
+            num_jobs, num_mentions = self.scan_changed_jobs()
+            if not num_jobs:
+                print("No new or changed jobs found to analyze.")
+                return
+            print(f"\nScanned {num_jobs} new or changed jobs, {num_mentions} mention sponsorship.")
+            print("\nSponsorship analysis finished.")
             return
 
-        companies_that_sponsor = set()
-
-        for job in all_jobs:
-            description = job.get('description', '')
-            company_id = job.get('company_id')
+        companies_that_sponsor = self.find_companies_that_sponsor()
 
-            if not description or not company_id:
-                continue
-
-            for pattern in SPONSORSHIP_KEYWORDS:
-                if pattern.search(description):
-                    print(f"  - Found sponsorship keyword in job from company {company_id}.")
-                    companies_that_sponsor.add(company_id)
-                    # Move to the next job once a keyword is found
-                    break
+        if not self.num_jobs:
+            print("No jobs with linked companies found to analyze.")
+            return
 
-        print(f"\nFound {len(companies_that_sponsor)} companies that potentially offer sponsorship.")
+        print(f"\nFound {len(companies_that_sponsor)} companies that potentially offer sponsorship in {self.num_jobs} jobs.")
 
         if not companies_that_sponsor:
             print("No companies found to update.")
             return
 
-        for company_id in companies_that_sponsor:
-            print(f"  - Updating company {company_id} to reflect sponsorship.")
-            self.db_client.update_company_sponsorship(company_id, True)
+        print(f"  - Updating {len(companies_that_sponsor)} companies to reflect sponsorship.")
+        self.db_client.update_companies_sponsorship(list(companies_that_sponsor), True)
 
         print("\nSponsorship analysis finished.")
 
@@ -0,0 +1,320 @@
+import json
+import os
+import sys
+import uuid
+import logging
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.analysis.matching_service import lemmatize_text
+from job_scraper.analysis.nlp_resources import get_lemma_cache, make_vectorizer
+from job_scraper.utils.watermark import fingerprint
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# The arrays written by `save`, each as <name>.<generation>.npy.
+ARRAYS = ('df', 'idf', 'counts_data', 'counts_indices', 'counts_indptr', 'vectors_data', 'vectors_indices', 'vectors_indptr')
+
+class CorpusTfidfModel:
+    """
+    A TF-IDF model over the whole corpus of job descriptions, with the vector of every job precomputed.
+
+    IDF is fitted once over all jobs instead of over each scored pair, so scoring a
+    candidate is one sparse product against the stored job vectors. Weighting
+    matches scikit-learn's TfidfVectorizer (smooth IDF, L2-normalized rows) with the
+    stop words and lemmatization of `calculate_match_score`.
+
+    New and changed jobs are folded in with `add`: they are weighted with the current
+    IDF, and their terms are counted so that `refit` can recompute the IDF of the
+    whole corpus exactly, without the texts. A refit happens automatically once
+    `refit_fraction` of the corpus was added since the last one.
+
+    The model is saved to a directory and memory-mapped back by workers.
+    """
+    def __init__(self, lemmatize: bool = True, refit_fraction: float = 0.2):
+        self.lemmatize = lemmatize
+        self.refit_fraction = refit_fraction
+        self.vocabulary: Dict[str, int] = {}
+        self.docs_at_fit = 0
+        self.added_since_fit = 0
+        self._df = np.zeros(0, dtype=np.int64)
+        self._idf = np.zeros(0, dtype=np.float32)
+        self._counts = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self._vectors = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self._ids: List[Any] = []
+        self._fingerprints: List[str] = []
+        self._positions: Dict[Any, int] = {}
+        self._analyzer = None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, job_id) -> bool:
+        return job_id in self._positions
+
+    @property
+    def needs_refit(self) -> bool:
+        return self.added_since_fit > 0 and self.added_since_fit >= self.refit_fraction * max(self.docs_at_fit, 1)
+
+    def fit(self, ids: Sequence[Any], texts: Sequence[str]) -> 'CorpusTfidfModel':
+        """
+        Fits the model on a corpus of jobs, replacing anything stored.
+        """
+        self.vocabulary = {}
+        self._df = np.zeros(0, dtype=np.int64)
+        self._idf = np.zeros(0, dtype=np.float32)
+        self._counts = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self._vectors = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self._ids, self._fingerprints, self._positions = [], [], {}
+        self.add(ids, texts, auto_refit=False)
+        self.refit()
+        return self
+
+    def add(self, ids: Sequence[Any], texts: Sequence[str], auto_refit: bool = True) -> None:
+        """
+        Adds jobs, replacing the stored ones with the same ids. The new vectors use the
+        current IDF (terms never seen before get theirs from the current corpus).
+        """
+        if len(ids) != len(texts):
+            raise ValueError("ids and texts must have the same length.")
+        # If an id appears more than once, the last text wins.
+        latest = {job_id: i for i, job_id in enumerate(ids)}
+        self.remove([job_id for job_id in latest if job_id in self._positions])
+        ids, texts = list(latest), [texts[i] for i in latest.values()]
+        if not ids:
+            return
+
+        num_terms = len(self.vocabulary)
+        counts = self._count(texts, grow=True)
+        self._df = np.concatenate([self._df, np.zeros(len(self.vocabulary) - num_terms, dtype=np.int64)])
+        self._df = self._df + np.bincount(counts.indices, minlength=len(self.vocabulary))
+        num_docs = len(self._ids) + len(ids)
+        self._idf = np.concatenate([self._idf, self._compute_idf(self._df[num_terms:], num_docs)])
+
+        self._counts = sparse.vstack([self._resized(self._counts), counts], format='csr')
+        self._vectors = sparse.vstack([self._resized(self._vectors), self._weigh(counts)], format='csr')
+        for job_id, text in zip(ids, texts):
+            self._positions[job_id] = len(self._ids)
+            self._ids.append(job_id)
+            self._fingerprints.append(fingerprint(text))
+        self.added_since_fit += len(ids)
+        if auto_refit and self.needs_refit:
+            self.refit()
+
+    def remove(self, ids: Iterable[Any]) -> int:
+        """
+        Removes jobs from the model. Unknown ids are ignored. Returns the number of jobs removed.
+        """
+        drop = {self._positions[job_id] for job_id in ids if job_id in self._positions}
+        if not drop:
+            return 0
+        keep = np.array([i for i in range(len(self._ids)) if i not in drop], dtype=np.int64)
+        removed = self._counts[sorted(drop)]
+        self._df = self._df - np.bincount(removed.indices, minlength=len(self.vocabulary))
+        self._counts, self._vectors = self._counts[keep], self._vectors[keep]
+        self._ids = [self._ids[i] for i in keep]
+        self._fingerprints = [self._fingerprints[i] for i in keep]
+        self._positions = {job_id: i for i, job_id in enumerate(self._ids)}
+        return len(drop)
+
+    def update(self, rows: Iterable[Dict[str, Any]]) -> Tuple[int, int]:
+        """
+        Syncs the model with the complete set of jobs, given as rows with 'id' and
+        'description' keys. Only new and changed descriptions are processed, and jobs
+        missing from `rows` are removed. Returns the numbers of jobs added and removed.
+        """
+        changed_ids, changed_texts, present = [], [], set()
+        for row in rows:
+            job_id, text = row['id'], row.get('description') or ''
+            present.add(job_id)
+            position = self._positions.get(job_id)
+            if position is None or self._fingerprints[position] != fingerprint(text):
+                changed_ids.append(job_id)
+                changed_texts.append(text)
+        removed = self.remove([job_id for job_id in self._ids if job_id not in present])
+        self.add(changed_ids, changed_texts)
+        logging.info(f"Updated the TF-IDF model: {len(changed_ids)} jobs added or changed, {removed} removed, {len(self)} in total.")
+        return len(changed_ids), removed
+
+    def refit(self) -> None:
+        """
+        Recomputes the IDF over the current corpus and re-weights every job vector.
+        """
+        self._idf = self._compute_idf(self._df, len(self._ids))
+        self._vectors = self._weigh(self._resized(self._counts))
+        self.docs_at_fit = len(self._ids)
+        self.added_since_fit = 0
+
+    def transform(self, texts: Sequence[str]) -> sparse.csr_matrix:
+        """
+        Returns the TF-IDF vectors of texts. Terms outside the vocabulary are ignored.
+        """
+        return self._weigh(self._count(texts, grow=False))
+
+    def similarities(self, candidate_text: str) -> np.ndarray:
+        """
+        Returns the cosine similarity of a text to every stored job, in the order of `ids`.
+        """
+        return np.asarray((self._vectors @ self.transform([candidate_text]).T).todense()).ravel()
+
+    def score(self, candidate_text: str, job_id: Any) -> int:
+        """
+        Returns the match score (0-100) of a text against a stored job.
+        """
+        if not candidate_text or job_id not in self._positions:
+            return 0
+        job_vector = self._vectors[self._positions[job_id]]
+        return int((job_vector @ self.transform([candidate_text]).T).sum() * 100)
+
+    def score_texts(self, candidate_text: str, job_text: str) -> int:
+        """
+        Returns the match score (0-100) of two texts weighted with the corpus IDF.
+        """
+        if not candidate_text or not job_text:
+            return 0
+        vectors = self.transform([candidate_text, job_text])
+        return int((vectors[0] @ vectors[1].T).sum() * 100)
+
+    @property
+    def ids(self) -> List[Any]:
+        return list(self._ids)
+
+    def save(self, directory: str) -> None:
+        """
+        Writes the model to a directory. Arrays are written under a new generation and
+        meta.json is replaced last, so processes that memory-mapped the previous
+        generation keep reading consistent data.
+        """
+        os.makedirs(directory, exist_ok=True)
+        generation = uuid.uuid4().hex[:12]
+        arrays = {
+            'df': self._df, 'idf': self._idf,
+            'counts_data': self._counts.data, 'counts_indices': self._counts.indices, 'counts_indptr': self._counts.indptr,
+            'vectors_data': self._vectors.data, 'vectors_indices': self._vectors.indices, 'vectors_indptr': self._vectors.indptr,
+        }
+        for name in ARRAYS:
+            np.save(os.path.join(directory, f'{name}.{generation}.npy'), np.asarray(arrays[name]))
+
+        previous = _read_meta(directory)
+        meta = {
+            'generation': generation,
+            'lemmatize': self.lemmatize,
+            'refit_fraction': self.refit_fraction,
+            'docs_at_fit': self.docs_at_fit,
+            'added_since_fit': self.added_since_fit,
+            'terms': sorted(self.vocabulary, key=self.vocabulary.get),
+            'ids': self._ids,
+            'fingerprints': self._fingerprints,
+        }
+        tmp_path = os.path.join(directory, f'meta.json.{generation}')
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(directory, 'meta.json'))
+
+        # Open memory maps keep the unlinked files of the previous generation alive.
+        if previous:
+            for name in ARRAYS:
+                try:
+                    os.remove(os.path.join(directory, f"{name}.{previous['generation']}.npy"))
+                except FileNotFoundError:
+                    pass
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> Optional['CorpusTfidfModel']:
+        """
+        Loads a model written by `save`, or returns None if there is none. With `mmap`,
+        the arrays are memory-mapped read-only and only copied if the model is modified.
+        """
+        meta = _read_meta(directory)
+        if meta is None:
+            return None
+        model = cls(lemmatize=meta['lemmatize'], refit_fraction=meta['refit_fraction'])
+        arrays = {
+            name: np.load(os.path.join(directory, f"{name}.{meta['generation']}.npy"), mmap_mode='r' if mmap else None)
+            for name in ARRAYS
+        }
+        model.vocabulary = {term: i for i, term in enumerate(meta['terms'])}
+        model.docs_at_fit, model.added_since_fit = meta['docs_at_fit'], meta['added_since_fit']
+        model._df, model._idf = arrays['df'], arrays['idf']
+        shape = (len(meta['ids']), len(meta['terms']))
+        model._counts = sparse.csr_matrix((arrays['counts_data'], arrays['counts_indices'], arrays['counts_indptr']), shape=shape, copy=False)
+        model._vectors = sparse.csr_matrix((arrays['vectors_data'], arrays['vectors_indices'], arrays['vectors_indptr']), shape=shape, copy=False)
+        model._ids, model._fingerprints = meta['ids'], meta['fingerprints']
+        model._positions = {job_id: i for i, job_id in enumerate(model._ids)}
+        return model
+
+    def _count(self, texts: Sequence[str], grow: bool) -> sparse.csr_matrix:
+        """
+        Returns the term counts of texts. With `grow`, unseen terms are added to the vocabulary.
+        """
+        if self._analyzer is None:
+            self._analyzer = make_vectorizer().build_analyzer()
+        data, indices, indptr = [], [], [0]
+        for text in texts:
+            if text and self.lemmatize:
+                text = lemmatize_text(text)
+            for term, count in Counter(self._analyzer(text or '')).items():
+                column = self.vocabulary.get(term)
+                if column is None:
+                    if not grow:
+                        continue
+                    column = self.vocabulary[term] = len(self.vocabulary)
+                indices.append(column)
+                data.append(count)
+            indptr.append(len(indices))
+        return sparse.csr_matrix(
+            (np.array(data, dtype=np.float32), np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int64)),
+            shape=(len(texts), len(self.vocabulary))
+        )
+
+    def _weigh(self, counts: sparse.csr_matrix) -> sparse.csr_matrix:
+        weighted = sparse.csr_matrix(counts.multiply(self._idf[:counts.shape[1]].reshape(1, -1)), dtype=np.float32)
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sparse.csr_matrix(sparse.diags((1 / norms).astype(np.float32)) @ weighted, dtype=np.float32)
+
+    def _resized(self, matrix: sparse.csr_matrix) -> sparse.csr_matrix:
+        # Rows stored before the vocabulary grew have no entries in the new columns.
+        return sparse.csr_matrix((matrix.data, matrix.indices, matrix.indptr), shape=(matrix.shape[0], len(self.vocabulary)))
+
+    @staticmethod
+    def _compute_idf(df: np.ndarray, num_docs: int) -> np.ndarray:
+        # Smoothed as in scikit-learn: every term is counted as if seen in one extra document.
+        return (np.log((1 + num_docs) / (1 + df)) + 1).astype(np.float32)
+
+def _read_meta(directory: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(directory, 'meta.json')) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+if __name__ == '__main__':
+    # Fits the model over every job description, or folds in the jobs that changed since the last run.
+    import argparse
+    from job_scraper.db.supabase_client import SupabaseClient
+    from job_scraper.utils.cache import cache_path
+
+    parser = argparse.ArgumentParser(description="Build or update the corpus TF-IDF model of job descriptions.")
+    parser.add_argument('command', choices=['fit', 'update'])
+    parser.add_argument('--dir', default=os.environ.get('TFIDF_MODEL_DIR') or cache_path('tfidf_model'))
+    args = parser.parse_args()
+
+    rows = SupabaseClient().iter_rows('jobs', 'id,description', filters={'description': 'not.is.null'})
+    model = CorpusTfidfModel.load(args.dir, mmap=False) if args.command == 'update' else None
+    if model is None:
+        rows = list(rows)
+        model = CorpusTfidfModel().fit([row['id'] for row in rows], [row['description'] for row in rows])
+    else:
+        model.update(rows)
+    model.save(args.dir)
+    print(f"Saved the TF-IDF model of {len(model)} jobs and {len(model.vocabulary)} terms to {args.dir}.")
+    print(f"Set TFIDF_MODEL_DIR={args.dir} for calculate_match_score to use it.")
+    stats = get_lemma_cache().stats()
+    print(f"Lemmatization cache: {stats['document_hit_ratio']:.1%} of documents and {stats['token_hit_ratio']:.1%} of tokens were hits.")
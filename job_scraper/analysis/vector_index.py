@@ -0,0 +1,265 @@
+import json
+import os
+import sys
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+class VectorIndex:
+    """
+    A local nearest-neighbour index over job embeddings.
+
+    Vectors are stored L2-normalized in one float32 matrix, so a top-k query is a
+    single matrix-vector product (cosine similarity). After `train_partitions`,
+    queries only scan the `nprobe` closest partitions (IVF), which trades a little
+    recall for much lower latency on large indexes.
+
+    Jobs can be added, replaced and removed incrementally, and the index can be
+    saved to a directory and memory-mapped back by other processes.
+    """
+    def __init__(self, dim: int):
+        self.dim = dim
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self._size = 0
+        self._ids: List[Any] = []
+        self._positions: Dict[Any, int] = {}
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments = np.zeros(0, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, job_id) -> bool:
+        return job_id in self._positions
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]], dim: Optional[int] = None) -> 'VectorIndex':
+        """
+        Builds an index from job rows with 'id' and 'embedding' keys.
+        Embeddings may be lists or pgvector strings such as '[0.1,0.2]'.
+        """
+        ids, vectors = [], []
+        for row in rows:
+            embedding = _parse_embedding(row.get('embedding'))
+            if embedding is not None and row.get('id') is not None:
+                ids.append(row['id'])
+                vectors.append(embedding)
+
+        if dim is None:
+            if not vectors:
+                raise ValueError("Cannot infer the dimension of an empty index.")
+            dim = len(vectors[0])
+        index = cls(dim)
+        if vectors:
+            index.add(ids, vectors)
+        return index
+
+    def add(self, ids: Sequence[Any], vectors) -> None:
+        """
+        Adds vectors, replacing the stored vector for ids that are already indexed.
+        """
+        vectors = self._normalize(np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim))
+        if len(ids) != len(vectors):
+            raise ValueError("ids and vectors must have the same length.")
+        self._ensure_writable()
+
+        # If an id appears more than once, the last vector wins.
+        latest = {job_id: i for i, job_id in enumerate(ids)}
+        new_ids = [job_id for job_id in latest if job_id not in self._positions]
+        for job_id, i in latest.items():
+            if job_id in self._positions:
+                position = self._positions[job_id]
+                self._vectors[position] = vectors[i]
+                if self._centroids is not None:
+                    self._assignments[position] = self._assign(vectors[i:i + 1])[0]
+
+        if not new_ids:
+            return
+        rows = [latest[job_id] for job_id in new_ids]
+        self._reserve(self._size + len(rows))
+        start, end = self._size, self._size + len(rows)
+        self._vectors[start:end] = vectors[rows]
+        if self._centroids is not None:
+            self._assignments[start:end] = self._assign(vectors[rows])
+        for offset, job_id in enumerate(new_ids):
+            self._ids.append(job_id)
+            self._positions[job_id] = start + offset
+        self._size = end
+
+    def remove(self, ids: Iterable[Any]) -> int:
+        """
+        Removes ids from the index. Unknown ids are ignored.
+        Returns the number of vectors removed.
+        """
+        self._ensure_writable()
+        removed = 0
+        for job_id in ids:
+            position = self._positions.pop(job_id, None)
+            if position is None:
+                continue
+            # Move the last row into the freed slot to keep the matrix dense.
+            last = self._size - 1
+            if position != last:
+                moved_id = self._ids[last]
+                self._vectors[position] = self._vectors[last]
+                self._assignments[position] = self._assignments[last]
+                self._ids[position] = moved_id
+                self._positions[moved_id] = position
+            self._ids.pop()
+            self._size -= 1
+            removed += 1
+        return removed
+
+    def search(self, query, k: int = 10, nprobe: int = 8) -> List[Tuple[Any, float]]:
+        """
+        Returns the k most similar (job_id, cosine_similarity) pairs, best first.
+        `nprobe` is the number of partitions scanned once the index is partitioned.
+        """
+        return self.search_many([query], k=k, nprobe=nprobe)[0]
+
+    def search_many(self, queries, k: int = 10, nprobe: int = 8) -> List[List[Tuple[Any, float]]]:
+        """
+        Runs several queries at once. Returns one result list per query.
+        """
+        queries = self._normalize(np.asarray(queries, dtype=np.float32).reshape(-1, self.dim))
+        if self._size == 0 or k <= 0:
+            return [[] for _ in range(len(queries))]
+
+        vectors = self._vectors[:self._size]
+        nprobe = max(1, nprobe)
+        results = []
+        for query in queries:
+            if self._centroids is not None and nprobe < len(self._centroids):
+                probes = np.argpartition(-(self._centroids @ query), nprobe - 1)[:nprobe]
+                rows = np.flatnonzero(np.isin(self._assignments[:self._size], probes))
+                scores = vectors[rows] @ query
+            else:
+                rows, scores = None, vectors @ query
+
+            top = min(k, len(scores))
+            if top == 0:
+                results.append([])
+                continue
+            best = np.argpartition(-scores, top - 1)[:top]
+            best = best[np.argsort(-scores[best])]
+            positions = best if rows is None else rows[best]
+            results.append([(self._ids[p], float(scores[b])) for p, b in zip(positions, best)])
+        return results
+
+    def train_partitions(self, nlist: int = 256, iterations: int = 10, sample_size: int = 50_000, seed: int = 0) -> None:
+        """
+        Clusters the stored vectors into `nlist` partitions with spherical k-means
+        so that queries only need to scan a few of them.
+        """
+        if self._size == 0:
+            raise ValueError("Cannot partition an empty index.")
+        self._ensure_writable()
+        rng = np.random.default_rng(seed)
+        vectors = self._vectors[:self._size]
+        nlist = min(nlist, self._size)
+
+        sample = vectors[rng.choice(self._size, size=min(sample_size, self._size), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            # Empty partitions keep their previous centroid.
+            empty = ~sums.any(axis=1)
+            sums[empty] = centroids[empty]
+            centroids = self._normalize(sums)
+
+        self._centroids = centroids
+        self._assignments = np.zeros(len(self._vectors), dtype=np.int32)
+        self._assignments[:self._size] = self._assign(vectors)
+        logging.info(f"Partitioned {self._size} vectors into {nlist} lists.")
+
+    def save(self, directory: str) -> None:
+        """
+        Writes the index to a directory (vectors.npy, ids.json and, if partitioned, the IVF data).
+        """
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, 'vectors.npy'), self._vectors[:self._size])
+        with open(os.path.join(directory, 'ids.json'), 'w') as f:
+            json.dump({'dim': self.dim, 'ids': self._ids}, f)
+        if self._centroids is not None:
+            np.save(os.path.join(directory, 'centroids.npy'), self._centroids)
+            np.save(os.path.join(directory, 'assignments.npy'), self._assignments[:self._size])
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> 'VectorIndex':
+        """
+        Loads an index written by `save`. With `mmap`, the vector matrix is memory-mapped
+        read-only and only copied into memory if the index is modified.
+        """
+        with open(os.path.join(directory, 'ids.json')) as f:
+            meta = json.load(f)
+        index = cls(meta['dim'])
+        index._vectors = np.load(os.path.join(directory, 'vectors.npy'), mmap_mode='r' if mmap else None)
+        index._ids = meta['ids']
+        index._size = len(index._ids)
+        index._positions = {job_id: i for i, job_id in enumerate(index._ids)}
+        index._assignments = np.zeros(index._size, dtype=np.int32)
+        centroids_path = os.path.join(directory, 'centroids.npy')
+        if os.path.exists(centroids_path):
+            index._centroids = np.load(centroids_path)
+            index._assignments = np.load(os.path.join(directory, 'assignments.npy'))
+        return index
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self._centroids.T, axis=1).astype(np.int32)
+
+    def _reserve(self, size: int) -> None:
+        # Grow geometrically so incremental adds stay amortized O(1).
+        if size <= len(self._vectors):
+            return
+        capacity = max(size, 2 * len(self._vectors), 1024)
+        vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+        vectors[:self._size] = self._vectors[:self._size]
+        assignments = np.zeros(capacity, dtype=np.int32)
+        assignments[:self._size] = self._assignments[:self._size]
+        self._vectors, self._assignments = vectors, assignments
+
+    def _ensure_writable(self) -> None:
+        if isinstance(self._vectors, np.memmap) or not self._vectors.flags.writeable:
+            self._vectors = np.array(self._vectors)
+            self._assignments = np.array(self._assignments)
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (vectors / norms).astype(np.float32)
+
+def _parse_embedding(value) -> Optional[List[float]]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return None
+    return list(value) if value else None
+
+if __name__ == '__main__':
+    # Builds the index from the jobs table and saves it to the local cache directory.
+    from job_scraper.db.supabase_client import SupabaseClient
+    from job_scraper.utils.cache import cache_path
+
+    # Streamed page by page, so only the parsed vectors are held in memory.
+    try:
+        index = VectorIndex.from_rows(SupabaseClient().iter_job_embeddings())
+    except ValueError as e:
+        # Raised for an empty table, where the dimension cannot be inferred.
+        print(f"No index built: {e}")
+    else:
+        if len(index) > 10_000:
+            index.train_partitions()
+        index.save(cache_path('job_vector_index'))
+        print(f"Indexed {len(index)} job embeddings.")
@@ -0,0 +1,47 @@
+"""
+Measures Adzuna crawl throughput against the offline mock server.
+
+Usage: python job_scraper/benchmarks/bench_adzuna_crawl.py [jobs_per_shard] [latency_ms]
+"""
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.scrapers.adzuna_scraper import AdzunaScraper
+from job_scraper.tests.mock_adzuna import MockAdzunaServer
+
+SHARDS = {"searches": ["python", "java", "data"], "locations": ["Zurich", "Geneva"]}
+
+async def crawl(total: int, latency: float, concurrency: int):
+    class BenchScraper(AdzunaScraper):
+        rate_limit = 1000.0
+        max_concurrency = concurrency
+
+    server = MockAdzunaServer(total=total, latency=latency)
+    async with httpx.AsyncClient(transport=server.transport) as client:
+        scraper = BenchScraper(app_id="id", api_key="key", client=client, base_url=server.base_url)
+        start = time.perf_counter()
+        first_page = None
+        num_jobs = 0
+        async for jobs in scraper.crawl(**SHARDS):
+            first_page = first_page or time.perf_counter() - start
+            num_jobs += len(jobs)
+        return num_jobs, server.requests, first_page, time.perf_counter() - start
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 50) / 1000
+    print(f"6 shards x {total} jobs, {latency * 1000:.0f} ms per response")
+    for concurrency in (1, 4, 16):
+        num_jobs, requests, first_page, elapsed = asyncio.run(crawl(total, latency, concurrency))
+        print(f"concurrency={concurrency:<3} {num_jobs} jobs in {requests} requests, "
+              f"first page {first_page * 1000:6.0f} ms, total {elapsed:6.2f}s, {num_jobs / elapsed:8.0f} jobs/s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmarks the indexed company matcher against the brute-force `extractOne` scan it replaces.
+
+Usage: python job_scraper/benchmarks/bench_company_matcher.py [num_jobs] [num_companies]
+"""
+import os
+import random
+import sys
+import time
+
+from thefuzz import process
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.utils.company_matcher import CompanyMatcher
+
+SYLLABLES = ["al", "bri", "cor", "dex", "el", "fin", "gra", "hel", "ix", "jun", "kor", "lum", "mar", "nov",
+             "or", "pra", "qua", "ros", "sol", "tek", "ur", "vit", "wen", "xa", "yor", "zen"]
+SUFFIXES = ["AG", "GmbH", "SA", "Sàrl", "Holding AG", "Switzerland AG", "Group", ""]
+SECTORS = ["Bank", "Technologies", "Pharma", "Consulting", "Systems", "Logistics", "Foods", "Insurance", "Labs", ""]
+
+def make_companies(n: int, rng: random.Random) -> list[dict]:
+    names = set()
+    while len(names) < n:
+        word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        names.add(" ".join(part for part in [word, rng.choice(SECTORS), rng.choice(SUFFIXES)] if part))
+    return [{"id": i, "name": name} for i, name in enumerate(sorted(names))]
+
+def perturb(name: str, rng: random.Random) -> str:
+    words = name.split()
+    roll = rng.random()
+    if roll < 0.3:
+        return words[0]  # "Korlum" for "Korlum Pharma AG"
+    if roll < 0.5 and len(words[0]) > 4:
+        i = rng.randrange(1, len(words[0]) - 1)
+        words[0] = words[0][:i] + words[0][i + 1:]  # typo
+    elif roll < 0.7:
+        words[-1] = rng.choice(["AG", "Ltd", "Inc."])
+    return " ".join(words)
+
+def make_jobs(n: int, companies: list[dict], rng: random.Random) -> list[dict]:
+    # A job board has far fewer distinct employers than postings.
+    employers = rng.sample(companies, min(len(companies), n // 3))
+    names = [perturb(company["name"], rng) for company in employers]
+    names += [f"Unknown Startup {i}" for i in range(len(names) // 10)]
+    return [{"id": i, "company_name": rng.choice(names)} for i in range(n)]
+
+def main():
+    num_jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    num_companies = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+    rng = random.Random(0)
+    companies = make_companies(num_companies, rng)
+    jobs = make_jobs(num_jobs, companies, rng)
+    print(f"{num_jobs} jobs, {num_companies} companies, {len({j['company_name'] for j in jobs})} distinct job company names")
+
+    start = time.perf_counter()
+    matcher = CompanyMatcher(companies)
+    print(f"indexed companies in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    matches = [matcher.match(job["company_name"]) for job in jobs]
+    elapsed = time.perf_counter() - start
+    print(f"indexed matcher: {elapsed:.2f}s for all jobs ({num_jobs / elapsed:.0f} jobs/s), {sum(1 for m in matches if m)} linked")
+
+    # The brute-force scan is far too slow to run on everything, so time a sample and extrapolate.
+    sample = rng.sample(range(num_jobs), 50)
+    choices = {company["id"]: company["name"] for company in companies}
+    start = time.perf_counter()
+    brute = {i: process.extractOne(jobs[i]["company_name"], choices) for i in sample}
+    per_job = (time.perf_counter() - start) / len(sample)
+    print(f"brute-force extractOne: {per_job * 1000:.0f} ms/job, ~{per_job * num_jobs / 3600:.1f} h for all jobs")
+
+    # Short names often tie with several companies at the same score, so compare scores rather than ids.
+    agree = sum(
+        1 for i in sample
+        if (brute[i][1] >= 85 and matches[i] and matches[i][2] >= brute[i][1]) or (brute[i][1] < 85 and not matches[i])
+    )
+    print(f"indexed matcher found an equally good match for {agree}/{len(sample)} sampled jobs")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Benchmarks blocked deduplication on synthetic jobs and shows how the runtime grows with input size.
+
+Usage: python job_scraper/benchmarks/bench_dedupe.py [num_jobs]
+"""
+import os
+import random
+import sys
+import time
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.dedupe.canonicalize import dedupe_and_merge
+
+CANTONS = ["ZH", "BE", "LU", "UR", "SZ", "ZG", "FR", "SO", "BS", "BL", "SG", "GR", "AG", "TG", "TI", "VD", "VS", "NE", "GE"]
+SENIORITY = ["", "Junior", "Senior", "Sr.", "Lead", "Principal"]
+ROLES = ["Software Engineer", "Data Scientist", "DevOps Engineer", "Product Manager", "Frontend Developer",
+         "Backend Developer", "QA Engineer", "Data Engineer", "Security Analyst", "UX Designer", "ML Engineer"]
+STACKS = ["", "Python", "Java", "React", "Go", "Cloud", "Payments", "Mobile"]
+
+def make_jobs(n: int, rng: random.Random) -> list[dict]:
+    # Roughly one employer per 20 postings, and about a quarter of postings are reposts.
+    num_companies = max(1, n // 20)
+    jobs = []
+    while len(jobs) < n:
+        if jobs and rng.random() < 0.25:
+            original = rng.choice(jobs)
+            repost = dict(original, title=original["title"].replace("Senior", "Sr."),
+                          url=original["url"] + "?utm_source=feed", hash=None)
+            jobs.append(repost)
+            continue
+        company = rng.randrange(num_companies)
+        title = " ".join(part for part in [rng.choice(SENIORITY), rng.choice(ROLES), rng.choice(STACKS)] if part)
+        jobs.append({
+            "title": title,
+            "company_name": f"Company {company} AG",
+            "canton": CANTONS[company % len(CANTONS)],
+            "url": f"https://jobs.example.ch/{len(jobs)}",
+            "hash": f"h{len(jobs)}",
+        })
+    return jobs
+
+def main():
+    num_jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    for size in (num_jobs // 4, num_jobs // 2, num_jobs):
+        jobs = make_jobs(size, random.Random(0))
+        existing, new = jobs[:size // 2], jobs[size // 2:size]
+        start = time.perf_counter()
+        merged = dedupe_and_merge(new, existing)
+        elapsed = time.perf_counter() - start
+        print(f"{size:>8} jobs: {elapsed:6.2f}s ({size / elapsed:,.0f} jobs/s), {len(merged)} records written")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Measures the cold-start cost of importing the analysis modules in a fresh interpreter,
+over the cost of starting Python itself, and fails if one exceeds the budget.
+
+Usage: python job_scraper/benchmarks/bench_import_time.py [runs] [budget_ms]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+MODULES = ["job_scraper.analysis.matching_service", "job_scraper.analysis.nlp_resources", "job_scraper.analysis.llm_matcher"]
+# Modules that take seconds to import and must only be loaded on first use.
+HEAVY_MODULES = ["nltk", "sklearn", "scipy", "openai"]
+
+def cold_start(statement: str, runs: int) -> float:
+    """
+    Returns the median wall time, in seconds, of running `statement` in a new interpreter.
+    """
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], cwd=ROOT, check=True)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    budget = (float(sys.argv[2]) if len(sys.argv) > 2 else 250) / 1000
+    baseline = cold_start("pass", runs)
+    print(f"interpreter start: {baseline * 1000:.0f} ms (median of {runs})")
+
+    over_budget = False
+    for module in MODULES:
+        check = f"import sys, {module}; sys.exit(any(m in sys.modules for m in {HEAVY_MODULES!r}))"
+        try:
+            elapsed = cold_start(check, runs) - baseline
+        except subprocess.CalledProcessError:
+            print(f"{module}: imports one of {', '.join(HEAVY_MODULES)} at load")
+            over_budget = True
+            continue
+        print(f"{module}: {elapsed * 1000:.0f} ms over interpreter start (budget {budget * 1000:.0f} ms)")
+        over_budget |= elapsed > budget
+    sys.exit(1 if over_budget else 0)
+
+if __name__ == '__main__':
+    main()
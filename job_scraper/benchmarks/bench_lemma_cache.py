@@ -0,0 +1,48 @@
+"""
+Measures lemmatization when every job is scored against many candidates, as in
+`calculate_match_score` loops: with the document and token caches disabled, and
+enabled, and prints the cache hit ratios. Needs the NLTK data (see nlp_resources.py).
+
+Usage: python job_scraper/benchmarks/bench_lemma_cache.py [num_jobs] [candidates_per_job]
+"""
+import os
+import random
+import sys
+import time
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.analysis.nlp_resources import LemmaCache
+
+WORDS = ("engineers building pipelines teams developers services payments platforms customers systems "
+         "analysts reports dashboards models datasets apis clusters deployments releases tests").split()
+
+def make_texts(n: int, words: int, seed: int):
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(WORDS, k=words)) + f" ref{i}." for i in range(n)]
+
+def run(cache: LemmaCache, jobs, candidates) -> float:
+    start = time.perf_counter()
+    for job in jobs:
+        for candidate in candidates:
+            cache.lemmatize(candidate)
+            cache.lemmatize(job)
+    return time.perf_counter() - start
+
+def main():
+    num_jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    candidates_per_job = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    jobs, candidates = make_texts(num_jobs, 300, seed=0), make_texts(candidates_per_job, 80, seed=1)
+    pairs = num_jobs * candidates_per_job
+
+    uncached = run(LemmaCache(max_documents=0, max_tokens=0), jobs, candidates)
+    print(f"{'no cache':<12} {uncached / pairs * 1e3:8.3f} ms/pair")
+    cache = LemmaCache()
+    cached = run(cache, jobs, candidates)
+    print(f"{'cached':<12} {cached / pairs * 1e3:8.3f} ms/pair  ({uncached / cached:.0f}x)")
+    stats = cache.stats()
+    print(f"document hit ratio {stats['document_hit_ratio']:.3f}, token hit ratio {stats['token_hit_ratio']:.3f}")
+
+if __name__ == '__main__':
+    main()
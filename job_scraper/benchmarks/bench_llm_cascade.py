@@ -0,0 +1,55 @@
+"""
+Load-tests the cascaded LLM matcher offline against the stub LLM backend: the
+LLM calls and wall time of a cold run, of a warm run served from the cache, and
+the cost scoring every pair with the LLM would have had.
+
+Usage: python job_scraper/benchmarks/bench_llm_cascade.py [num_candidates] [num_jobs] [latency_ms]
+"""
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.analysis.embedding_service import EmbeddingService, FakeEmbeddingBackend
+from job_scraper.analysis.llm_matcher import FakeMatchBackend, LLMMatcher
+
+SKILLS = ["python", "go", "rust", "java", "react", "kubernetes", "terraform", "sql", "spark", "pytorch",
+          "figma", "branding", "accounting", "sales", "support", "security", "android", "ios", "devops", "data"]
+
+def make_texts(n: int, words: int, seed: int):
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(SKILLS, k=words)) for _ in range(n)]
+
+def run(candidates, jobs, latency: float, cache_file: str, top_k: int = 5, max_concurrency: int = 16):
+    backend = FakeMatchBackend(latency=latency)
+    embeddings = EmbeddingService(backend=FakeEmbeddingBackend(dimensions=128), use_cache=False)
+    matcher = LLMMatcher(backend=backend, cache_file=cache_file, top_k=top_k, max_concurrency=max_concurrency,
+                         prefilter="embedding", embedding_service=embeddings)
+    start = time.perf_counter()
+    asyncio.run(matcher.match(candidates, jobs))
+    return backend.calls, time.perf_counter() - start
+
+def main():
+    num_candidates = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    num_jobs = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    latency = (float(sys.argv[3]) if len(sys.argv) > 3 else 50) / 1000
+    logging.disable(logging.INFO)
+    candidates, jobs = make_texts(num_candidates, 12, seed=0), make_texts(num_jobs, 20, seed=1)
+
+    all_pairs = num_candidates * num_jobs
+    print(f"{num_candidates} candidates x {num_jobs} jobs, {latency * 1000:.0f} ms per LLM call")
+    print(f"{'every pair, sequential':<24} {all_pairs:>8} calls  ~{all_pairs * latency:9.1f} s (estimated)")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache_file = os.path.join(tmpdir, "llm_matches.sqlite3")
+        for label in ("cascade, cold cache", "cascade, warm cache"):
+            calls, elapsed = run(candidates, jobs, latency, cache_file)
+            print(f"{label:<24} {calls:>8} calls  {elapsed:10.2f} s")
+
+if __name__ == '__main__':
+    main()
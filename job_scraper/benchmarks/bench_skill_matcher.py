@@ -0,0 +1,79 @@
+"""
+Compares the single-pass skill matcher with the previous per-skill regex loop.
+
+Usage: python job_scraper/benchmarks/bench_skill_matcher.py [num_descriptions] [taxonomy_size]
+"""
+import os
+import random
+import re
+import sys
+import time
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.utils.normalize import COMMON_TECH_SKILLS, extract_skills_from_text
+from job_scraper.utils.phrase_matcher import PhraseMatcher
+
+FILLER = (
+    "we are looking for a motivated engineer to join our team in zurich you will work on "
+    "scalable services with modern tooling and collaborate with product and design go-getter "
+    "attitude experience with cloud platforms and agile delivery is a plus"
+).split()
+
+def legacy_extract_skills_from_text(text: str) -> set[str]:
+    """
+    The previous implementation: one regex scan of the text per skill.
+    """
+    if not text:
+        return set()
+    text_lower = text.lower()
+    found_skills = set()
+    for skill in COMMON_TECH_SKILLS:
+        pattern = r'(^|\W)' + re.escape(skill) + r'(?!-)(\W|$)'
+        if re.search(pattern, text_lower):
+            found_skills.add(skill)
+    return found_skills
+
+def make_descriptions(n: int, seed: int = 42) -> list[str]:
+    rng = random.Random(seed)
+    skills = sorted(COMMON_TECH_SKILLS)
+    descriptions = []
+    for _ in range(n):
+        words = [rng.choice(FILLER) for _ in range(rng.randint(150, 400))]
+        for _ in range(rng.randint(3, 12)):
+            words.insert(rng.randrange(len(words)), rng.choice(skills) + rng.choice(["", ",", ".", " /"]))
+        descriptions.append(" ".join(words))
+    return descriptions
+
+def timed(label: str, fn, descriptions: list[str]) -> list[set[str]]:
+    start = time.perf_counter()
+    results = [fn(d) for d in descriptions]
+    elapsed = time.perf_counter() - start
+    print(f"{label:<38} {elapsed:8.3f}s  {len(descriptions) / elapsed:10.0f} descriptions/s")
+    return results
+
+def main():
+    num_descriptions = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    taxonomy_size = int(sys.argv[2]) if len(sys.argv) > 2 else 5_000
+    descriptions = make_descriptions(num_descriptions)
+    print(f"{num_descriptions} descriptions, {len(COMMON_TECH_SKILLS)} built-in skills")
+
+    legacy = timed("legacy per-skill regex", legacy_extract_skills_from_text, descriptions)
+    compiled = timed("compiled single-pass matcher", extract_skills_from_text, descriptions)
+    assert legacy == compiled, "Matcher results differ from the legacy implementation"
+    print("Results identical.")
+
+    # A large synthetic taxonomy with aliases, as loaded from SKILL_TAXONOMY_PATH.
+    phrases = {skill: skill for skill in COMMON_TECH_SKILLS}
+    for i in range(taxonomy_size):
+        label = f"skill{i}"
+        phrases[label] = label
+        phrases[f"alias{i}"] = label
+    start = time.perf_counter()
+    large_matcher = PhraseMatcher(phrases, forbid_hyphen_suffix=True)
+    print(f"built {len(phrases)}-phrase matcher in {time.perf_counter() - start:.3f}s")
+    timed(f"compiled matcher, {len(phrases)} phrases", lambda d: extract_skills_from_text(d, large_matcher), descriptions)
+
+if __name__ == '__main__':
+    main()
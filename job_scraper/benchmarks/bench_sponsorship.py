@@ -0,0 +1,75 @@
+"""
+Measures sponsorship scan throughput in descriptions/second: the original one-pattern-at-a-time
+loop, the fused alternation in-process, and the fused alternation on a process pool.
+The original loop only knows English, so it finds fewer sponsors.
+
+Usage: python job_scraper/benchmarks/bench_sponsorship.py [num_jobs] [num_companies] [workers]
+"""
+import os
+import random
+import re
+import sys
+import time
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.analysis.sponsorship_analyzer import SponsorshipAnalyzer
+
+# The four English patterns the analyzer used to run one by one.
+ORIGINAL_KEYWORDS = [
+    re.compile(r'visa\s(sponsorship|support)', re.IGNORECASE),
+    re.compile(r'sponsorship\s(available|provided)', re.IGNORECASE),
+    re.compile(r'work\spermit', re.IGNORECASE),
+    re.compile(r'relocation\s(assistance|package|support)', re.IGNORECASE),
+]
+
+FILLER = ("We are a fast-growing team building data platforms with Python, Kubernetes and PostgreSQL. "
+          "You will design services, review code and mentor engineers in an agile environment. ") * 8
+MENTIONS = ["We offer visa sponsorship.", "Arbeitsbewilligung vorhanden.", "Aide au déménagement incluse.", ""]
+
+class BenchDB:
+    def __init__(self, jobs):
+        self.jobs = jobs
+
+    def iter_jobs_with_company(self):
+        return iter(self.jobs)
+
+def make_jobs(n: int, num_companies: int, rng: random.Random) -> list[dict]:
+    # Only a few percent of postings mention sponsorship.
+    return [
+        {"company_id": rng.randrange(num_companies),
+         "description": FILLER + (rng.choice(MENTIONS) if rng.random() < 0.03 else "")}
+        for _ in range(n)
+    ]
+
+def original_scan(jobs: list[dict]) -> set:
+    sponsors = set()
+    for job in jobs:
+        for pattern in ORIGINAL_KEYWORDS:
+            if pattern.search(job["description"]):
+                sponsors.add(job["company_id"])
+                break
+    return sponsors
+
+def main():
+    num_jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    num_companies = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count()
+    jobs = make_jobs(num_jobs, num_companies, random.Random(0))
+    print(f"{num_jobs} descriptions of ~{len(FILLER)} characters, {num_companies} companies")
+
+    start = time.perf_counter()
+    sponsors = original_scan(jobs)
+    elapsed = time.perf_counter() - start
+    print(f"original 4-pattern loop:      {num_jobs / elapsed:10.0f} descriptions/s, {len(sponsors)} sponsors")
+
+    for label, max_workers in (("fused pattern, in-process", 1), (f"fused pattern, {workers} processes", workers)):
+        analyzer = SponsorshipAnalyzer(db_client=BenchDB(jobs), max_workers=max_workers)
+        start = time.perf_counter()
+        sponsors = analyzer.find_companies_that_sponsor()
+        elapsed = time.perf_counter() - start
+        print(f"{label + ':':<30}{num_jobs / elapsed:10.0f} descriptions/s, {len(sponsors)} sponsors")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Compares scoring one candidate against many jobs by fitting TF-IDF on each pair,
+as `calculate_match_score` does without a corpus model, with one sparse product
+against the precomputed vectors of the corpus model. Lemmatization is left out
+of both, so only the TF-IDF work is measured.
+
+Usage: python job_scraper/benchmarks/bench_tfidf_model.py [num_jobs] [pairwise_sample]
+"""
+import logging
+import os
+import random
+import sys
+import time
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.analysis.nlp_resources import make_vectorizer
+from job_scraper.analysis.tfidf_model import CorpusTfidfModel
+
+WORDS = ("python go rust java react kubernetes terraform sql spark pytorch figma branding accounting sales "
+         "support security android ios devops data engineer developer senior team remote zurich geneva basel "
+         "platform payments banking insurance pharma retail startup cloud backend frontend mobile analytics").split()
+
+def make_texts(n: int, words: int, seed: int):
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(WORDS, k=words)) for _ in range(n)]
+
+def pairwise_score(candidate_text: str, job_text: str) -> float:
+    vectors = make_vectorizer().fit_transform([candidate_text, job_text])
+    return (vectors[0] @ vectors[1].T).sum()
+
+def main():
+    num_jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    sample = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    logging.disable(logging.INFO)
+    jobs = make_texts(num_jobs, 120, seed=0)
+    candidate = make_texts(1, 40, seed=1)[0]
+
+    start = time.perf_counter()
+    for job in jobs[:sample]:
+        pairwise_score(candidate, job)
+    pairwise = (time.perf_counter() - start) / sample
+    print(f"{'pairwise fit':<26} {pairwise * 1e6:10.1f} us/pair  ~{pairwise * num_jobs:7.2f} s for {num_jobs} jobs")
+
+    start = time.perf_counter()
+    model = CorpusTfidfModel(lemmatize=False).fit(list(range(num_jobs)), jobs)
+    print(f"{'corpus model fit':<26} {time.perf_counter() - start:10.2f} s (once)")
+
+    start = time.perf_counter()
+    model.similarities(candidate)
+    elapsed = time.perf_counter() - start
+    print(f"{'corpus model, all jobs':<26} {elapsed / num_jobs * 1e6:10.3f} us/pair  {elapsed:8.3f} s for {num_jobs} jobs")
+
+    start = time.perf_counter()
+    model.add([num_jobs + i for i in range(100)], make_texts(100, 120, seed=2))
+    print(f"{'incremental add of 100':<26} {time.perf_counter() - start:10.3f} s")
+
+if __name__ == '__main__':
+    main()
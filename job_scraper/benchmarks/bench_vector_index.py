@@ -0,0 +1,69 @@
+"""
+Measures query latency and recall@k of the job vector index.
+
+Usage: python job_scraper/benchmarks/bench_vector_index.py [num_jobs] [dim]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.analysis.vector_index import VectorIndex
+
+def make_embeddings(n: int, dim: int, clusters: int = 500, seed: int = 0) -> np.ndarray:
+    # Real job embeddings are clustered by role and industry, unlike uniform noise.
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=n)
+    return centers[labels] + 0.6 * rng.normal(size=(n, dim)).astype(np.float32)
+
+def latency(index: VectorIndex, queries: np.ndarray, k: int, nprobe: int):
+    results, timings = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(index.search(query, k=k, nprobe=nprobe))
+        timings.append(time.perf_counter() - start)
+    timings_ms = np.array(timings) * 1000
+    return results, np.percentile(timings_ms, 50), np.percentile(timings_ms, 95)
+
+def recall(exact, approximate) -> float:
+    hits = sum(len({i for i, _ in e} & {i for i, _ in a}) for e, a in zip(exact, approximate))
+    return hits / sum(len(e) for e in exact)
+
+def main():
+    num_jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    dim = int(sys.argv[2]) if len(sys.argv) > 2 else 1536
+    k = 10
+    vectors = make_embeddings(num_jobs, dim)
+    queries = make_embeddings(200, dim, seed=1)
+
+    start = time.perf_counter()
+    index = VectorIndex(dim)
+    index.add(list(range(num_jobs)), vectors)
+    print(f"{num_jobs} jobs x {dim} dims, built in {time.perf_counter() - start:.2f}s")
+
+    exact, p50, p95 = latency(index, queries, k, nprobe=0)
+    print(f"{'flat (exact)':<22} p50 {p50:7.2f} ms  p95 {p95:7.2f} ms  recall@{k} 1.000")
+
+    start = time.perf_counter()
+    index.train_partitions(nlist=int(np.sqrt(num_jobs)))
+    print(f"trained partitions in {time.perf_counter() - start:.2f}s")
+    for nprobe in (4, 8, 16, 32):
+        approximate, p50, p95 = latency(index, queries, k, nprobe=nprobe)
+        print(f"{f'ivf nprobe={nprobe}':<22} p50 {p50:7.2f} ms  p95 {p95:7.2f} ms  recall@{k} {recall(exact, approximate):.3f}")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        index.save(tmpdir)
+        start = time.perf_counter()
+        loaded = VectorIndex.load(tmpdir)
+        print(f"memory-mapped load in {(time.perf_counter() - start) * 1000:.1f} ms")
+        _, p50, _ = latency(loaded, queries, k, nprobe=8)
+        print(f"{'ivf nprobe=8 (mmap)':<22} p50 {p50:7.2f} ms")
+
+if __name__ == '__main__':
+    main()
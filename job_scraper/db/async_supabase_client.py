@@ -0,0 +1,484 @@
+import asyncio
+import json
+import os
+import random
+import sys
+import weakref
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+from dotenv import load_dotenv
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.db.supabase_client import (
+    COMPANIES_FOR_TAGGING_FILTERS,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_PAGE_SIZE,
+    JOBS_WITH_COMPANY_FILTERS,
+    JOBS_WITH_EMBEDDING_FILTERS,
+    JOBS_WITHOUT_COMPANY_FILTERS,
+    Skills,
+    _enrichment_company_row,
+    _projection,
+    _skill_rows,
+    _zefix_company_row,
+)
+from job_scraper.utils.batching import chunked
+from job_scraper.utils.http import create_http_client
+
+# Construct a path to the .env file in the project root
+dotenv_path = os.path.join(os.path.dirname(__file__), '../../.env')
+load_dotenv(dotenv_path=dotenv_path)
+
+# Responses worth retrying: rate limiting, and gateway errors while PostgREST restarts.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# One client per event loop: an httpx connection pool cannot be shared across loops.
+_shared_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncSupabaseClient]" = weakref.WeakKeyDictionary()
+
+class AsyncSupabaseClient:
+    """
+    An asyncio client for the Supabase database with the same methods as
+    `SupabaseClient`, for use inside async scrapers.
+
+    It talks to PostgREST directly over one pooled HTTP/2 session; use `shared()`
+    to get the process-wide instance instead of opening a pool per caller. At most
+    `max_concurrency` requests are in flight at once, so it is safe to call from
+    many tasks. Idempotent requests (upserts, updates, reads and the bulk update
+    functions) are retried with jittered exponential backoff; inserts are not.
+    """
+    def __init__(self, url: Optional[str] = None, key: Optional[str] = None,
+                 client: Optional[httpx.AsyncClient] = None, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 max_retries: int = 4, backoff: float = 0.5):
+        url = url or os.environ.get("SUPABASE_URL")
+        key = key or os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
+        if not url or not key:
+            raise ValueError("Supabase URL and service role key must be configured.")
+        self.rest_url = f"{url.rstrip('/')}/rest/v1"
+        self.headers = {"apikey": key, "Authorization": f"Bearer {key}", "Content-Type": "application/json"}
+        self.client = client or create_http_client(max_connections=max_concurrency)
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+    @classmethod
+    def shared(cls) -> "AsyncSupabaseClient":
+        """
+        Returns the client shared by every caller on the running event loop, creating it on first use.
+        """
+        loop = asyncio.get_running_loop()
+        if loop not in _shared_clients:
+            _shared_clients[loop] = cls()
+        return _shared_clients[loop]
+
+    @classmethod
+    async def close_shared(cls):
+        """
+        Closes the running event loop's shared client, if one was created. Call it on
+        shutdown, before the loop closes; a later `shared()` opens a new client.
+        """
+        client = _shared_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def _request(self, method: str, path: str, params: Optional[Dict[str, str]] = None,
+                       body: Any = None, prefer: Optional[str] = None, retry: bool = True) -> Any:
+        """
+        Sends a PostgREST request and returns its decoded JSON body (None if empty).
+        Raises httpx.HTTPError once retries are exhausted.
+        """
+        headers = dict(self.headers)
+        if prefer:
+            headers["Prefer"] = prefer
+        content = json.dumps(body) if body is not None else None
+        attempts = self.max_retries + 1 if retry else 1
+        for attempt in range(attempts):
+            try:
+                async with self.semaphore:
+                    response = await self.client.request(method, f"{self.rest_url}/{path}", params=params,
+                                                         content=content, headers=headers)
+                if response.status_code not in RETRY_STATUSES or attempt == attempts - 1:
+                    response.raise_for_status()
+                    return response.json() if response.content else None
+            except httpx.TransportError:
+                if attempt == attempts - 1:
+                    raise
+            # Full jitter keeps concurrent retries from hitting the server in lockstep.
+            await asyncio.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+
+    async def _upsert(self, table: str, rows: Any, on_conflict: str, ignore_duplicates: bool = False) -> List[Dict[str, Any]]:
+        resolution = "ignore-duplicates" if ignore_duplicates else "merge-duplicates"
+        return await self._request("POST", table, params={"on_conflict": on_conflict}, body=rows,
+                                   prefer=f"resolution={resolution},return=representation") or []
+
+    async def _select(self, table: str, columns: str, filters: Dict[str, str]) -> List[Dict[str, Any]]:
+        return await self._request("GET", table, params={"select": columns.replace(" ", ""), **filters}) or []
+
+    async def _update(self, table: str, values: Dict[str, Any], filters: Dict[str, str]):
+        await self._request("PATCH", table, params=filters, body=values, prefer="return=minimal")
+
+    async def _gather_chunks(self, coroutines) -> List[Any]:
+        # The semaphore already bounds requests in flight, so every chunk can be scheduled at once.
+        return await asyncio.gather(*coroutines)
+
+    async def upsert_jobs(self, jobs: List[Dict], chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """
+        Upserts jobs on their hash, in chunks of `chunk_size`. Returns the number of jobs upserted.
+        """
+        if not jobs:
+            return 0
+
+        async def upsert_chunk(chunk):
+            try:
+                return len(await self._upsert('jobs', chunk, 'hash'))
+            except Exception as e:
+                print(f"An error occurred while upserting {len(chunk)} jobs: {e}")
+                return 0
+
+        # Postgres rejects an upsert that touches the same row twice, so de-duplicate first (last one wins).
+        unique = list({job.get('hash'): job for job in jobs}.values())
+        upserted = sum(await self._gather_chunks(upsert_chunk(chunk) for chunk in chunked(unique, chunk_size)))
+        print(f"Successfully upserted {upserted} jobs.")
+        return upserted
+
+    async def upsert_candidate(self, candidate: Dict[str, Any]) -> int | None:
+        """
+        Upserts a single candidate profile to the `scraped_candidates` table.
+        Returns the ID of the upserted record.
+        """
+        if not candidate:
+            return None
+        try:
+            rows = await self._upsert('scraped_candidates', candidate, 'source,source_id')
+            return rows[0]['id'] if rows else None
+        except Exception as e:
+            print(f"An error occurred while upserting candidate {candidate.get('username')}: {e}")
+            return None
+
+    async def upsert_candidate_skills(self, candidate_id: int, skills: Skills, source: str = 'bio_keyword'):
+        """
+        Upserts a set of skills for a given candidate to the `scraped_candidate_skills` table.
+        `source` records where the skills were found, unless they map each skill to its own source.
+        """
+        if not skills or not candidate_id:
+            return
+        skill_records = _skill_rows(candidate_id, skills, source)
+        try:
+            await self._upsert('scraped_candidate_skills', skill_records, 'candidate_id,skill', ignore_duplicates=True)
+        except Exception as e:
+            print(f"An error occurred while upserting skills for candidate ID {candidate_id}: {e}")
+
+    async def upsert_company(self, company: Dict[str, Any]) -> str | None:
+        """
+        Upserts a company profile on its zefix_uid if it has one, otherwise on its name.
+        Returns the UUID of the upserted record.
+        """
+        if not company or not company.get('name'):
+            return None
+        ids = await self.upsert_companies([company])
+        return ids.get(company.get('zefix_uid') or company['name'])
+
+    async def upsert_companies(self, companies: List[Dict[str, Any]], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, str]:
+        """
+        Bulk version of `upsert_company`, as `SupabaseClient.upsert_companies`.
+        Returns a mapping of each company's key (its zefix_uid if present, otherwise
+        its name) to the UUID of the upserted record. Companies in failed chunks are missing.
+        """
+        unique: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for company in companies:
+            if not company or not company.get('name'):
+                continue
+            if company.get('zefix_uid'):
+                unique[('zefix_uid', company['zefix_uid'])] = _zefix_company_row(company)
+            else:
+                unique[('name', company['name'])] = _enrichment_company_row(company)
+
+        async def upsert_chunk(rows, conflict_column):
+            try:
+                return {record[conflict_column]: record['id'] for record in await self._upsert('companies', rows, conflict_column)}
+            except Exception as e:
+                print(f"An error occurred while bulk upserting {len(rows)} companies on {conflict_column}: {e}")
+                return {}
+
+        requests = []
+        for chunk in chunked(unique.items(), chunk_size):
+            for conflict_column in ('zefix_uid', 'name'):
+                rows = [row for (column, _), row in chunk if column == conflict_column]
+                if rows:
+                    requests.append(upsert_chunk(rows, conflict_column))
+
+        company_ids: Dict[str, str] = {}
+        for result in await self._gather_chunks(requests):
+            company_ids.update(result)
+        print(f"Bulk upserted {len(company_ids)} of {len(unique)} companies in {len(requests)} requests.")
+        return company_ids
+
+    async def upsert_candidates_with_skills(self, candidates: List[Tuple[Dict[str, Any], Skills]],
+                                            chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[Tuple[str, str], int]:
+        """
+        Bulk version of `upsert_candidate` followed by `upsert_candidate_skills`.
+        Returns a mapping of (source, source_id) to the candidate ID.
+        """
+        unique: Dict[Tuple[str, str], Tuple[Dict[str, Any], Skills]] = {}
+        for candidate, skills in candidates:
+            if candidate:
+                unique[(candidate.get('source'), candidate.get('source_id'))] = (candidate, skills)
+
+        async def upsert_candidate_chunk(chunk):
+            rows = [candidate for candidate, _ in chunk]
+            try:
+                return {(record['source'], record['source_id']): record['id']
+                        for record in await self._upsert('scraped_candidates', rows, 'source,source_id')}
+            except Exception as e:
+                print(f"An error occurred while bulk upserting {len(rows)} candidates: {e}")
+                return {}
+
+        async def upsert_skill_chunk(rows):
+            try:
+                return len(await self._upsert('scraped_candidate_skills', rows, 'candidate_id,skill', ignore_duplicates=True))
+            except Exception as e:
+                print(f"An error occurred while bulk upserting {len(rows)} candidate skills: {e}")
+                return 0
+
+        candidate_ids: Dict[Tuple[str, str], int] = {}
+        for result in await self._gather_chunks(upsert_candidate_chunk(chunk) for chunk in chunked(unique.values(), chunk_size)):
+            candidate_ids.update(result)
+
+        skill_records = [
+            record for key, (_, skills) in unique.items() if key in candidate_ids
+            for record in _skill_rows(candidate_ids[key], skills)
+        ]
+        num_skills = sum(await self._gather_chunks(upsert_skill_chunk(chunk) for chunk in chunked(skill_records, chunk_size)))
+        print(f"Bulk upserted {len(candidate_ids)} candidates and {num_skills} skills.")
+        return candidate_ids
+
+    async def log_raw_company_scrape(self, company_id: str, source: str, source_id: str, raw_data: Dict[str, Any]):
+        """
+        Logs the raw scraped data for a company to the `companies_scraped_raw_data` table.
+        """
+        await self.log_raw_company_scrapes([
+            {'company_id': company_id, 'source': source, 'source_id': source_id, 'raw_data': raw_data}
+        ])
+
+    async def log_raw_company_scrapes(self, log_entries: List[Dict[str, Any]], chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Bulk version of `log_raw_company_scrape`. Inserts are not idempotent, so they are not retried.
+        """
+        entries = [entry for entry in log_entries if all(entry.get(key) for key in ('company_id', 'source', 'source_id', 'raw_data'))]
+        for chunk in chunked(entries, chunk_size):
+            try:
+                await self._request("POST", 'companies_scraped_raw_data', body=chunk, prefer="return=minimal", retry=False)
+            except Exception as e:
+                print(f"An error occurred while logging {len(chunk)} raw company scrapes: {e}")
+
+    async def iter_rows(self, table: str, columns: str = '*', filters: Optional[Dict[str, str]] = None,
+                        page_size: int = DEFAULT_PAGE_SIZE, key: str = 'id') -> AsyncIterator[Dict[str, Any]]:
+        """
+        Async version of `SupabaseClient.iter_rows`: yields every matching row, one
+        keyset-paginated page of `page_size` rows at a time. Errors are raised.
+        """
+        params = {'select': _projection(columns, key).replace(' ', ''), 'order': f'{key}.asc', 'limit': str(page_size), **(filters or {})}
+        while True:
+            rows = await self._request("GET", table, params=params) or []
+            for row in rows:
+                yield row
+            if len(rows) < page_size:
+                return
+            params[key] = f'gt.{rows[-1][key]}'
+
+    def iter_jobs_without_company_link(self, columns: str = 'id, company_name', page_size: int = DEFAULT_PAGE_SIZE) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streams the jobs that do not have a company_id assigned yet.
+        """
+        return self.iter_rows('jobs', columns, JOBS_WITHOUT_COMPANY_FILTERS, page_size)
+
+    def iter_all_companies(self, columns: str = 'id, name', page_size: int = DEFAULT_PAGE_SIZE) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streams every company in the canonical companies table.
+        """
+        return self.iter_rows('companies', columns, None, page_size)
+
+    def iter_jobs_with_company(self, columns: str = 'company_id, description', page_size: int = DEFAULT_PAGE_SIZE) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streams the jobs that have a linked company_id.
+        """
+        return self.iter_rows('jobs', columns, JOBS_WITH_COMPANY_FILTERS, page_size)
+
+    def iter_companies_for_tagging(self, columns: str = 'id, description', page_size: int = DEFAULT_PAGE_SIZE) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streams the companies that have a description but have not yet been tagged.
+        """
+        return self.iter_rows('companies', columns, COMPANIES_FOR_TAGGING_FILTERS, page_size)
+
+    def iter_job_embeddings(self, page_size: int = DEFAULT_PAGE_SIZE) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streams the id and embedding of every job that has an embedding.
+        """
+        return self.iter_rows('jobs', 'id, embedding', JOBS_WITH_EMBEDDING_FILTERS, page_size)
+
+    async def iter_function_rows(self, function: str, params: Dict[str, Any], page_size: int = DEFAULT_PAGE_SIZE,
+                                 key: str = 'id') -> AsyncIterator[Dict[str, Any]]:
+        """
+        Async version of `SupabaseClient.iter_function_rows`. The functions are read-only, so requests are retried.
+        """
+        last_key = None
+        while True:
+            rows = await self._request("POST", f"rpc/{function}", body={**params, 'after': last_key, 'page_size': page_size}) or []
+            for row in rows:
+                yield row
+            if len(rows) < page_size:
+                return
+            last_key = rows[-1][key]
+
+    def iter_companies_needing_tags(self, dictionary_version: str, page_size: int = DEFAULT_PAGE_SIZE) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streams the companies whose tags are missing or stale for `dictionary_version`.
+        """
+        return self.iter_function_rows('companies_needing_tags', {'dictionary_version': dictionary_version}, page_size)
+
+    def iter_jobs_needing_sponsorship_scan(self, keywords_version: str, page_size: int = DEFAULT_PAGE_SIZE) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streams the jobs whose sponsorship flag is missing or stale for `keywords_version`,
+        or still counts towards a company they are no longer linked to.
+        """
+        return self.iter_function_rows('jobs_needing_sponsorship_scan', {'keywords_version': keywords_version}, page_size)
+
+    async def get_jobs_without_company_link(self) -> List[Dict[str, Any]]:
+        """
+        Fetches all jobs that do not have a company_id assigned yet.
+        """
+        try:
+            return [job async for job in self.iter_jobs_without_company_link()]
+        except Exception as e:
+            print(f"An error occurred while fetching jobs without company link: {e}")
+            return []
+
+    async def get_all_companies(self) -> List[Dict[str, Any]]:
+        """
+        Fetches all companies from the canonical companies table.
+        """
+        try:
+            return [company async for company in self.iter_all_companies()]
+        except Exception as e:
+            print(f"An error occurred while fetching all companies: {e}")
+            return []
+
+    async def get_all_jobs_with_company(self) -> List[Dict[str, Any]]:
+        """
+        Fetches all jobs that have a valid, linked company_id.
+        """
+        try:
+            return [job async for job in self.iter_jobs_with_company()]
+        except Exception as e:
+            print(f"An error occurred while fetching jobs with company links: {e}")
+            return []
+
+    async def get_job_embeddings(self) -> List[Dict[str, Any]]:
+        """
+        Fetches the id and embedding of every job that has an embedding.
+        Prefer `iter_job_embeddings` for large tables.
+        """
+        try:
+            return [row async for row in self.iter_job_embeddings()]
+        except Exception as e:
+            print(f"An error occurred while fetching job embeddings: {e}")
+            return []
+
+    async def get_companies_for_tagging(self) -> List[Dict[str, Any]]:
+        """
+        Fetches companies that have a description but have not yet been tagged.
+        """
+        try:
+            return [company async for company in self.iter_companies_for_tagging()]
+        except Exception as e:
+            print(f"An error occurred while fetching companies for tagging: {e}")
+            return []
+
+    async def update_job_company_link(self, job_id: str, company_id: str):
+        """
+        Updates a job record to link it to a company.
+        """
+        try:
+            await self._update('jobs', {'company_id': company_id}, {'id': f'eq.{job_id}'})
+        except Exception as e:
+            print(f"An error occurred while updating job {job_id}: {e}")
+
+    async def update_job_company_links(self, links: Dict[str, str], chunk_size: int = 1000) -> int:
+        """
+        Bulk version of `update_job_company_link`, applied through the `bulk_link_jobs_to_companies` function.
+        Returns the number of jobs updated.
+        """
+        records = [{'job_id': job_id, 'company_id': company_id} for job_id, company_id in links.items()]
+        return await self._call_bulk_function('bulk_link_jobs_to_companies', 'links', records, chunk_size)
+
+    async def update_company_sponsorship(self, company_id: str, status: bool):
+        """
+        Updates the sponsorship status for a company.
+        """
+        await self.update_companies_sponsorship([company_id], status)
+
+    async def update_companies_sponsorship(self, company_ids: List[str], status: bool, chunk_size: int = 200):
+        """
+        Bulk version of `update_company_sponsorship`; each chunk is a single `UPDATE ... WHERE id IN (...)` request.
+        """
+        async def update_chunk(chunk):
+            try:
+                await self._update('companies', {'offers_visa_sponsorship': status}, {'id': f"in.({','.join(map(str, chunk))})"})
+            except Exception as e:
+                print(f"An error occurred while updating sponsorship for {len(chunk)} companies: {e}")
+
+        await self._gather_chunks(update_chunk(chunk) for chunk in chunked(list(company_ids), chunk_size))
+
+    async def update_company_tags(self, company_id: str, tags: List[str]):
+        """
+        Updates the tags for a specific company.
+        """
+        if not tags:
+            return
+        try:
+            await self._update('companies', {'tags': tags}, {'id': f'eq.{company_id}'})
+        except Exception as e:
+            print(f"An error occurred while updating tags for company {company_id}: {e}")
+
+    async def update_companies_tags(self, tags_by_company: Dict[str, List[str]], chunk_size: int = 1000,
+                                    input_hashes: Optional[Dict[str, str]] = None) -> int:
+        """
+        Bulk version of `update_company_tags`, applied through the `bulk_update_company_tags` function.
+        Companies without tags are skipped unless they have an input hash, in which case
+        their tags are cleared. Returns the number of companies updated.
+        """
+        input_hashes = input_hashes or {}
+        records = [
+            {'company_id': company_id, 'tags': list(tags or []), 'input_hash': input_hashes.get(company_id)}
+            for company_id, tags in tags_by_company.items() if tags or company_id in input_hashes
+        ]
+        return await self._call_bulk_function('bulk_update_company_tags', 'updates', records, chunk_size)
+
+    async def update_jobs_sponsorship(self, results: Dict[str, Tuple[bool, Optional[str]]], chunk_size: int = 1000) -> int:
+        """
+        Async version of `SupabaseClient.update_jobs_sponsorship`; chunks are sent one at a time.
+        """
+        records = [
+            {'job_id': job_id, 'mentions_sponsorship': mentions, 'input_hash': hash_}
+            for job_id, (mentions, hash_) in results.items()
+        ]
+        updated = 0
+        for chunk in chunked(records, chunk_size):
+            updated += await self._call_bulk_function('bulk_update_job_sponsorship', 'updates', chunk, chunk_size)
+        return updated
+
+    async def _call_bulk_function(self, function: str, argument: str, records: List[Dict[str, Any]], chunk_size: int) -> int:
+        async def call_chunk(chunk):
+            try:
+                return await self._request("POST", f"rpc/{function}", body={argument: chunk}) or 0
+            except Exception as e:
+                print(f"An error occurred while calling {function} with {len(chunk)} records: {e}")
+                return 0
+
+        return sum(await self._gather_chunks(call_chunk(chunk) for chunk in chunked(records, chunk_size)))
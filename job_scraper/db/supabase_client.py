@@ -1,13 +1,86 @@
+import hashlib
 import os
-from typing import List, Dict, Set, Any
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, List, Dict, Mapping, Optional, Set, Any, Tuple, Union
 from dotenv import load_dotenv
 from supabase import create_client, Client
-import os
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.utils.batching import chunked
 
 # Construct a path to the .env file in the project root
 dotenv_path = os.path.join(os.path.dirname(__file__), '../../.env')
 load_dotenv(dotenv_path=dotenv_path)
 
+# Bulk methods split their input into requests of at most this many rows.
+DEFAULT_CHUNK_SIZE = 500
+# ...and keep at most this many requests in flight.
+DEFAULT_MAX_CONCURRENCY = 4
+# Streaming reads fetch pages of this many rows, which keeps them under PostgREST's default max-rows of 1000.
+DEFAULT_PAGE_SIZE = 1000
+
+# The filters of the streaming reads, in PostgREST syntax, shared with the async client.
+JOBS_WITHOUT_COMPANY_FILTERS = {'company_id': 'is.null'}
+JOBS_WITH_COMPANY_FILTERS = {'company_id': 'not.is.null'}
+COMPANIES_FOR_TAGGING_FILTERS = {'description': 'not.is.null', 'tags': 'is.null'}
+JOBS_WITH_EMBEDDING_FILTERS = {'embedding': 'not.is.null'}
+
+# A candidate's skills: a set of skills found in their bio, or a mapping of each
+# skill to where it was found ('bio_keyword' or 'repo_language').
+Skills = Union[Set[str], Mapping[str, str]]
+
+def input_hash(version: str, *parts: Any) -> str:
+    """
+    Returns the hash the analyzers store for the input a row was analyzed with.
+    Matches md5(version || ':' || part || ...) in the database functions of migration 010.
+    """
+    return hashlib.md5(':'.join([version, *(str(part) for part in parts)]).encode('utf-8')).hexdigest()
+
+def _projection(columns: str, key: str) -> str:
+    """
+    Returns the select list for a keyset-paginated read, which must include the key column.
+    """
+    selected = [column.strip() for column in columns.split(',') if column.strip()]
+    if key not in selected and '*' not in selected:
+        selected.append(key)
+    return ','.join(selected)
+
+def _skill_rows(candidate_id: int, skills: Skills, source: str = 'bio_keyword') -> List[Dict[str, Any]]:
+    """
+    Returns the `scraped_candidate_skills` rows of a candidate. Skills given as a set are recorded with `source`.
+    """
+    sources = skills if isinstance(skills, Mapping) else dict.fromkeys(skills or (), source)
+    # Note: the column name in the table is 'source_of_skill'
+    return [{"candidate_id": candidate_id, "skill": skill, "source_of_skill": skill_source} for skill, skill_source in sources.items()]
+
+def _zefix_company_row(company: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'zefix_uid': company.get('zefix_uid'),
+        'name': company.get('name'),
+        'legal_entity_type': company.get('legal_entity_type'),
+        'address': company.get('address'),
+        'location': company.get('location')
+    }
+
+def _enrichment_company_row(company: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'name': company.get('name'),
+        'description': company.get('description'),
+        'tech_stack': company.get('tech_stack')
+    }
+
+def _run_concurrently(tasks: List[Callable[[], Any]], max_concurrency: int) -> List[Any]:
+    """
+    Runs blocking request functions on a small thread pool and returns their results in order.
+    """
+    if len(tasks) <= 1 or max_concurrency <= 1:
+        return [task() for task in tasks]
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        return list(executor.map(lambda task: task(), tasks))
+
 class SupabaseClient:
     """
     A client for interacting with the Supabase database.
@@ -58,17 +131,15 @@ class SupabaseClient:
             print(f"An error occurred while upserting candidate {candidate.get('username')}: {e}")
             return None
 
-    def upsert_candidate_skills(self, candidate_id: int, skills: Set[str]):
+    def upsert_candidate_skills(self, candidate_id: int, skills: Skills, source: str = 'bio_keyword'):
         """
         Upserts a set of skills for a given candidate to the `scraped_candidate_skills` table.
+        `source` records where the skills were found, unless they map each skill to its own source.
         """
         if not skills or not candidate_id:
             return
 
-        skill_records = [
-            # Note: the column name in the table is 'source_of_skill'
-            {"candidate_id": candidate_id, "skill": skill, "source_of_skill": "bio_keyword"} for skill in skills
-        ]
+        skill_records = _skill_rows(candidate_id, skills, source)
 
         try:
             data, count = self.client.table('scraped_candidate_skills').upsert(
@@ -93,13 +164,7 @@ class SupabaseClient:
 
         # Case 1: We have a Zefix UID (from Zefix scraper)
         if 'zefix_uid' in company and company['zefix_uid']:
-            company_data = {
-                'zefix_uid': company.get('zefix_uid'),
-                'name': company.get('name'),
-                'legal_entity_type': company.get('legal_entity_type'),
-                'address': company.get('address'),
-                'location': company.get('location')
-            }
+            company_data = _zefix_company_row(company)
             try:
                 data, count = self.client.table('companies').upsert(company_data, on_conflict='zefix_uid').execute()
                 if data and data[1]:
@@ -116,11 +181,7 @@ class SupabaseClient:
             # This part is complex and better handled in a dedicated service/linker.
             # For now, we will just insert, and the linking logic can merge later.
             # A true upsert here would require a fuzzy match against the DB.
-            enrichment_data = {
-                'name': company.get('name'),
-                'description': company.get('description'),
-                'tech_stack': company.get('tech_stack')
-            }
+            enrichment_data = _enrichment_company_row(company)
             try:
                 # We use upsert on 'name' as a proxy for now. This can create near-duplicates
                 # that will need to be merged later. A more robust solution would involve
@@ -135,6 +196,106 @@ class SupabaseClient:
                 print(f"An error occurred while upserting enrichment data for company {company.get('name')}: {e}")
                 return None
 
+    def upsert_companies(self, companies: List[Dict[str, Any]], chunk_size: int = DEFAULT_CHUNK_SIZE,
+                         max_concurrency: int = DEFAULT_MAX_CONCURRENCY) -> Dict[str, str]:
+        """
+        Bulk version of `upsert_company` for arbitrarily large lists.
+
+        Companies are split into chunks of `chunk_size`. Within each chunk, companies
+        with a Zefix UID are upserted on `zefix_uid` and the rest on `name`, as in
+        `upsert_company`. Up to `max_concurrency` requests run at once.
+
+        Returns a mapping of each company's key (its zefix_uid if present, otherwise
+        its name) to the UUID of the upserted record. Companies in failed chunks are missing.
+        """
+        # Postgres rejects an upsert that touches the same row twice, so de-duplicate first (last one wins).
+        unique: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for company in companies:
+            if not company or not company.get('name'):
+                continue
+            if company.get('zefix_uid'):
+                unique[('zefix_uid', company['zefix_uid'])] = _zefix_company_row(company)
+            else:
+                unique[('name', company['name'])] = _enrichment_company_row(company)
+
+        tasks = []
+        for chunk in chunked(unique.items(), chunk_size):
+            for conflict_column in ('zefix_uid', 'name'):
+                rows = [row for (column, _), row in chunk if column == conflict_column]
+                if rows:
+                    tasks.append(lambda rows=rows, column=conflict_column: self._upsert_company_chunk(rows, column))
+
+        company_ids: Dict[str, str] = {}
+        for result in _run_concurrently(tasks, max_concurrency):
+            company_ids.update(result)
+        print(f"Bulk upserted {len(company_ids)} of {len(unique)} companies in {len(tasks)} requests.")
+        return company_ids
+
+    def _upsert_company_chunk(self, rows: List[Dict[str, Any]], conflict_column: str) -> Dict[str, str]:
+        try:
+            data, count = self.client.table('companies').upsert(rows, on_conflict=conflict_column).execute()
+            return {record[conflict_column]: record['id'] for record in data[1]}
+        except Exception as e:
+            print(f"An error occurred while bulk upserting {len(rows)} companies on {conflict_column}: {e}")
+            return {}
+
+    def upsert_candidates_with_skills(self, candidates: List[Tuple[Dict[str, Any], Skills]],
+                                      chunk_size: int = DEFAULT_CHUNK_SIZE,
+                                      max_concurrency: int = DEFAULT_MAX_CONCURRENCY) -> Dict[Tuple[str, str], int]:
+        """
+        Bulk version of `upsert_candidate` followed by `upsert_candidate_skills`.
+
+        Takes (candidate, skills) pairs, upserts the candidates in chunks on
+        `source,source_id`, then upserts all of their skills in chunks as well.
+
+        Returns a mapping of (source, source_id) to the candidate ID.
+        """
+        unique: Dict[Tuple[str, str], Tuple[Dict[str, Any], Skills]] = {}
+        for candidate, skills in candidates:
+            if candidate:
+                unique[(candidate.get('source'), candidate.get('source_id'))] = (candidate, skills)
+
+        tasks = [
+            lambda chunk=chunk: self._upsert_candidate_chunk([candidate for candidate, _ in chunk])
+            for chunk in chunked(unique.values(), chunk_size)
+        ]
+        candidate_ids: Dict[Tuple[str, str], int] = {}
+        for result in _run_concurrently(tasks, max_concurrency):
+            candidate_ids.update(result)
+
+        skill_records = [
+            record for key, (_, skills) in unique.items() if key in candidate_ids
+            for record in _skill_rows(candidate_ids[key], skills)
+        ]
+        skill_tasks = [
+            lambda chunk=chunk: self._upsert_skill_chunk(chunk)
+            for chunk in chunked(skill_records, chunk_size)
+        ]
+        num_skills = sum(_run_concurrently(skill_tasks, max_concurrency))
+
+        print(f"Bulk upserted {len(candidate_ids)} candidates and {num_skills} skills in {len(tasks) + len(skill_tasks)} requests.")
+        return candidate_ids
+
+    def _upsert_candidate_chunk(self, rows: List[Dict[str, Any]]) -> Dict[Tuple[str, str], int]:
+        try:
+            data, count = self.client.table('scraped_candidates').upsert(rows, on_conflict='source,source_id').execute()
+            return {(record['source'], record['source_id']): record['id'] for record in data[1]}
+        except Exception as e:
+            print(f"An error occurred while bulk upserting {len(rows)} candidates: {e}")
+            return {}
+
+    def _upsert_skill_chunk(self, rows: List[Dict[str, Any]]) -> int:
+        try:
+            data, count = self.client.table('scraped_candidate_skills').upsert(
+                rows,
+                on_conflict='candidate_id,skill',
+                ignore_duplicates=True
+            ).execute()
+            return len(data[1])
+        except Exception as e:
+            print(f"An error occurred while bulk upserting {len(rows)} candidate skills: {e}")
+            return 0
+
     def log_raw_company_scrape(self, company_id: str, source: str, source_id: str, raw_data: Dict[str, Any]):
         """
         Logs the raw scraped data for a company to the `companies_scraped_raw_data` table.
@@ -155,15 +316,109 @@ class SupabaseClient:
         except Exception as e:
             print(f"An error occurred while logging raw company scrape: {e}")
 
+    def log_raw_company_scrapes(self, log_entries: List[Dict[str, Any]], chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Bulk version of `log_raw_company_scrape`. Each entry has the same keys as its arguments.
+        """
+        entries = [entry for entry in log_entries if all(entry.get(key) for key in ('company_id', 'source', 'source_id', 'raw_data'))]
+        for chunk in chunked(entries, chunk_size):
+            try:
+                self.client.table('companies_scraped_raw_data').insert(chunk).execute()
+                print(f"Logged {len(chunk)} raw company scrapes.")
+            except Exception as e:
+                print(f"An error occurred while logging {len(chunk)} raw company scrapes: {e}")
+
+    def iter_rows(self, table: str, columns: str = '*', filters: Optional[Dict[str, str]] = None,
+                  page_size: int = DEFAULT_PAGE_SIZE, key: str = 'id') -> Iterator[Dict[str, Any]]:
+        """
+        Yields every row of `table` matching `filters` (PostgREST conditions such as
+        {'company_id': 'is.null'}), one page of `page_size` rows at a time.
+
+        Pages are keyset-paginated on `key` (`key > last seen ORDER BY key LIMIT n`),
+        so no rows are skipped or repeated when earlier rows are updated out of the
+        filter while iterating, and only one page is held in memory. `key` is always
+        selected. Errors are raised rather than ending the iteration early.
+        """
+        last_key = None
+        while True:
+            query = self.client.table(table).select(_projection(columns, key))
+            for column, condition in (filters or {}).items():
+                query = query.filter(column, *condition.split('.', 1))
+            if last_key is not None:
+                query = query.gt(key, last_key)
+            rows = query.order(key).limit(page_size).execute().data
+            yield from rows
+            if len(rows) < page_size:
+                return
+            last_key = rows[-1][key]
+
+    def iter_jobs_without_company_link(self, columns: str = 'id, company_name', page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+        """
+        Streams the jobs that do not have a company_id assigned yet.
+        """
+        return self.iter_rows('jobs', columns, JOBS_WITHOUT_COMPANY_FILTERS, page_size)
+
+    def iter_all_companies(self, columns: str = 'id, name', page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+        """
+        Streams every company in the canonical companies table.
+        """
+        return self.iter_rows('companies', columns, None, page_size)
+
+    def iter_jobs_with_company(self, columns: str = 'company_id, description', page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+        """
+        Streams the jobs that have a linked company_id.
+        """
+        return self.iter_rows('jobs', columns, JOBS_WITH_COMPANY_FILTERS, page_size)
+
+    def iter_companies_for_tagging(self, columns: str = 'id, description', page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+        """
+        Streams the companies that have a description but have not yet been tagged.
+        """
+        return self.iter_rows('companies', columns, COMPANIES_FOR_TAGGING_FILTERS, page_size)
+
+    def iter_job_embeddings(self, page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+        """
+        Streams the id and embedding of every job that has an embedding.
+        """
+        return self.iter_rows('jobs', 'id, embedding', JOBS_WITH_EMBEDDING_FILTERS, page_size)
+
+    def iter_function_rows(self, function: str, params: Dict[str, Any], page_size: int = DEFAULT_PAGE_SIZE,
+                           key: str = 'id') -> Iterator[Dict[str, Any]]:
+        """
+        Like `iter_rows`, for a database function returning rows ordered by `key` that
+        takes `after` (the last key seen) and `page_size` arguments.
+        """
+        last_key = None
+        while True:
+            rows = self.client.rpc(function, {**params, 'after': last_key, 'page_size': page_size}).execute().data or []
+            yield from rows
+            if len(rows) < page_size:
+                return
+            last_key = rows[-1][key]
+
+    def iter_companies_needing_tags(self, dictionary_version: str, page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+        """
+        Streams the id and description of the companies whose tags are missing, or were
+        generated from another description or dictionary version.
+        """
+        return self.iter_function_rows('companies_needing_tags', {'dictionary_version': dictionary_version}, page_size)
+
+    def iter_jobs_needing_sponsorship_scan(self, keywords_version: str, page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+        """
+        Streams the id, company_id and description of the linked jobs whose sponsorship
+        flag is missing, or was computed from another company, description or keyword version,
+        and of the unlinked jobs whose flag still counts towards a company (migration 012).
+        """
+        return self.iter_function_rows('jobs_needing_sponsorship_scan', {'keywords_version': keywords_version}, page_size)
+
     def get_jobs_without_company_link(self) -> List[Dict[str, Any]]:
         """
         Fetches all jobs that do not have a company_id assigned yet.
         """
         try:
-            # The correct way to filter for NULL is to use the value `None`.
-            response = self.client.table('jobs').select('id, company_name').is_('company_id', None).execute()
-            print(f"Found {len(response.data)} jobs without a company link.")
-            return response.data
+            jobs = list(self.iter_jobs_without_company_link())
+            print(f"Found {len(jobs)} jobs without a company link.")
+            return jobs
         except Exception as e:
             print(f"An error occurred while fetching jobs without company link: {e}")
             return []
@@ -173,9 +428,9 @@ class SupabaseClient:
         Fetches all companies from the canonical companies table.
         """
         try:
-            response = self.client.table('companies').select('id, name').execute()
-            print(f"Found {len(response.data)} canonical companies.")
-            return response.data
+            companies = list(self.iter_all_companies())
+            print(f"Found {len(companies)} canonical companies.")
+            return companies
         except Exception as e:
             print(f"An error occurred while fetching all companies: {e}")
             return []
@@ -190,18 +445,55 @@ class SupabaseClient:
         except Exception as e:
             print(f"An error occurred while updating job {job_id}: {e}")
 
+    def update_job_company_links(self, links: Dict[str, str], chunk_size: int = 1000,
+                                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY) -> int:
+        """
+        Bulk version of `update_job_company_link`. Takes a mapping of job ID -> company ID
+        and applies it in chunks through the `bulk_link_jobs_to_companies` database function.
+        Returns the number of jobs updated.
+        """
+        records = [{'job_id': job_id, 'company_id': company_id} for job_id, company_id in links.items()]
+        tasks = [
+            lambda chunk=chunk: self._call_bulk_function('bulk_link_jobs_to_companies', 'links', chunk)
+            for chunk in chunked(records, chunk_size)
+        ]
+        updated = sum(_run_concurrently(tasks, max_concurrency))
+        print(f"Linked {updated} of {len(records)} jobs to companies in {len(tasks)} requests.")
+        return updated
+
+    def _call_bulk_function(self, function: str, argument: str, records: List[Dict[str, Any]]) -> int:
+        try:
+            response = self.client.rpc(function, {argument: records}).execute()
+            return response.data or 0
+        except Exception as e:
+            print(f"An error occurred while calling {function} with {len(records)} records: {e}")
+            return 0
+
     def get_all_jobs_with_company(self) -> List[Dict[str, Any]]:
         """
         Fetches all jobs that have a valid, linked company_id.
         """
         try:
-            response = self.client.table('jobs').select('company_id, description').not_.is_('company_id', None).execute()
-            print(f"Found {len(response.data)} jobs with a linked company to analyze.")
-            return response.data
+            jobs = list(self.iter_jobs_with_company())
+            print(f"Found {len(jobs)} jobs with a linked company to analyze.")
+            return jobs
         except Exception as e:
             print(f"An error occurred while fetching jobs with company links: {e}")
             return []
 
+    def get_job_embeddings(self) -> List[Dict[str, Any]]:
+        """
+        Fetches the id and embedding of every job that has an embedding.
+        Prefer `iter_job_embeddings` for large tables.
+        """
+        try:
+            rows = list(self.iter_job_embeddings())
+            print(f"Found {len(rows)} jobs with embeddings.")
+            return rows
+        except Exception as e:
+            print(f"An error occurred while fetching job embeddings: {e}")
+            return []
+
     def update_company_sponsorship(self, company_id: str, status: bool):
         """
         Updates the sponsorship status for a company.
@@ -212,14 +504,44 @@ class SupabaseClient:
         except Exception as e:
             print(f"An error occurred while updating sponsorship for company {company_id}: {e}")
 
+    def update_companies_sponsorship(self, company_ids: List[str], status: bool, chunk_size: int = 200):
+        """
+        Bulk version of `update_company_sponsorship`. All companies get the same status,
+        so each chunk is a single `UPDATE ... WHERE id IN (...)` request.
+        """
+        for chunk in chunked(list(company_ids), chunk_size):
+            try:
+                self.client.table('companies').update({'offers_visa_sponsorship': status}).in_('id', chunk).execute()
+                print(f"Successfully updated sponsorship status for {len(chunk)} companies.")
+            except Exception as e:
+                print(f"An error occurred while updating sponsorship for {len(chunk)} companies: {e}")
+
+    def update_jobs_sponsorship(self, results: Dict[str, Tuple[bool, Optional[str]]], chunk_size: int = 1000) -> int:
+        """
+        Stores, for each job ID, whether the job mentions sponsorship and the `input_hash`
+        it was computed from, through the `bulk_update_job_sponsorship` database function.
+        The function also refreshes the sponsorship flag of the jobs' companies, and of the
+        companies they were previously scanned under (migration 011). Chunks are sent one
+        at a time, so two chunks never refresh the same company concurrently.
+        Returns the number of jobs updated.
+        """
+        records = [
+            {'job_id': job_id, 'mentions_sponsorship': mentions, 'input_hash': hash_}
+            for job_id, (mentions, hash_) in results.items()
+        ]
+        updated = sum(self._call_bulk_function('bulk_update_job_sponsorship', 'updates', chunk)
+                      for chunk in chunked(records, chunk_size))
+        print(f"Stored the sponsorship flag of {updated} of {len(records)} jobs.")
+        return updated
+
     def get_companies_for_tagging(self) -> List[Dict[str, Any]]:
         """
         Fetches companies that have a description but have not yet been tagged.
         """
         try:
-            response = self.client.table('companies').select('id, description').not_.is_('description', None).is_('tags', None).execute()
-            print(f"Found {len(response.data)} companies to tag.")
-            return response.data
+            companies = list(self.iter_companies_for_tagging())
+            print(f"Found {len(companies)} companies to tag.")
+            return companies
         except Exception as e:
             print(f"An error occurred while fetching companies for tagging: {e}")
             return []
@@ -235,3 +557,26 @@ class SupabaseClient:
             print(f"Successfully updated tags for company {company_id}.")
         except Exception as e:
             print(f"An error occurred while updating tags for company {company_id}: {e}")
+
+    def update_companies_tags(self, tags_by_company: Dict[str, List[str]], chunk_size: int = 1000,
+                              max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                              input_hashes: Optional[Dict[str, str]] = None) -> int:
+        """
+        Bulk version of `update_company_tags`. Takes a mapping of company ID -> tags
+        and applies it in chunks through the `bulk_update_company_tags` database function.
+        `input_hashes` (company ID -> `input_hash`) records what the tags were generated from.
+        Companies without tags are skipped unless they have an input hash, in which case
+        their tags are cleared. Returns the number of companies updated.
+        """
+        input_hashes = input_hashes or {}
+        records = [
+            {'company_id': company_id, 'tags': list(tags or []), 'input_hash': input_hashes.get(company_id)}
+            for company_id, tags in tags_by_company.items() if tags or company_id in input_hashes
+        ]
+        tasks = [
+            lambda chunk=chunk: self._call_bulk_function('bulk_update_company_tags', 'updates', chunk)
+            for chunk in chunked(records, chunk_size)
+        ]
+        updated = sum(_run_concurrently(tasks, max_concurrency))
+        print(f"Updated tags for {updated} of {len(records)} companies in {len(tasks)} requests.")
+        return updated
@@ -1,6 +1,16 @@
-from typing import List, Dict
+import os
+import sys
+from collections import defaultdict
+from itertools import combinations
+from typing import Iterator, List, Dict, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
 from thefuzz import fuzz
 
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.utils.normalize import normalize_company, normalize_string, normalize_title, normalize_url
+
 def canonicalize_company_name(company_name: str) -> str:
     """
     A simple placeholder for company name canonicalization.
@@ -20,18 +30,168 @@ def are_titles_similar(title1: str, title2: str) -> bool:
     # A score of > 90 is a good starting point for high similarity.
     return fuzz.token_set_ratio(title1, title2) > 90
 
+# Query parameters that only track where a click came from and never identify a posting.
+TRACKING_PARAMS = {'gclid', 'fbclid', 'msclkid', 'ref', 'referrer', 'source', 'src', 'trk', 'mc_cid', 'mc_eid'}
+
+# Blocks with more distinct titles than this only compare titles that share a word,
+# ignoring words that appear in more than this many of the block's titles.
+MAX_ALL_PAIRS_TITLES = 50
+
+def canonicalize_url(url: str) -> str:
+    """
+    Canonicalizes a job URL so the same posting reached through different links compares equal.
+    Lowercases the scheme and host, drops 'www.', tracking parameters, fragments and trailing slashes,
+    and sorts the remaining query parameters.
+    """
+    if not url:
+        return ""
+    parsed = urlparse(url.strip())
+    if not parsed.netloc:
+        parsed = urlparse(normalize_url(url.strip()))
+    host = parsed.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith('utm_')
+    )
+    return urlunparse((parsed.scheme.lower(), host, parsed.path.rstrip('/'), '', urlencode(query), ''))
+
+class UnionFind:
+    """
+    Disjoint sets over the integers 0..n-1, used to cluster duplicate records.
+    """
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, x: int) -> int:
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a: int, b: int):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            # Keep the smaller index as root so existing records stay canonical.
+            if root_b < root_a:
+                root_a, root_b = root_b, root_a
+            self.parent[root_b] = root_a
+
+def blocking_key(job: Dict) -> Tuple[str, str]:
+    """
+    Returns the (company, canton) block of a job. Jobs without a canton fall back to their location.
+    """
+    company = canonicalize_company_name(normalize_company(job.get('company_name') or job.get('company') or ''))
+    canton = normalize_string(job.get('canton') or job.get('location') or '')
+    return company, canton
+
 def dedupe_and_merge(new_jobs: List[Dict], existing_jobs: List[Dict]) -> List[Dict]:
     """
     Deduplicates and merges new jobs with existing jobs.
-    This is a simplified version and will be expanded upon.
-    """
-    # This is a placeholder for the full deduplication logic.
-    # A real implementation would involve the steps outlined in the prompt:
-    # 1. Block by (company, canton).
-    # 2. For each block, compare new jobs with existing jobs.
-    # 3. Use a combination of exact hash, fuzzy title matching, and URL canonicalization.
-    # 4. Cluster near-duplicates and select a canonical record.
-    # 5. Merge fields from non-canonical records into the canonical one.
-
-    print("Deduplication and merging not fully implemented yet.")
-    return new_jobs
+
+    1. Jobs with the same hash or the same canonical URL are duplicates (exact short-circuit).
+    2. Jobs are blocked by (company, canton); titles are only compared within a block,
+       so the work grows with block sizes instead of quadratically with the input.
+       Jobs without a company are only merged by step 1: a shared title says nothing
+       about whether two company-less postings are the same job.
+    3. Within a block, identical normalized titles are merged directly and distinct
+       titles are compared with `are_titles_similar`. A title only joins a cluster if
+       it is similar to the cluster's representative (its first title), so matches
+       do not chain from one title to the next.
+    4. Duplicates are clustered with union-find. Each cluster that contains a new job
+       yields one canonical record: the existing job if there is one (keeping its id
+       and hash), otherwise the most complete new job. Empty fields of the canonical
+       record are filled from the other records in the cluster.
+
+    Returns one merged record per cluster containing at least one new job.
+    """
+    records = list(existing_jobs) + list(new_jobs)
+    num_existing = len(existing_jobs)
+    clusters = UnionFind(len(records))
+
+    # 1. Exact short-circuit on hash and canonical URL
+    first_seen: Dict[Tuple[str, str], int] = {}
+    for i, job in enumerate(records):
+        for key in (('hash', job.get('hash')), ('url', canonicalize_url(job.get('url')))):
+            if not key[1]:
+                continue
+            if key in first_seen:
+                clusters.union(first_seen[key], i)
+            else:
+                first_seen[key] = i
+
+    # 2. Block by (company, canton), grouping records by normalized title inside each block
+    blocks: Dict[Tuple[str, str], Dict[str, List[int]]] = defaultdict(lambda: defaultdict(list))
+    for i, job in enumerate(records):
+        blocks[blocking_key(job)][normalize_title(job.get('title'))].append(i)
+
+    # 3. Compare titles within each block
+    for (company, _), titles in blocks.items():
+        if not company:
+            continue
+        for indices in titles.values():
+            for i in indices[1:]:
+                clusters.union(indices[0], i)
+        # The titles of each cluster in this block; the first one is its representative.
+        cluster_titles: Dict[int, List[str]] = defaultdict(list)
+        for title, indices in titles.items():
+            cluster_titles[clusters.find(indices[0])].append(title)
+        for title_a, title_b in _candidate_title_pairs(list(titles)):
+            root_a, root_b = clusters.find(titles[title_a][0]), clusters.find(titles[title_b][0])
+            if root_a == root_b or not are_titles_similar(title_a, title_b):
+                continue
+            # The union keeps the smaller root, and with it that cluster's representative.
+            kept, absorbed = min(root_a, root_b), max(root_a, root_b)
+            representative = cluster_titles[kept][0]
+            if all(are_titles_similar(title, representative) for title in cluster_titles[absorbed]):
+                clusters.union(kept, absorbed)
+                cluster_titles[kept].extend(cluster_titles.pop(absorbed))
+
+    # 4. Merge every cluster that contains a new job
+    members: Dict[int, List[int]] = defaultdict(list)
+    for i in range(len(records)):
+        members[clusters.find(i)].append(i)
+
+    merged = []
+    for indices in members.values():
+        if indices[-1] < num_existing:
+            continue  # Only existing jobs; nothing new to write.
+        if indices[0] < num_existing:
+            canonical = indices[0]
+        else:
+            canonical = max(indices, key=lambda i: sum(1 for value in records[i].values() if value not in (None, '', [])))
+        record = dict(records[canonical])
+        for i in indices:
+            for field, value in records[i].items():
+                if record.get(field) in (None, '', []) and value not in (None, '', []):
+                    record[field] = value
+        merged.append(record)
+
+    print(f"Deduplicated {len(new_jobs)} new jobs against {num_existing} existing jobs into {len(merged)} records.")
+    return merged
+
+def _candidate_title_pairs(titles: List[str]) -> Iterator[Tuple[str, str]]:
+    """
+    Yields the pairs of distinct titles in a block worth comparing. Small blocks compare
+    every pair; large blocks only compare titles that share at least one word
+    that is not common to most of the block ("engineer" at an engineering firm).
+    """
+    if len(titles) <= MAX_ALL_PAIRS_TITLES:
+        yield from combinations(titles, 2)
+        return
+
+    by_word: Dict[str, List[int]] = defaultdict(list)
+    for i, title in enumerate(titles):
+        for word in set(title.split()):
+            by_word[word].append(i)
+
+    seen = set()
+    for i, title in enumerate(titles):
+        for word in set(title.split()):
+            if len(by_word[word]) > MAX_ALL_PAIRS_TITLES:
+                continue
+            for j in by_word[word]:
+                if j > i and (i, j) not in seen:
+                    seen.add((i, j))
+                    yield title, titles[j]
@@ -0,0 +1,222 @@
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+from typing import Any, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.utils.cache import cache_path
+from job_scraper.utils.normalize import normalize_string
+
+# Permutations are computed as (a * x + b) mod a Mersenne prime, truncated to 32 bits.
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+def shingles(text: str, size: int = 3) -> Set[str]:
+    """
+    Returns the word shingles (runs of `size` consecutive words) of a normalized text.
+    Texts shorter than `size` words yield a single shingle.
+    """
+    words = normalize_string(text).split()
+    if len(words) <= size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def job_text(job: dict) -> str:
+    """
+    Returns the text a job is signed on: its title followed by its description.
+    """
+    return f"{job.get('title') or ''} {job.get('description') or ''}"
+
+class MinHasher:
+    """
+    Computes MinHash signatures of texts. The fraction of equal positions in two
+    signatures estimates the Jaccard similarity of the texts' shingle sets.
+
+    The permutations are derived from `seed`, so signatures are only comparable
+    between hashers created with the same `num_perm`, `shingle_size` and `seed`.
+    """
+    def __init__(self, num_perm: int = 128, shingle_size: int = 3, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        """
+        Returns the signature of a text as a uint32 array of length `num_perm`.
+        Empty texts get a signature of all max values. Two empty texts have the same
+        signature, so callers should not index or look up texts without shingles.
+        """
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode(), digest_size=4).digest(), 'little')
+             for s in shingles(text, self.shingle_size)),
+            dtype=np.uint64
+        )
+        if len(hashes) == 0:
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint32)
+        # One (num_shingles, num_perm) matrix of permuted hashes; the signature is its column minimum.
+        permuted = ((hashes[:, None] * self._a + self._b) % MERSENNE_PRIME) & MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+def is_empty_signature(signature: np.ndarray) -> bool:
+    """
+    Returns True for the signature of a text without shingles.
+    """
+    return bool((signature == MAX_HASH).all())
+
+def estimate_similarity(signature_a: np.ndarray, signature_b: np.ndarray) -> float:
+    """
+    Estimates the Jaccard similarity of the texts behind two signatures.
+    """
+    return float(np.mean(signature_a == signature_b))
+
+class LSHIndex:
+    """
+    A persistent locality-sensitive hashing index over MinHash signatures.
+
+    Each signature is split into `bands` bands; two jobs become candidates when at
+    least one band is identical, so a query only reads the jobs that share a
+    bucket with it instead of scanning every stored signature. Candidates are then
+    ranked by their estimated similarity and filtered by `threshold`.
+
+    With 128 permutations in 32 bands of 4 rows, pairs with a Jaccard similarity
+    of 0.5 become candidates about 87% of the time, and pairs at 0.2 about 5%.
+
+    Buckets and signatures are stored in SQLite, so the index survives across runs.
+    """
+    def __init__(self, path: Optional[str] = None, num_perm: int = 128, bands: int = 32, threshold: float = 0.5):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands.")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path or cache_path("minhash_lsh.sqlite3"), check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS signatures (job_id TEXT PRIMARY KEY, signature BLOB NOT NULL);
+            CREATE TABLE IF NOT EXISTS buckets (band INTEGER NOT NULL, bucket INTEGER NOT NULL, job_id TEXT NOT NULL);
+            CREATE INDEX IF NOT EXISTS buckets_band_bucket ON buckets (band, bucket);
+            CREATE INDEX IF NOT EXISTS buckets_job_id ON buckets (job_id);
+        """)
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM signatures").fetchone()[0]
+
+    def __contains__(self, job_id) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM signatures WHERE job_id = ?", (str(job_id),)).fetchone() is not None
+
+    def _bucket_keys(self, signature: np.ndarray) -> List[Tuple[int, int]]:
+        signature = np.asarray(signature, dtype=np.uint32)
+        if len(signature) != self.num_perm:
+            raise ValueError(f"Expected a signature of length {self.num_perm}, got {len(signature)}.")
+        keys = []
+        for band in range(self.bands):
+            chunk = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            digest = hashlib.blake2b(chunk, digest_size=8).digest()
+            keys.append((band, int.from_bytes(digest, 'little', signed=True)))
+        return keys
+
+    def add(self, job_id, signature: np.ndarray) -> None:
+        """
+        Adds a job to the index, replacing its previous signature if it was already indexed.
+        """
+        self.add_many([(job_id, signature)])
+
+    def add_many(self, items: Iterable[Tuple[Any, np.ndarray]]) -> None:
+        """
+        Adds (job_id, signature) pairs in a single transaction.
+        """
+        signature_rows, bucket_rows = [], []
+        for job_id, signature in items:
+            job_id = str(job_id)
+            signature_rows.append((job_id, np.asarray(signature, dtype=np.uint32).tobytes()))
+            bucket_rows.extend((band, bucket, job_id) for band, bucket in self._bucket_keys(signature))
+        with self._lock:
+            self._conn.executemany("DELETE FROM buckets WHERE job_id = ?", [(job_id,) for job_id, _ in signature_rows])
+            self._conn.executemany("INSERT OR REPLACE INTO signatures (job_id, signature) VALUES (?, ?)", signature_rows)
+            self._conn.executemany("INSERT INTO buckets (band, bucket, job_id) VALUES (?, ?, ?)", bucket_rows)
+            self._conn.commit()
+
+    def remove(self, job_ids: Iterable[Any]) -> None:
+        """
+        Removes jobs from the index. Unknown ids are ignored.
+        """
+        rows = [(str(job_id),) for job_id in job_ids]
+        with self._lock:
+            self._conn.executemany("DELETE FROM buckets WHERE job_id = ?", rows)
+            self._conn.executemany("DELETE FROM signatures WHERE job_id = ?", rows)
+            self._conn.commit()
+
+    def query(self, signature: np.ndarray, threshold: Optional[float] = None, exclude: Sequence[Any] = ()) -> List[Tuple[str, float]]:
+        """
+        Returns (job_id, estimated_similarity) for the indexed jobs likely to be
+        near-duplicates of the signature, most similar first.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        signature = np.asarray(signature, dtype=np.uint32)
+        keys = self._bucket_keys(signature)
+        excluded = {str(job_id) for job_id in exclude}
+
+        with self._lock:
+            placeholders = " OR ".join("(band = ? AND bucket = ?)" for _ in keys)
+            params = [value for key in keys for value in key]
+            candidates = [row[0] for row in self._conn.execute(
+                f"SELECT DISTINCT job_id FROM buckets WHERE {placeholders}", params
+            ) if row[0] not in excluded]
+            stored = []
+            for i in range(0, len(candidates), 500):
+                chunk = candidates[i:i + 500]
+                stored.extend(self._conn.execute(
+                    f"SELECT job_id, signature FROM signatures WHERE job_id IN ({','.join('?' * len(chunk))})", chunk
+                ))
+
+        results = []
+        for job_id, blob in stored:
+            similarity = estimate_similarity(signature, np.frombuffer(blob, dtype=np.uint32))
+            if similarity >= threshold:
+                results.append((job_id, similarity))
+        results.sort(key=lambda result: result[1], reverse=True)
+        return results
+
+    def close(self) -> None:
+        self._conn.close()
+
+class NearDuplicateDetector:
+    """
+    Signs jobs and looks them up in a persistent LSH index, so a new posting can be
+    checked against everything seen before without comparing it to the whole jobs table.
+    """
+    def __init__(self, index: Optional[LSHIndex] = None, hasher: Optional[MinHasher] = None):
+        # An empty index is falsy, so test for None rather than falling back on truthiness.
+        self.index = index if index is not None else LSHIndex()
+        self.hasher = hasher or MinHasher(num_perm=self.index.num_perm)
+
+    def find_duplicates(self, job: dict, threshold: Optional[float] = None) -> List[Tuple[str, float]]:
+        """
+        Returns the indexed jobs that are likely near-duplicates of `job`, excluding the job itself.
+        Jobs without any text have no duplicates.
+        """
+        signature = self.hasher.signature(job_text(job))
+        if is_empty_signature(signature):
+            return []
+        exclude = [job['id']] if job.get('id') is not None else []
+        return self.index.query(signature, threshold=threshold, exclude=exclude)
+
+    def add_jobs(self, jobs: Iterable[dict]) -> None:
+        """
+        Signs jobs (which must have an 'id') and adds them to the index. Jobs without any text are skipped.
+        """
+        signatures = ((job['id'], self.hasher.signature(job_text(job))) for job in jobs)
+        self.index.add_many((job_id, signature) for job_id, signature in signatures if not is_empty_signature(signature))
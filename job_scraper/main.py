@@ -1,51 +1,35 @@
-import os
 import logging
-from scrapers.swissdevjobs_scraper import main as swissdev_main
-from scrapers.adzuna_scraper import main as adzuna_main
+from scrapers.swissdevjobs_scraper import SwissDevJobsScraper
+from scrapers.adzuna_scraper import AdzunaScraper
+from scrapers.scheduler import ScraperScheduler, format_summary
+from job_scraper.db.async_supabase_client import AsyncSupabaseClient
 import asyncio
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Every source run by `run_all_scrapers`. Each one runs as its own task with the
+# timeout and concurrency budget defined on its class.
+SCRAPERS = [
+    SwissDevJobsScraper,
+    AdzunaScraper,
+]
+
 async def run_all_scrapers():
     """
-    Runs all available job scrapers and writes a summary to a file.
+    Runs all available job scrapers concurrently and writes a summary to a file.
     """
     logging.info("Starting all scrapers...")
-    summary = []
-
-    # Run SwissDevJobs scraper
     try:
-        logging.info("--- Running SwissDevJobs Scraper ---")
-        num_swissdev_jobs = await swissdev_main()
-        summary.append(f"SwissDevJobs: Scraped {num_swissdev_jobs} jobs.")
-        logging.info("--- SwissDevJobs Scraper finished ---")
-    except Exception as e:
-        summary.append("SwissDevJobs: Failed to run.")
-        logging.error(f"Error running SwissDevJobs scraper: {e}", exc_info=True)
-
-    # Run Adzuna scraper only if credentials are provided
-    adzuna_app_id = os.getenv('ADZUNA_APP_ID')
-    adzuna_api_key = os.getenv('ADZUNA_API_KEY')
-
-    if adzuna_app_id and adzuna_api_key:
-        try:
-            logging.info("--- Running Adzuna Scraper ---")
-            num_adzuna_jobs = await adzuna_main()
-            summary.append(f"Adzuna: Scraped {num_adzuna_jobs} jobs.")
-            logging.info("--- Adzuna Scraper finished ---")
-        except Exception as e:
-            summary.append("Adzuna: Failed to run.")
-            logging.error(f"Error running Adzuna scraper: {e}", exc_info=True)
-    else:
-        summary.append("Adzuna: Skipped (credentials not found).")
-        logging.warning("Adzuna credentials not found. Skipping Adzuna scraper.")
-
-    logging.info("All scrapers finished.")
+        results = await ScraperScheduler(SCRAPERS).run()
+    finally:
+        # The scheduler closes it too; this covers an interrupted run.
+        await AsyncSupabaseClient.close_shared()
 
     # Write summary to file
     with open("scraper-summary.txt", "w") as f:
-        f.write("\n".join(summary))
+        f.write(format_summary(results))
     logging.info("Scraper summary written to scraper-summary.txt")
+    return results
 
 if __name__ == "__main__":
     asyncio.run(run_all_scrapers())
@@ -6,7 +6,7 @@ import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from job_scraper.scrapers.adzuna_scraper import AdzunaScraper
-from job_scraper.db.supabase_client import SupabaseClient
+from job_scraper.db.async_supabase_client import AsyncSupabaseClient
 
 async def main():
     """
@@ -22,7 +22,7 @@ async def main():
 
     print("Initializing clients...")
     scraper = AdzunaScraper()
-    db_client = SupabaseClient()
+    db_client = AsyncSupabaseClient.shared()
 
     print("Running Adzuna scraper to get jobs and enrichment data...")
     # We are not saving the jobs right now, just processing the company data
@@ -34,9 +34,8 @@ async def main():
         print("No company data found to process.")
         return
 
-    for company in company_data:
-        print(f"  - Upserting data for company: {company['name']}")
-        db_client.upsert_company(company)
+    company_ids = await db_client.upsert_companies(company_data)
+    print(f"Upserted {len(company_ids)} companies.")
 
     print("\nCompany enrichment process finished.")
 
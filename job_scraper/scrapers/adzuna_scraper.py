@@ -1,5 +1,10 @@
+import asyncio
+import logging
+import math
 import os
-from typing import List, Dict, Tuple
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Iterable, List, Dict, Optional, Tuple
 import httpx
 import sys
 
@@ -7,77 +12,162 @@ import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
 from job_scraper.scrapers.base_scraper import BaseScraper
-from job_scraper.utils.normalize import create_job_hash, extract_skills_from_text
+from job_scraper.scrapers.pipeline import company_enrichment
+from job_scraper.utils.http import AdaptiveRateLimiter, RateLimitedFetcher, create_http_client
+from job_scraper.utils.normalize import create_job_hash
+
+# Adzuna's Swiss search endpoint; the page number is appended.
+ADZUNA_SEARCH_URL = "https://api.adzuna.com/v1/api/jobs/ch/search"
 
 class AdzunaScraper(BaseScraper):
     """
     A scraper for Adzuna.
+
+    `run` crawls every page of every (search, location) shard concurrently over one
+    pooled HTTP/2 client, stopping at the `count` Adzuna reports for each shard,
+    and streams the jobs and their company enrichment data into the database.
     """
-    def __init__(self):
-        self.app_id = os.environ.get("ADZUNA_APP_ID")
-        self.api_key = os.environ.get("ADZUNA_API_KEY")
+    name = "Adzuna"
+    timeout = 600.0
+    skip_reason = "credentials not found"
+    enrich_companies = True
+
+    # Requests per second. Adzuna's default quota is 25 requests per minute.
+    rate_limit = 0.4
+    results_per_page = 50
+    # Adzuna stops serving results deep into a search; narrower shards reach further.
+    max_pages = 100
+    # Shards crawled by `run`. An empty string means "no filter".
+    searches = ("",)
+    locations = ("",)
+
+    @classmethod
+    def is_configured(cls) -> bool:
+        return bool(os.environ.get("ADZUNA_APP_ID") and os.environ.get("ADZUNA_API_KEY"))
+
+    def __init__(self, app_id: Optional[str] = None, api_key: Optional[str] = None,
+                 client: Optional[httpx.AsyncClient] = None, base_url: str = ADZUNA_SEARCH_URL):
+        self.app_id = app_id or os.environ.get("ADZUNA_APP_ID")
+        self.api_key = api_key or os.environ.get("ADZUNA_API_KEY")
         if not self.app_id or not self.api_key:
             raise ValueError("Adzuna API credentials not configured.")
+        self.client = client
+        self.base_url = base_url
+        self.limiter = AdaptiveRateLimiter(self.rate_limit, burst=self.max_concurrency)
+
+    @asynccontextmanager
+    async def _fetcher(self) -> AsyncIterator[RateLimitedFetcher]:
+        """
+        Yields a fetcher over the injected client, or over a pooled client opened for this crawl.
+        """
+        if self.client is not None:
+            yield RateLimitedFetcher(self.client, self.limiter, self.semaphore)
+            return
+        async with create_http_client(max_connections=self.max_concurrency) as client:
+            yield RateLimitedFetcher(client, self.limiter, self.semaphore)
+
+    async def _fetch_page(self, fetcher: RateLimitedFetcher, page: int, limit: int, search: str, location: str) -> Dict:
+        params = {
+            "app_id": self.app_id,
+            "app_key": self.api_key,
+            "results_per_page": limit,
+            "what": search,
+            "where": location,
+            "content-type": "application/json"
+        }
+        response = await fetcher.get(f"{self.base_url}/{page}", params=params)
+        return response.json()
+
+    def _parse_results(self, data: Dict) -> List[Dict]:
+        jobs = []
+        for result in data.get("results", []):
+            job = {
+                "id": result.get("id"),
+                "title": result.get("title"),
+                "company_name": result.get("company", {}).get("display_name"),
+                "location": result.get("location", {}).get("display_name"),
+                "description": result.get("description"),
+                "created": result.get("created"),
+                "url": result.get("redirect_url"),
+                "source": "Adzuna"
+            }
+            job["hash"] = create_job_hash(job)
+            jobs.append(job)
+        return jobs
 
     async def scrape(self, page: int = 1, limit: int = 20, search: str = "", location: str = "") -> Tuple[List[Dict], List[Dict]]:
         """
-        Scrapes job data from the Adzuna API and also returns company enrichment data.
+        Scrapes a single page of the Adzuna API and also returns company enrichment data.
         Returns a tuple: (list_of_jobs, list_of_company_data)
         """
-        async with httpx.AsyncClient() as client:
+        try:
+            async with self._fetcher() as fetcher:
+                data = await self._fetch_page(fetcher, page, limit, search, location)
+            jobs = self._parse_results(data)
+            return jobs, [company for company in map(company_enrichment, jobs) if company]
+        except httpx.HTTPStatusError as e:
+            print(f"Error scraping Adzuna: {e}")
+            return [], []
+        except Exception as e:
+            print(f"An unexpected error occurred while scraping Adzuna: {e}")
+            return [], []
+
+    async def crawl(self, searches: Optional[Iterable[str]] = None, locations: Optional[Iterable[str]] = None,
+                    limit: Optional[int] = None, max_pages: Optional[int] = None) -> AsyncIterator[List[Dict]]:
+        """
+        Crawls every page of every (search, location) shard and yields the jobs of
+        each page as soon as it arrives.
+
+        The first page of each shard reports how many jobs match; the remaining
+        pages of that shard are then requested concurrently. At most twice
+        `max_concurrency` pages are fetched ahead of the consumer, so a slow
+        consumer slows the crawl down instead of buffering it. Pages that still fail
+        after retries are logged and skipped. Jobs already yielded by another
+        shard are dropped.
+        """
+        limit = limit or self.results_per_page
+        max_pages = max_pages or self.max_pages
+        queued = deque((search, location, 1) for search in (searches or self.searches) for location in (locations or self.locations))
+        max_pending = 2 * self.max_concurrency
+        seen_ids = set()
+
+        async with self._fetcher() as fetcher:
+            async def fetch(search: str, location: str, page: int):
+                try:
+                    return search, location, page, await self._fetch_page(fetcher, page, limit, search, location)
+                except Exception as e:
+                    logging.error(f"Adzuna: failed to fetch page {page} of shard {(search, location)}: {e}")
+                    return search, location, page, None
+
+            pending = set()
             try:
-                adzuna_api_url = f"https://api.adzuna.com/v1/api/jobs/ch/search/{page}"
-                params = {
-                    "app_id": self.app_id,
-                    "app_key": self.api_key,
-                    "results_per_page": limit,
-                    "what": search,
-                    "where": location,
-                    "content-type": "application/json"
-                }
-                response = await client.get(adzuna_api_url, params=params)
-                response.raise_for_status()
-                data = response.json()
-
-                jobs = []
-                company_enrichment_data = []
-
-                for result in data.get("results", []):
-                    company_name = result.get("company", {}).get("display_name")
-                    description = result.get("description")
-
-                    job = {
-                        "id": result.get("id"),
-                        "title": result.get("title"),
-                        "company_name": company_name,
-                        "location": result.get("location", {}).get("display_name"),
-                        "description": description,
-                        "created": result.get("created"),
-                        "url": result.get("redirect_url"),
-                        "source": "Adzuna"
-                    }
-                    job["hash"] = create_job_hash(job)
-                    jobs.append(job)
-
-                    if company_name and description:
-                        tech_stack = list(extract_skills_from_text(description))
-                        company_data = {
-                            "name": company_name,
-                            "description": description,
-                            "tech_stack": tech_stack
-                        }
-                        company_enrichment_data.append(company_data)
-
-                return jobs, company_enrichment_data
-            except httpx.HTTPStatusError as e:
-                print(f"Error scraping Adzuna: {e}")
-                return [], []
-            except Exception as e:
-                print(f"An unexpected error occurred while scraping Adzuna: {e}")
-                return [], []
-
-import asyncio
-from job_scraper.db.supabase_client import SupabaseClient
+                while queued or pending:
+                    while queued and len(pending) < max_pending:
+                        pending.add(asyncio.create_task(fetch(*queued.popleft())))
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        search, location, page, data = task.result()
+                        if data is None:
+                            continue
+                        if page == 1:
+                            last_page = min(max_pages, math.ceil(data.get("count", 0) / limit))
+                            queued.extend((search, location, p) for p in range(2, last_page + 1))
+
+                        jobs = [job for job in self._parse_results(data) if job["id"] is None or job["id"] not in seen_ids]
+                        seen_ids.update(job["id"] for job in jobs)
+                        if jobs:
+                            yield jobs
+            finally:
+                for task in pending:
+                    task.cancel()
+
+    async def stream(self) -> AsyncIterator[Dict]:
+        """
+        Yields the jobs of every crawled page as it arrives.
+        """
+        async for jobs in self.crawl():
+            for job in jobs:
+                yield job
 
 async def main():
     """
@@ -88,24 +178,7 @@ async def main():
     num_jobs = 0
     try:
         scraper = AdzunaScraper()
-        jobs, company_data = await scraper.scrape()
-        num_jobs = len(jobs)
-
-        if jobs:
-            print(f"Attempting to upsert {num_jobs} jobs to Supabase...")
-            supabase_client = SupabaseClient()
-            supabase_client.upsert_jobs(jobs)
-        else:
-            print("No jobs found from Adzuna to upsert.")
-
-        if company_data:
-            print(f"Attempting to upsert {len(company_data)} pieces of company enrichment data...")
-            supabase_client = SupabaseClient()
-            for company in company_data:
-                supabase_client.upsert_company(company)
-        else:
-            print("No company enrichment data found from Adzuna to upsert.")
-
+        num_jobs = await scraper.run()
     except ValueError as e:
         print(f"Configuration error: {e}")
     except Exception as e:
@@ -1,10 +1,46 @@
+import asyncio
+import os
+import sys
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from typing import AsyncIterator, List, Dict
+
+# Add the project root to the Python path to allow for absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.analysis.embedding_service import EmbeddingService
+from job_scraper.db.async_supabase_client import AsyncSupabaseClient
+from job_scraper.scrapers.pipeline import JobPipeline
 
 class BaseScraper(ABC):
     """
     Abstract base class for all job scrapers.
     """
+    # Name used in logs and in the run summary.
+    name: str = "Unknown"
+    # Per-source budgets applied by the scheduler. Subclasses override these.
+    timeout: float = 900.0
+    max_concurrency: int = 4
+    # Reported in the summary when `is_configured` returns False.
+    skip_reason: str = "not configured"
+    # Pipeline stages `run` enables for this source.
+    embed_jobs: bool = False
+    enrich_companies: bool = False
+
+    @classmethod
+    def is_configured(cls) -> bool:
+        """
+        Returns False if the source is missing required configuration (e.g. API keys).
+        """
+        return True
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        """
+        Limits the number of in-flight requests this source makes at once.
+        """
+        if getattr(self, '_semaphore', None) is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
 
     @abstractmethod
     async def scrape(self) -> List[Dict]:
@@ -12,3 +48,36 @@ class BaseScraper(ABC):
         Scrapes job data from a source and returns a list of job dictionaries.
         """
         pass
+
+    async def stream(self) -> AsyncIterator[Dict]:
+        """
+        Yields jobs as they are scraped. Sources that fetch incrementally override
+        this; by default it yields the result of `scrape`.
+        """
+        for job in await self.scrape():
+            yield job
+
+    def pipeline(self) -> JobPipeline:
+        """
+        Returns the pipeline `run` streams this source's jobs through.
+        """
+        embedding_service = EmbeddingService(max_concurrency=self.max_concurrency) if self.embed_jobs else None
+        return JobPipeline(AsyncSupabaseClient.shared(), embedding_service=embedding_service, enrich_companies=self.enrich_companies,
+                           on_written=self.jobs_written)
+
+    def jobs_written(self, jobs: List[Dict]) -> None:
+        """
+        Called by the pipeline with every chunk of jobs that was written in full.
+        Sources that remember what they ingested override this.
+        """
+        pass
+
+    async def run(self) -> int:
+        """
+        Streams the source's jobs through the pipeline, so they are written in
+        chunks while the scrape is still running. The pipeline's counts, including
+        the jobs that failed to be written, are kept in `self.stats`.
+        Returns the number of jobs scraped.
+        """
+        self.stats = await self.pipeline().run(self.stream())
+        return self.stats["scraped"]
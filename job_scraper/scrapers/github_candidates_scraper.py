@@ -1,29 +1,141 @@
+import asyncio
+import math
 import os
-import requests
 import time
 import sys
-from typing import Dict, Any, List
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import date, timedelta
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+import httpx
 
 # Add the parent directory to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
-from job_scraper.db.supabase_client import SupabaseClient
+from job_scraper.db.async_supabase_client import AsyncSupabaseClient
+from job_scraper.db.supabase_client import Skills
+from job_scraper.utils.http import QuotaRateLimiter, RateLimitedFetcher, ValidatorCache, Validators, create_http_client
+from job_scraper.utils.batching import chunked
 from job_scraper.utils.normalize import (
     normalize_location,
     extract_skills_from_text,
     normalize_url
 )
 
+# The search API never returns more than this many results for one query.
+SEARCH_RESULT_CAP = 1000
+SEARCH_PAGE_SIZE = 100
+# No GitHub account was created before this date.
+FIRST_ACCOUNT_DATE = date(2007, 10, 1)
+
+# Profiles fetched per GraphQL query. GitHub charges one point per 100 connection
+# nodes requested, so a full batch costs about one point where REST costs one request per profile.
+GRAPHQL_BATCH_SIZE = 100
+# Recent repositories read per user, and how many of their languages become skills.
+GRAPHQL_REPOSITORIES = 30
+TOP_LANGUAGES = 5
+
+# The profile fields of the REST users API, plus the primary language of recent
+# repositories. `primaryLanguage` is a plain field, not a connection, so it adds no cost.
+CANDIDATE_FRAGMENT = f"""
+fragment Candidate on User {{
+  databaseId login name email location company bio websiteUrl twitterUsername url avatarUrl
+  followers {{ totalCount }}
+  repositories(first: {GRAPHQL_REPOSITORIES}, ownerAffiliations: OWNER, isFork: false, orderBy: {{field: PUSHED_AT, direction: DESC}}) {{
+    nodes {{ primaryLanguage {{ name }} }}
+  }}
+}}
+"""
+
+def build_profiles_query(usernames: List[str]) -> Tuple[str, Dict[str, str]]:
+    """
+    Returns a GraphQL query fetching every user under an alias, and its variables.
+    Logins are passed as variables so they never need escaping.
+    """
+    declarations = ", ".join(f"$login{i}: String!" for i in range(len(usernames)))
+    fields = "\n".join(f"  user{i}: user(login: $login{i}) {{ ...Candidate }}" for i in range(len(usernames)))
+    query = f"query({declarations}) {{\n  rateLimit {{ cost remaining }}\n{fields}\n}}\n{CANDIDATE_FRAGMENT}"
+    return query, {f"login{i}": username for i, username in enumerate(usernames)}
+
+def top_repo_languages(user: Dict[str, Any], limit: int = TOP_LANGUAGES) -> List[str]:
+    """
+    Returns the primary languages of a GraphQL user's repositories, most used first.
+    """
+    counts = Counter(
+        repository["primaryLanguage"]["name"]
+        for repository in (user.get("repositories") or {}).get("nodes") or []
+        if repository and repository.get("primaryLanguage")
+    )
+    return [language for language, _ in counts.most_common(limit)]
+
+def rest_profile(user: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Maps a GraphQL user onto the fields of the REST users API read by `normalize_candidate`.
+    """
+    return {
+        "id": user.get("databaseId"),
+        "login": user.get("login"),
+        "name": user.get("name"),
+        "email": user.get("email") or None,
+        "location": user.get("location"),
+        "company": user.get("company"),
+        "bio": user.get("bio"),
+        "blog": user.get("websiteUrl"),
+        "twitter_username": user.get("twitterUsername"),
+        "html_url": user.get("url"),
+        "avatar_url": user.get("avatarUrl"),
+        "followers": (user.get("followers") or {}).get("totalCount"),
+        "repo_languages": top_repo_languages(user),
+    }
+
+def num_pages(first_page: Dict[str, Any]) -> int:
+    """
+    Returns how many pages of a query's results the search API serves.
+    """
+    return math.ceil(min(first_page.get("total_count", 0), SEARCH_RESULT_CAP) / SEARCH_PAGE_SIZE)
+
 class GitHubCandidatesScraper:
     """
     A scraper to find and collect profiles of potential candidates from GitHub.
+
+    Profiles are fetched concurrently over one pooled client. Requests are paced
+    from GitHub's X-RateLimit headers (the search and core APIs have separate
+    quotas), and queries matching more than 1,000 users are split by account
+    creation date until every part can be paged through completely.
+
+    By default profiles are fetched GRAPHQL_BATCH_SIZE at a time with one GraphQL
+    query, together with the languages of each user's recent repositories, which
+    are stored as 'repo_language' skills. With `use_graphql=False` they are fetched
+    one REST request each and revalidated with their stored ETag: unchanged
+    profiles come back as 304s, which GitHub does not count against the rate
+    limit, and are skipped. A profile's ETag is only saved once its candidate was
+    written, so profiles whose write failed are fetched in full again.
     """
-    def __init__(self, api_token: str):
+    max_concurrency = 8
+    # Candidates are written to the database in batches of this size.
+    batch_size = 500
+
+    def __init__(self, api_token: str, db_client: Optional[AsyncSupabaseClient] = None,
+                 client: Optional[httpx.AsyncClient] = None, base_url: str = "https://api.github.com",
+                 validators: Optional[ValidatorCache] = None, use_graphql: bool = True):
         if not api_token:
             raise ValueError("GitHub API token is required.")
         self.api_token = api_token
-        self.db_client = SupabaseClient()
-        self.base_url = "https://api.github.com"
+        # Defaults to the process-wide client once `run` is on an event loop.
+        self.db_client = db_client
+        self.client = client
+        self.base_url = base_url
+        self.use_graphql = use_graphql
+        self.search_limiter = QuotaRateLimiter(pace_below=5)
+        self.core_limiter = QuotaRateLimiter()
+        # GraphQL has its own quota, in points rather than requests.
+        self.graphql_limiter = QuotaRateLimiter(pace_below=10)
+        self.validators = validators or ValidatorCache()
+        # The validators of fetched REST profiles by (source, source_id), until their candidate is written.
+        self._unwritten: Dict[Tuple[str, str], Validators] = {}
+        self.unchanged_profiles = 0
+        self.graphql_points = 0
 
     def get_headers(self) -> Dict[str, str]:
         return {
@@ -31,73 +143,216 @@ class GitHubCandidatesScraper:
             "Authorization": f"Bearer {self.api_token}"
         }
 
-    def run(self, search_query: str = "location:switzerland followers:>50", max_pages: int = 1):
+    @asynccontextmanager
+    async def _session(self):
+        """
+        Opens the fetchers used by a run, over the injected client or a pooled client opened for the run.
+        """
+        if self.client is not None:
+            self._open_fetchers(self.client)
+            yield
+            return
+        async with create_http_client(max_connections=self.max_concurrency) as client:
+            self._open_fetchers(client)
+            yield
+
+    def _open_fetchers(self, client: httpx.AsyncClient):
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._search_fetcher = RateLimitedFetcher(client, self.search_limiter, semaphore)
+        self._profile_fetcher = RateLimitedFetcher(client, self.core_limiter, semaphore, validators=self.validators)
+        self._graphql_fetcher = RateLimitedFetcher(client, self.graphql_limiter, semaphore)
+
+    async def run(self, search_query: str = "location:switzerland followers:>50", max_pages: Optional[int] = None) -> int:
         """
         Runs the scraper to find users matching a query.
 
         :param search_query: The query string for the GitHub user search API.
-        :param max_pages: The maximum number of pages to scrape.
+        :param max_pages: The maximum number of search pages to scrape. Defaults to None: every page of every part.
+        Returns the number of profiles scraped.
         """
         print(f"Starting GitHub candidate scrape with query: '{search_query}'")
-        headers = self.get_headers()
-
-        for page in range(1, max_pages + 1):
-            search_url = f"{self.base_url}/search/users"
-            params = {"q": search_query, "per_page": 100, "page": page}
+        db_client = self.db_client or AsyncSupabaseClient.shared()
+        async with self._session():
+            usernames = await self.search_users(search_query, max_pages)
+            print(f"Found {len(usernames)} users.")
 
+            num_profiles = 0
+            self.unchanged_profiles = 0
+            self.graphql_points = 0
+            batch: List[Tuple[Dict[str, Any], Skills]] = []
+            if self.use_graphql:
+                tasks = [asyncio.create_task(self.scrape_profiles(chunk)) for chunk in chunked(usernames, GRAPHQL_BATCH_SIZE)]
+            else:
+                tasks = [asyncio.create_task(self._scrape_one(username)) for username in usernames]
             try:
-                response = requests.get(search_url, headers=headers, params=params)
-                response.raise_for_status()
-                data = response.json()
-                users = data.get("items", [])
+                for task in asyncio.as_completed(tasks):
+                    for profile in await task:
+                        batch.append(profile)
+                        num_profiles += 1
+                        if len(batch) >= self.batch_size:
+                            await self._write(db_client, batch)
+                            batch = []
+                if batch:
+                    await self._write(db_client, batch)
+            finally:
+                for task in tasks:
+                    task.cancel()
 
-                if not users:
-                    print("No more users found. Stopping.")
-                    break
+        if self.use_graphql:
+            print(f"GitHub candidate scrape finished: {num_profiles} profiles for {self.graphql_points} GraphQL points.")
+        else:
+            print(f"GitHub candidate scrape finished: {num_profiles} profiles, {self.unchanged_profiles} unchanged.")
+        return num_profiles
 
-                print(f"Found {len(users)} users on page {page}.")
-                for user in users:
-                    self.scrape_profile(user['login'])
-                    # Be respectful of the API rate limit
-                    time.sleep(1)
+    async def _write(self, db_client: AsyncSupabaseClient, batch: List[Tuple[Dict[str, Any], Skills]]):
+        """
+        Upserts a batch of candidates and saves the validators of the profiles that were written.
+        """
+        candidate_ids = await db_client.upsert_candidates_with_skills(batch) or {}
+        for candidate, _ in batch:
+            key = (candidate["source"], candidate["source_id"])
+            validators = self._unwritten.pop(key, None)
+            if key in candidate_ids:
+                self.validators.save(validators)
 
-            except requests.exceptions.RequestException as e:
-                print(f"Error searching for users on page {page}: {e}")
-                break
+    async def search_users(self, search_query: str, max_pages: Optional[int] = None) -> List[str]:
+        """
+        Returns the logins of every user matching the query, in search order.
+        With `max_pages`, no more than that many pages are requested.
+        """
+        partitions = await self._partition_query(search_query, max_pages=max_pages)
+        results = [first_page for _, first_page in partitions]
+        remaining_pages = [
+            (query, page) for query, first_page in partitions
+            for page in range(2, num_pages(first_page) + 1)
+        ]
+        if max_pages is not None:
+            results = results[:max_pages]
+            remaining_pages = remaining_pages[:max(0, max_pages - len(results))]
+        results.extend(await asyncio.gather(*(self._search_page(query, page) for query, page in remaining_pages)))
 
-        print("GitHub candidate scrape finished.")
+        usernames = []
+        seen = set()
+        for data in results:
+            for user in data.get("items", []):
+                if user["login"] not in seen:
+                    seen.add(user["login"])
+                    usernames.append(user["login"])
+        return usernames
 
-    def scrape_profile(self, username: str):
+    async def _partition_query(self, search_query: str, created: Optional[Tuple[date, date]] = None,
+                               max_pages: Optional[int] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Splits a query by account creation date until no part matches more than
+        SEARCH_RESULT_CAP users. Returns each part with its first page of results.
+        With `max_pages`, parts are explored oldest first and splitting stops once
+        they hold that many pages.
         """
-        Scrapes a single user profile and saves it to the database.
+        query = search_query if created is None else f"{search_query} created:{created[0].isoformat()}..{created[1].isoformat()}"
+        first_page = await self._search_page(query, 1)
+        if first_page.get("total_count", 0) <= SEARCH_RESULT_CAP:
+            return [(query, first_page)]
+        if max_pages is not None and max_pages * SEARCH_PAGE_SIZE <= SEARCH_RESULT_CAP:
+            # The pages wanted are all within reach of this part.
+            return [(query, first_page)]
+
+        if created is None:
+            if "created:" in search_query:
+                print(f"Query '{search_query}' matches more than {SEARCH_RESULT_CAP} users and already filters on creation date; results are truncated.")
+                return [(query, first_page)]
+            created = (FIRST_ACCOUNT_DATE, date.today())
+        start, end = created
+        if start >= end:
+            print(f"Query '{query}' matches more than {SEARCH_RESULT_CAP} users on a single day; results are truncated.")
+            return [(query, first_page)]
+
+        middle = start + (end - start) // 2
+        if max_pages is None:
+            left, right = await asyncio.gather(
+                self._partition_query(search_query, (start, middle)),
+                self._partition_query(search_query, (middle + timedelta(days=1), end))
+            )
+            return left + right
+
+        left = await self._partition_query(search_query, (start, middle), max_pages)
+        remaining = max_pages - sum(num_pages(page) for _, page in left)
+        if remaining <= 0:
+            return left
+        return left + await self._partition_query(search_query, (middle + timedelta(days=1), end), remaining)
+
+    async def _search_page(self, query: str, page: int) -> Dict[str, Any]:
+        params = {"q": query, "per_page": SEARCH_PAGE_SIZE, "page": page}
+        try:
+            response = await self._search_fetcher.get(f"{self.base_url}/search/users", headers=self.get_headers(), params=params)
+            return response.json()
+        except httpx.HTTPError as e:
+            print(f"Error searching for users on page {page} of '{query}': {e}")
+            return {}
+
+    async def scrape_profiles(self, usernames: List[str]) -> List[Tuple[Dict[str, Any], Dict[str, str]]]:
+        """
+        Fetches up to GRAPHQL_BATCH_SIZE profiles with one GraphQL query.
+        Returns each normalized candidate with their skills, mapped to where they
+        were found: 'bio_keyword' or 'repo_language'. Users that no longer exist are
+        left out, and a failed query returns no profiles.
+        """
+        query, variables = build_profiles_query(usernames)
+        try:
+            response = await self._graphql_fetcher.post(f"{self.base_url}/graphql", headers=self.get_headers(),
+                                                        json={"query": query, "variables": variables})
+            payload = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"Error fetching {len(usernames)} profiles with GraphQL: {e}")
+            return []
+
+        data = payload.get("data") or {}
+        if not data:
+            print(f"GraphQL query for {len(usernames)} profiles failed: {payload.get('errors')}")
+            return []
+        self.graphql_points += (data.get("rateLimit") or {}).get("cost", 0)
+
+        profiles = []
+        for i in range(len(usernames)):
+            user = data.get(f"user{i}")
+            if not user:
+                # Renamed or deleted since the search; GraphQL reports these as NOT_FOUND errors.
+                continue
+            profile_data = rest_profile(user)
+            candidate = self.normalize_candidate(profile_data)
+            skills = dict.fromkeys(extract_skills_from_text(candidate.get('bio') or ''), 'bio_keyword')
+            skills.update((language.lower(), 'repo_language') for language in profile_data["repo_languages"])
+            profiles.append((candidate, skills))
+        return profiles
+
+    async def _scrape_one(self, username: str) -> List[Tuple[Dict[str, Any], Set[str]]]:
+        profile = await self.scrape_profile(username)
+        return [profile] if profile else []
+
+    async def scrape_profile(self, username: str) -> Tuple[Dict[str, Any], Set[str]] | None:
+        """
+        Scrapes a single user profile.
+        Returns the normalized candidate and their skills, or None if the request
+        failed or the profile is unchanged since it was last scraped.
         """
         profile_url = f"{self.base_url}/users/{username}"
-        headers = self.get_headers()
 
         try:
-            response = requests.get(profile_url, headers=headers)
-            response.raise_for_status()
+            response, validators = await self._profile_fetcher.conditional_get(profile_url, headers=self.get_headers())
+            if response.status_code == 304:
+                self.unchanged_profiles += 1
+                return None
             profile_data = response.json()
 
-            print(f"Successfully scraped profile for user: {username}")
-            # In a real implementation, we would save this to the DB.
-            # For now, we'll just print a summary.
-
             candidate = self.normalize_candidate(profile_data)
             skills = extract_skills_from_text(candidate.get('bio', ''))
+            if validators is not None:
+                self._unwritten[(candidate["source"], candidate["source_id"])] = validators
 
-            print(f"  - Name: {candidate.get('name')}")
-            print(f"  - Location: {candidate.get('location')}")
-            print(f"  - Job Title: {candidate.get('company')}") # Using company as a proxy
-            print(f"  - Extracted Skills: {skills}")
-
-            # Upsert candidate and their skills to the database
-            candidate_id = self.db_client.upsert_candidate(candidate)
-            if candidate_id and skills:
-                self.db_client.upsert_candidate_skills(candidate_id, skills)
+            return candidate, skills
 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             print(f"Error scraping profile for {username}: {e}")
+            return None
 
     def normalize_candidate(self, profile_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -131,4 +386,4 @@ if __name__ == '__main__':
     else:
         scraper = GitHubCandidatesScraper(api_token=github_token)
         # Run a small test scrape
-        scraper.run(search_query="location:switzerland followers:>10", max_pages=1)
+        asyncio.run(scraper.run(search_query="location:switzerland followers:>10", max_pages=1))
@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import os
+import sys
+import time
+from typing import Any, AsyncIterable, Awaitable, Callable, Dict, List, Optional
+
+# Add the project root to the Python path to allow for absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.utils.normalize import create_job_hash, extract_skills_from_text
+
+# Marks the end of a stage's input.
+_DONE = object()
+
+def normalize_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Strips surrounding whitespace from the job's text fields and adds its hash if it has none.
+    """
+    job = {key: value.strip() if isinstance(value, str) else value for key, value in job.items()}
+    if not job.get("hash"):
+        job["hash"] = create_job_hash(job)
+    return job
+
+def company_enrichment(job: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Returns the company enrichment record (name, description and tech stack) a job provides, if any.
+    """
+    company_name, description = job.get("company_name"), job.get("description")
+    if not company_name or not description:
+        return None
+    return {
+        "name": company_name,
+        "description": description,
+        "tech_stack": list(extract_skills_from_text(description))
+    }
+
+class JobPipeline:
+    """
+    Streams jobs from a scraper to the database through bounded queues:
+
+        fetch -> normalize and hash -> skill extraction -> batched embedding -> chunked upsert
+
+    Every stage runs its own workers (`*_concurrency`) and blocks when the queue
+    in front of the next stage is full, so a slow stage holds back the crawl
+    instead of letting jobs pile up in memory. The embedding and upsert stages
+    send a batch once it is full or `flush_interval` seconds after its first job,
+    so the first rows are written while the crawl is still running.
+
+    Skill extraction turns each job into a company enrichment record when
+    `enrich_companies` is set. Embedding only runs when `embedding_service` is given.
+
+    Jobs the database did not accept (the client reports fewer rows written than
+    were sent) are counted in `stats["failed"]`, never as upserted. `on_written`,
+    if given, is called with every chunk of jobs that was written in full, so a
+    source can record its progress only for data that actually landed.
+    """
+    def __init__(self, supabase_client=None, embedding_service=None, enrich_companies: bool = False,
+                 queue_size: int = 500, normalize_concurrency: int = 2, skills_concurrency: int = 2,
+                 embed_batch_size: int = 100, embed_concurrency: int = 2,
+                 upsert_chunk_size: int = 500, upsert_concurrency: int = 2, flush_interval: float = 2.0,
+                 on_written: Optional[Callable[[List[Dict[str, Any]]], Any]] = None):
+        self.supabase_client = supabase_client
+        self.embedding_service = embedding_service
+        self.enrich_companies = enrich_companies
+        self.queue_size = queue_size
+        self.normalize_concurrency = normalize_concurrency
+        self.skills_concurrency = skills_concurrency
+        self.embed_batch_size = embed_batch_size
+        self.embed_concurrency = embed_concurrency
+        self.upsert_chunk_size = upsert_chunk_size
+        self.upsert_concurrency = upsert_concurrency
+        self.flush_interval = flush_interval
+        self.on_written = on_written
+
+    async def run(self, jobs: AsyncIterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Drains `jobs` through every stage.
+        Returns counts of jobs scraped, upserted and failed (dropped by a stage or
+        not written), of companies written and not written, and the seconds until the first upsert.
+        """
+        if self.supabase_client is None:
+            from job_scraper.db.async_supabase_client import AsyncSupabaseClient
+            self.supabase_client = AsyncSupabaseClient.shared()
+
+        self.stats = {"scraped": 0, "upserted": 0, "companies": 0, "failed": 0, "companies_failed": 0, "first_write": None}
+        self._start = time.perf_counter()
+        normalize_queue, skills_queue, embed_queue, upsert_queue = (asyncio.Queue(self.queue_size) for _ in range(4))
+        embed_concurrency = self.embed_concurrency if self.embedding_service else 1
+
+        stages = [
+            self._stage([self._fetch(jobs, normalize_queue)], normalize_queue, self.normalize_concurrency),
+            self._stage([self._map(normalize_queue, skills_queue, normalize_job) for _ in range(self.normalize_concurrency)],
+                        skills_queue, self.skills_concurrency),
+            self._stage([self._map(skills_queue, embed_queue, self._extract_skills) for _ in range(self.skills_concurrency)],
+                        embed_queue, embed_concurrency),
+            self._stage([self._embed(embed_queue, upsert_queue) for _ in range(embed_concurrency)],
+                        upsert_queue, self.upsert_concurrency),
+            self._stage([self._upsert(upsert_queue) for _ in range(self.upsert_concurrency)]),
+        ]
+        tasks = [asyncio.create_task(stage) for stage in stages]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        logging.info(f"Pipeline finished in {time.perf_counter() - self._start:.2f}s: {self.stats}")
+        return self.stats
+
+    @staticmethod
+    async def _stage(workers: List[Awaitable], output: Optional[asyncio.Queue] = None, consumers: int = 0):
+        """
+        Runs a stage's workers, then tells each consumer of the next stage that the input has ended.
+        """
+        await asyncio.gather(*workers)
+        for _ in range(consumers):
+            await output.put(_DONE)
+
+    async def _fetch(self, jobs: AsyncIterable[Dict[str, Any]], output: asyncio.Queue):
+        async for job in jobs:
+            self.stats["scraped"] += 1
+            await output.put(job)
+
+    async def _map(self, input: asyncio.Queue, output: asyncio.Queue, transform: Callable[[Dict[str, Any]], Any]):
+        while (item := await input.get()) is not _DONE:
+            try:
+                result = transform(item)
+            except Exception as e:
+                self.stats["failed"] += 1
+                logging.error(f"Pipeline: dropping a job that failed in {transform.__name__}: {e}", exc_info=True)
+                continue
+            await output.put(result)
+
+    def _extract_skills(self, job: Dict[str, Any]):
+        return job, company_enrichment(job) if self.enrich_companies else None
+
+    async def _embed(self, input: asyncio.Queue, output: asyncio.Queue):
+        batch_size = self.embed_batch_size if self.embedding_service else 1
+        async for batch in self._batches(input, batch_size):
+            if self.embedding_service:
+                missing = [job for job, _ in batch if not job.get("embedding")]
+                texts = [f"Job Title: {job.get('title')}\nDescription: {job.get('description') or ''}" for job in missing]
+                for job, embedding in zip(missing, await self.embedding_service.get_embeddings(texts)):
+                    job["embedding"] = embedding
+            for item in batch:
+                await output.put(item)
+
+    async def _upsert(self, input: asyncio.Queue):
+        async for batch in self._batches(input, self.upsert_chunk_size):
+            jobs = [job for job, _ in batch]
+            companies = [company for _, company in batch if company]
+            # The client de-duplicates on the same keys before writing, and reports failed chunks as unwritten.
+            expected = len({job.get("hash") for job in jobs})
+            upserted = await self.supabase_client.upsert_jobs(jobs) or 0
+            if upserted < expected:
+                logging.error(f"Pipeline: {expected - upserted} of {expected} jobs in a chunk were not written.")
+            self.stats["upserted"] += upserted
+            self.stats["failed"] += expected - upserted
+            if upserted and self.stats["first_write"] is None:
+                self.stats["first_write"] = time.perf_counter() - self._start
+            if upserted == expected and self.on_written is not None:
+                self.on_written(jobs)
+            if companies:
+                company_ids = await self.supabase_client.upsert_companies(companies) or {}
+                expected_companies = len({company.get("zefix_uid") or company["name"] for company in companies})
+                self.stats["companies"] += len(company_ids)
+                self.stats["companies_failed"] += expected_companies - len(company_ids)
+
+    async def _batches(self, input: asyncio.Queue, size: int):
+        """
+        Yields lists of up to `size` items, each sent at most `flush_interval` seconds after its first item arrived.
+        """
+        done = False
+        while not done:
+            item = await input.get()
+            if item is _DONE:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < size:
+                try:
+                    item = await asyncio.wait_for(input.get(), max(0.0, deadline - time.monotonic()))
+                except asyncio.TimeoutError:
+                    break
+                if item is _DONE:
+                    done = True
+                    break
+                batch.append(item)
+            yield batch
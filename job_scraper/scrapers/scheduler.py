@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import os
+import sys
+import time
+from typing import List, Dict, Any, Type
+
+# Add the project root to the Python path to allow for absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.db.async_supabase_client import AsyncSupabaseClient
+from job_scraper.scrapers.base_scraper import BaseScraper
+
+class ScraperScheduler:
+    """
+    Runs every registered scraper as its own asyncio task.
+
+    Each source gets its own timeout and concurrency budget (taken from the
+    scraper class), and a failure or timeout in one source never affects the others.
+    A source whose jobs were scraped but not all written is reported as 'partial'.
+    Total wall time therefore approaches the slowest single source instead of the sum.
+    """
+    def __init__(self, scrapers: List[Type[BaseScraper]]):
+        self.scrapers = scrapers
+
+    async def run(self) -> List[Dict[str, Any]]:
+        """
+        Runs all configured scrapers concurrently.
+        Returns one result dictionary per registered scraper, in registration order.
+        The shared database client is closed once every source has finished.
+        """
+        start = time.perf_counter()
+        tasks = []
+        for scraper_cls in self.scrapers:
+            if scraper_cls.is_configured():
+                tasks.append(asyncio.create_task(self._run_source(scraper_cls), name=scraper_cls.name))
+            else:
+                logging.warning(f"{scraper_cls.name}: skipped ({scraper_cls.skip_reason}).")
+                tasks.append(None)
+
+        results = []
+        try:
+            for scraper_cls, task in zip(self.scrapers, tasks):
+                if task is None:
+                    results.append(self._result(scraper_cls, "skipped"))
+                else:
+                    results.append(await task)
+        finally:
+            await AsyncSupabaseClient.close_shared()
+
+        logging.info(f"All scrapers finished in {time.perf_counter() - start:.2f}s.")
+        return results
+
+    async def _run_source(self, scraper_cls: Type[BaseScraper]) -> Dict[str, Any]:
+        """
+        Runs a single source within its timeout budget. Never raises.
+        """
+        logging.info(f"--- Running {scraper_cls.name} Scraper ---")
+        start = time.perf_counter()
+        try:
+            scraper = scraper_cls()
+            num_jobs = await asyncio.wait_for(scraper.run(), timeout=scraper.timeout)
+            failed = (getattr(scraper, "stats", None) or {}).get("failed", 0)
+            if failed:
+                logging.error(f"{scraper_cls.name}: {failed} jobs were not written.")
+                result = self._result(scraper_cls, "partial", jobs=num_jobs, failed=failed,
+                                      error=f"{failed} jobs were not written")
+            else:
+                result = self._result(scraper_cls, "ok", jobs=num_jobs)
+        except asyncio.TimeoutError:
+            logging.error(f"{scraper_cls.name} scraper exceeded its {scraper_cls.timeout}s budget.")
+            result = self._result(scraper_cls, "timeout")
+        except Exception as e:
+            logging.error(f"Error running {scraper_cls.name} scraper: {e}", exc_info=True)
+            result = self._result(scraper_cls, "failed", error=str(e))
+
+        result["duration"] = time.perf_counter() - start
+        logging.info(f"--- {scraper_cls.name} Scraper finished in {result['duration']:.2f}s ({result['status']}) ---")
+        return result
+
+    @staticmethod
+    def _result(scraper_cls: Type[BaseScraper], status: str, jobs: int = 0, failed: int = 0,
+                error: str | None = None) -> Dict[str, Any]:
+        return {
+            "source": scraper_cls.name,
+            "status": status,
+            "jobs": jobs,
+            "failed": failed,
+            "duration": 0.0,
+            "error": error,
+            "skip_reason": scraper_cls.skip_reason if status == "skipped" else None,
+        }
+
+def format_summary(results: List[Dict[str, Any]]) -> str:
+    """
+    Formats scheduler results as the human-readable run summary, one line per source.
+    """
+    lines = []
+    for result in results:
+        source, status, duration = result["source"], result["status"], result["duration"]
+        if status == "ok":
+            lines.append(f"{source}: Scraped {result['jobs']} jobs in {duration:.2f}s.")
+        elif status == "partial":
+            lines.append(f"{source}: Scraped {result['jobs']} jobs in {duration:.2f}s; {result['failed']} failed to be written.")
+        elif status == "skipped":
+            lines.append(f"{source}: Skipped ({result['skip_reason']}).")
+        elif status == "timeout":
+            lines.append(f"{source}: Timed out after {duration:.2f}s.")
+        else:
+            lines.append(f"{source}: Failed to run after {duration:.2f}s.")
+    return "\n".join(lines)
@@ -1,6 +1,7 @@
 import asyncio
 import logging
-from typing import List, Dict
+from typing import Any, AsyncIterator, List, Dict, Optional, Tuple
+import httpx
 import rss_parser
 import os
 import sys
@@ -8,57 +9,189 @@ import sys
 # Add the project root to the Python path to allow for absolute imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
-from job_scraper.db.supabase_client import SupabaseClient
+from job_scraper.analysis.embedding_service import EmbeddingService
 from job_scraper.scrapers.base_scraper import BaseScraper
+from job_scraper.utils.http import ValidatorCache, Validators, conditional_get, create_http_client
 from job_scraper.utils.normalize import create_job_hash
+from job_scraper.utils.watermark import FeedWatermark, fingerprint
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+FEED_URL = 'https://swissdevjobs.ch/jobs/rss'
+
+def _content(tag: Any) -> Any:
+    # rss_parser wraps most elements in a Tag; namespaced extras such as dc:creator are plain values.
+    return getattr(tag, 'content', tag)
+
+def feed_items(xml: str) -> List[Dict[str, Any]]:
+    """
+    Parses the RSS feed into one plain dictionary per item.
+    """
+    feed = rss_parser.RSSParser.parse(xml)
+    items = []
+    for tag in feed.channel.items or []:
+        item = _content(tag)
+        extra = item.model_dump()
+        links = item.links or []
+        items.append({
+            "title": _content(item.title),
+            "creator": _content(extra.get("dc:creator")),
+            "location": _content(extra.get("location")),
+            "description": _content(item.description) or "",
+            "pubDate": _content(item.pub_date),
+            "link": _content(links[0]) if links else None,
+        })
+    return items
+
 class SwissDevJobsScraper(BaseScraper):
     """
     A scraper for SwissDevJobs.ch.
+
+    The feed is fetched with a conditional GET. When it has not changed since the
+    last poll the server answers 304, and nothing is parsed, embedded or upserted.
+    The feed's validators are only saved once all of its jobs were written, so a
+    feed whose write failed is fetched in full again on the next poll.
+
+    In incremental mode, a `FeedWatermark` tracks the items already stored, so only
+    new or changed items are embedded and upserted. Items are recorded as seen
+    chunk by chunk, once the pipeline has written them; items whose write failed
+    stay unseen and are retried on the next poll.
     """
-    def __init__(self):
-        self.parser = rss_parser.RSSParser()
+    name = "SwissDevJobs"
+    timeout = 600.0
+    embed_jobs = True
+
+    def __init__(self, client: Optional[httpx.AsyncClient] = None, validators: Optional[ValidatorCache] = None,
+                 feed_url: str = FEED_URL, incremental: bool = True, watermark: Optional[FeedWatermark] = None):
+        self.client = client
+        self.validators = validators or ValidatorCache()
+        self.feed_url = feed_url
+        self.watermark = (watermark or FeedWatermark(self.name)) if incremental else None
+        # The (key, fingerprint, published) triple of each fetched job, by job hash, until it is written.
+        self._unwritten: Dict[str, Tuple[str, str, Any]] = {}
+        # The validators of the fetched feed, saved by `feed_written`.
+        self._feed_validators: Optional[Validators] = None
+
+    async def fetch_feed(self) -> Optional[str]:
+        """
+        Returns the feed's XML, or None if it is unchanged since the last fetch.
+        """
+        if self.client is not None:
+            response, self._feed_validators = await conditional_get(self.client, self.feed_url, self.validators)
+        else:
+            async with create_http_client() as client:
+                response, self._feed_validators = await conditional_get(client, self.feed_url, self.validators)
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+        return response.text
+
+    async def _fetch_jobs(self) -> List[Dict]:
+        """
+        Fetches the feed and returns its jobs, without embeddings. In incremental
+        mode only new or changed jobs are returned.
+        """
+        xml = await self.fetch_feed()
+        if xml is None:
+            logging.info("SwissDevJobs.ch feed is unchanged since the last poll.")
+            return []
+        items = feed_items(xml)
+        seen = [None] * len(items)
+        if self.watermark is not None:
+            items, seen = self._new_items(items)
+
+        jobs = []
+        for item, item_seen in zip(items, seen):
+            job = {
+                "title": item["title"],
+                "company_name": item["creator"],
+                "location": item["location"] or item["title"],
+                "description": item["description"],
+                "date_posted": item["pubDate"].isoformat() if item["pubDate"] else None,
+                "url": item["link"],
+                "source": "SwissDevJobs.ch",
+                "embedding": None # Default to None
+            }
+            job["hash"] = create_job_hash(job)
+            if item_seen is not None:
+                self._unwritten[job["hash"]] = item_seen
+            jobs.append(job)
+        return jobs
 
     async def scrape(self) -> List[Dict]:
         """
         Scrapes job data from the SwissDevJobs.ch RSS feed and generates embeddings.
+        Callers storing the jobs themselves call `feed_written` once they are stored.
         """
         logging.info("Scraping SwissDevJobs.ch RSS feed...")
         try:
-            feed = await self.parser.parse_from_url('https://swissdevjobs.ch/jobs/rss')
-            embedding_service = EmbeddingService()
-
-            jobs = []
-            for item in feed.items:
-                description = item.get("description", item.get("contentSnippet", ""))
-                job = {
-                    "title": item.title,
-                    "company_name": item.creator,
-                    "location": item.get("location", item.title),
-                    "description": description,
-                    "date_posted": item.pubDate,
-                    "url": item.link,
-                    "source": "SwissDevJobs.ch",
-                    "embedding": None # Default to None
-                }
-                job["hash"] = create_job_hash(job)
-
-                # Generate embedding
-                embedding_text = f"Job Title: {item.title}\nDescription: {description}"
-                embedding = embedding_service.get_embedding(embedding_text)
+            jobs = await self._fetch_jobs()
+            if not jobs:
+                return []
+
+            # Generate all embeddings in a few batched requests; unchanged descriptions come from the cache.
+            embedding_service = EmbeddingService(max_concurrency=self.max_concurrency)
+            embedding_texts = [f"Job Title: {job['title']}\nDescription: {job['description']}" for job in jobs]
+            embeddings = await embedding_service.get_embeddings(embedding_texts)
+            for job, embedding in zip(jobs, embeddings):
                 if embedding:
                     job["embedding"] = embedding
 
-                jobs.append(job)
-
             logging.info(f"Found and processed {len(jobs)} jobs from SwissDevJobs.ch.")
             return jobs
         except Exception as e:
             logging.error(f"Error scraping SwissDevJobs.ch: {e}", exc_info=True)
             return []
 
+    async def stream(self) -> AsyncIterator[Dict]:
+        """
+        Yields the feed's jobs without embeddings; the pipeline embeds them in batches.
+        """
+        logging.info("Scraping SwissDevJobs.ch RSS feed...")
+        for job in await self._fetch_jobs():
+            yield job
+
+    def _new_items(self, items: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Tuple[str, str, Any]]]:
+        """
+        Keeps the items that are new or changed since they were last stored.
+        Returns them with the (key, fingerprint, published) triples to mark them as seen.
+        """
+        keyed = [
+            (item["link"] or fingerprint(item["title"], item["creator"]),
+             fingerprint(item["title"], item["creator"], item["description"], item["link"]),
+             item["pubDate"], item)
+            for item in items
+        ]
+        unseen = self.watermark.unseen((key, item_fingerprint, published) for key, item_fingerprint, published, _ in keyed)
+        new = [entry for entry in keyed if entry[0] in unseen]
+        logging.info(f"{len(new)} of {len(items)} SwissDevJobs.ch items are new or changed.")
+        return [item for *_, item in new], [entry[:3] for entry in new]
+
+    def jobs_written(self, jobs: List[Dict]) -> None:
+        """
+        Records the items of a written chunk as seen.
+        """
+        if self.watermark is None:
+            return
+        self.watermark.mark_seen(self._unwritten.pop(job["hash"]) for job in jobs if job["hash"] in self._unwritten)
+        self.watermark.commit()
+
+    def feed_written(self) -> None:
+        """
+        Saves the validators of the fetched feed, so the next poll can skip it while it is unchanged.
+        """
+        self.validators.save(self._feed_validators)
+        self._feed_validators = None
+
+    async def run(self) -> int:
+        """
+        As `BaseScraper.run`; the feed only counts as ingested if no job failed.
+        """
+        num_jobs = await super().run()
+        if not self.stats["failed"]:
+            self.feed_written()
+        return num_jobs
+
 async def main():
     """
     Main function to run the scraper and upsert the data.
@@ -67,15 +200,7 @@ async def main():
     """
     logging.info("Starting SwissDevJobs scraper...")
     scraper = SwissDevJobsScraper()
-    jobs = await scraper.scrape()
-    num_jobs = len(jobs)
-
-    if jobs:
-        logging.info(f"Attempting to upsert {num_jobs} jobs to Supabase...")
-        supabase_client = SupabaseClient()
-        supabase_client.upsert_jobs(jobs)
-    else:
-        logging.info("No jobs found to upsert.")
+    num_jobs = await scraper.run()
 
     logging.info("SwissDevJobs scraper finished.")
     return num_jobs
@@ -39,7 +39,7 @@ class ZefixCompanyScraper:
             print(f"Found {len(companies)} companies.")
             for company in companies:
                 print(f"  - Name: {company.get('name')}, UID: {company.get('zefix_uid')}, Type: {company.get('legal_entity_type')}")
-                self.save_company(company)
+            self.save_companies(companies)
 
         except requests.exceptions.RequestException as e:
             print(f"Error querying SPARQL endpoint: {e}")
@@ -116,6 +116,21 @@ class ZefixCompanyScraper:
                 raw_data=raw_data
             )
 
+    def save_companies(self, companies: List[Dict[str, Any]]):
+        """
+        Bulk version of `save_company`: upserts all companies, then logs their raw data.
+        """
+        company_ids = self.db_client.upsert_companies(companies)
+        self.db_client.log_raw_company_scrapes([
+            {
+                'company_id': company_ids.get(company['zefix_uid']),
+                'source': 'zefix',
+                'source_id': company['zefix_uid'],
+                'raw_data': company.get('raw_data', {})
+            }
+            for company in companies
+        ])
+
 
 if __name__ == '__main__':
     scraper = ZefixCompanyScraper()
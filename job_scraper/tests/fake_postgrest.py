@@ -0,0 +1,133 @@
+"""
+An in-memory stand-in for the PostgREST API behind Supabase, served through an httpx.MockTransport.
+
+Supports the subset of PostgREST the async client uses: upserts with `on_conflict`,
+`select` with `eq`, `gt`, `in`, `is.null` and `not.is.null` filters, `order` and `limit`, PATCH updates and the
+bulk update functions. `fail_next` makes the next requests fail, to exercise retries.
+"""
+import asyncio
+import itertools
+import json
+import urllib.parse
+from typing import Any, Dict, List
+
+import httpx
+
+class FakePostgrest:
+    base_url = "https://fake.supabase.co"
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self.requests: List[httpx.Request] = []
+        self.fail_next: List[int] = []
+        self.selects = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._ids = itertools.count(1)
+        self.transport = httpx.MockTransport(self.handle)
+
+    def rows(self, table: str) -> List[Dict[str, Any]]:
+        return self.tables.setdefault(table, [])
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            if self.fail_next:
+                return httpx.Response(self.fail_next.pop(0), json={"message": "injected failure"})
+            if request.headers.get("apikey") is None:
+                return httpx.Response(401, json={"message": "No API key found in request"})
+            path = request.url.path.removeprefix("/rest/v1/")
+            body = json.loads(request.content) if request.content else None
+            if path.startswith("rpc/"):
+                return self._rpc(path.removeprefix("rpc/"), body)
+            params = urllib.parse.parse_qsl(request.url.query.decode())
+            if request.method == "POST":
+                return self._upsert(path, body, dict(params).get("on_conflict"), request.headers.get("Prefer", ""))
+            filters = [(key, value) for key, value in params if key not in ("select", "on_conflict", "order", "limit")]
+            if request.method == "GET":
+                self.selects += 1
+                return self._select(path, dict(params), filters)
+            if request.method == "PATCH":
+                return self._patch(path, body, filters)
+            return httpx.Response(405)
+        finally:
+            self.in_flight -= 1
+
+    def _upsert(self, table: str, body: Any, on_conflict: str, prefer: str) -> httpx.Response:
+        rows = body if isinstance(body, list) else [body]
+        columns = on_conflict.split(",") if on_conflict else []
+        keys = [tuple(row.get(column) for column in columns) for row in rows]
+        if columns and len(set(keys)) < len(keys):
+            return httpx.Response(500, json={"code": "21000", "message": "ON CONFLICT DO UPDATE command cannot affect row a second time"})
+        returned = []
+        for row, key in zip(rows, keys):
+            existing = next((r for r in self.rows(table) if columns and tuple(r.get(c) for c in columns) == key), None)
+            if existing is None:
+                existing = {"id": next(self._ids)}
+                self.rows(table).append(existing)
+            elif "ignore-duplicates" in prefer:
+                continue
+            existing.update(row)
+            returned.append(dict(existing))
+        if "return=minimal" in prefer:
+            return httpx.Response(201)
+        return httpx.Response(201, json=returned)
+
+    def _select(self, table: str, params: Dict[str, str], filters) -> httpx.Response:
+        columns = params.get("select", "*").split(",")
+        rows = [row for row in self.rows(table) if self._matches(row, filters)]
+        if "order" in params:
+            column, direction = params["order"].split(".")
+            rows.sort(key=lambda row: row[column], reverse=direction == "desc")
+        if "limit" in params:
+            rows = rows[:int(params["limit"])]
+        if columns == ["*"]:
+            return httpx.Response(200, json=rows)
+        return httpx.Response(200, json=[{column: row.get(column) for column in columns} for row in rows])
+
+    def _patch(self, table: str, values: Dict[str, Any], filters) -> httpx.Response:
+        for row in self.rows(table):
+            if self._matches(row, filters):
+                row.update(values)
+        return httpx.Response(204)
+
+    def _rpc(self, function: str, body: Dict[str, Any]) -> httpx.Response:
+        if function == "bulk_link_jobs_to_companies":
+            updates = {str(link["job_id"]): {"company_id": link["company_id"]} for link in body["links"]}
+            table = "jobs"
+        elif function == "bulk_update_company_tags":
+            updates = {str(update["company_id"]): {"tags": update["tags"]} for update in body["updates"]}
+            table = "companies"
+        else:
+            return httpx.Response(404, json={"message": f"function {function} not found"})
+        updated = 0
+        for row in self.rows(table):
+            if str(row["id"]) in updates:
+                row.update(updates[str(row["id"])])
+                updated += 1
+        return httpx.Response(200, json=updated)
+
+    @staticmethod
+    def _matches(row: Dict[str, Any], filters) -> bool:
+        for column, condition in filters:
+            value = row.get(column)
+            if condition == "is.null":
+                matched = value is None
+            elif condition == "not.is.null":
+                matched = value is not None
+            elif condition.startswith("eq."):
+                matched = str(value) == condition[3:]
+            elif condition.startswith("gt."):
+                matched = value is not None and value > type(value)(condition[3:])
+            elif condition.startswith("in."):
+                matched = str(value) in condition[4:-1].split(",")
+            else:
+                raise ValueError(f"Unsupported filter {column}={condition}")
+            if not matched:
+                return False
+        return True
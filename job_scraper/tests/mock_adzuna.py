@@ -0,0 +1,66 @@
+import asyncio
+import json
+import re
+from typing import Dict
+
+import httpx
+
+class MockAdzunaServer:
+    """
+    An in-process stand-in for Adzuna's search endpoint, served through
+    `httpx.MockTransport`, so crawls can be tested and benchmarked offline.
+
+    Every shard reports `total` matching jobs. Each response waits `latency`
+    seconds, and the first `throttle_first` requests are answered with a 429.
+    """
+    base_url = "https://mock.adzuna.test/v1/api/jobs/ch/search"
+
+    def __init__(self, total: int = 120, latency: float = 0.0, throttle_first: int = 0, retry_after: float = 0.0):
+        self.total = total
+        self.latency = latency
+        self.throttle_first = throttle_first
+        self.retry_after = retry_after
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.pages_served: Dict[tuple, int] = {}
+
+    @property
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            if self.requests <= self.throttle_first:
+                return httpx.Response(429, headers={"Retry-After": str(self.retry_after)}, request=request)
+
+            page = int(re.search(r'/search/(\d+)$', request.url.path).group(1))
+            limit = int(request.url.params.get("results_per_page", 20))
+            what = request.url.params.get("what", "")
+            where = request.url.params.get("where", "")
+            key = (what, where, page)
+            self.pages_served[key] = self.pages_served.get(key, 0) + 1
+
+            start = (page - 1) * limit
+            results = [self._result(what, where, i) for i in range(start, min(start + limit, self.total))]
+            body = {"count": self.total, "results": results}
+            return httpx.Response(200, content=json.dumps(body), headers={"Content-Type": "application/json"}, request=request)
+        finally:
+            self.in_flight -= 1
+
+    @staticmethod
+    def _result(what: str, where: str, i: int) -> Dict:
+        return {
+            "id": f"{what}-{where}-{i}",
+            "title": f"{what or 'Software'} Engineer {i}",
+            "company": {"display_name": f"Company {i % 7}"},
+            "location": {"display_name": where or "Zurich"},
+            "description": "Build services in Python and PostgreSQL.",
+            "created": "2024-01-01T00:00:00Z",
+            "redirect_url": f"https://mock.adzuna.test/jobs/{what}-{where}-{i}",
+        }
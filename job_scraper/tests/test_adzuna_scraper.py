@@ -0,0 +1,91 @@
+import asyncio
+import unittest
+import sys
+import os
+
+import httpx
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.scrapers.adzuna_scraper import AdzunaScraper
+from job_scraper.tests.mock_adzuna import MockAdzunaServer
+from job_scraper.utils.http import AdaptiveRateLimiter
+
+class FastAdzunaScraper(AdzunaScraper):
+    rate_limit = 1000.0
+    results_per_page = 25
+
+def make_scraper(server: MockAdzunaServer) -> AdzunaScraper:
+    client = httpx.AsyncClient(transport=server.transport)
+    return FastAdzunaScraper(app_id="id", api_key="key", client=client, base_url=server.base_url)
+
+async def collect(scraper: AdzunaScraper, **kwargs):
+    pages = []
+    async for jobs in scraper.crawl(**kwargs):
+        pages.append(jobs)
+    return pages
+
+class TestAdzunaScraper(unittest.TestCase):
+
+    def test_scrape_single_page(self):
+        server = MockAdzunaServer(total=120)
+        jobs, company_data = asyncio.run(make_scraper(server).scrape(limit=20))
+
+        self.assertEqual(len(jobs), 20)
+        self.assertEqual(jobs[0]["company_name"], "Company 0")
+        self.assertEqual(jobs[0]["source"], "Adzuna")
+        self.assertIn("python", company_data[0]["tech_stack"])
+
+    def test_crawl_follows_count_across_shards(self):
+        server = MockAdzunaServer(total=110, latency=0.01)
+        pages = asyncio.run(collect(make_scraper(server), searches=["python", "java"], locations=["Zurich"]))
+
+        jobs = [job for page_jobs in pages for job in page_jobs]
+        self.assertEqual(len(jobs), 220)
+        self.assertEqual(len({job["id"] for job in jobs}), 220)
+        # 110 jobs at 25 per page is 5 pages per shard, each requested once.
+        self.assertEqual(server.requests, 10)
+        self.assertTrue(all(count == 1 for count in server.pages_served.values()))
+        self.assertGreater(server.max_in_flight, 1)
+
+    def test_crawl_respects_max_pages(self):
+        server = MockAdzunaServer(total=1000)
+        pages = asyncio.run(collect(make_scraper(server), max_pages=3))
+        self.assertEqual(len(pages), 3)
+
+    def test_crawl_retries_after_throttling(self):
+        server = MockAdzunaServer(total=50, throttle_first=2)
+        scraper = make_scraper(server)
+        pages = asyncio.run(collect(scraper))
+
+        self.assertEqual(sum(len(jobs) for jobs in pages), 50)
+        self.assertEqual(scraper.limiter.throttled, 2)
+        self.assertLess(scraper.limiter.rate, scraper.limiter.max_rate)
+
+class TestAdaptiveRateLimiter(unittest.TestCase):
+
+    def test_throttle_halves_rate_and_success_recovers(self):
+        limiter = AdaptiveRateLimiter(10.0, min_rate=1.0, increase=0.1)
+        limiter.on_throttle(0)
+        self.assertEqual(limiter.rate, 5.0)
+        for _ in range(3):
+            limiter.on_throttle(0)
+        self.assertEqual(limiter.rate, 1.0)
+        for _ in range(20):
+            limiter.on_success()
+        self.assertEqual(limiter.rate, 10.0)
+
+    def test_acquire_paces_requests(self):
+        async def acquire_many(limiter, n):
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            for _ in range(n):
+                await limiter.acquire()
+            return loop.time() - start
+
+        elapsed = asyncio.run(acquire_many(AdaptiveRateLimiter(50.0), 6))
+        self.assertGreaterEqual(elapsed, 0.09)
+
+if __name__ == '__main__':
+    unittest.main()
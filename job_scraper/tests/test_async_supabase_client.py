@@ -0,0 +1,167 @@
+import asyncio
+import os
+import sys
+import unittest
+from unittest import mock
+
+import httpx
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.db.async_supabase_client import AsyncSupabaseClient
+from job_scraper.tests.fake_postgrest import FakePostgrest
+
+def make_client(server: FakePostgrest, **kwargs) -> AsyncSupabaseClient:
+    http = httpx.AsyncClient(transport=server.transport)
+    return AsyncSupabaseClient(url=server.base_url, key="service-key", client=http, backoff=0.001, **kwargs)
+
+class TestAsyncSupabaseClient(unittest.TestCase):
+
+    def test_upsert_jobs_dedupes_and_chunks(self):
+        server = FakePostgrest()
+        jobs = [{'hash': f'h{i % 120}', 'title': f'Job {i}'} for i in range(150)]
+        upserted = asyncio.run(make_client(server).upsert_jobs(jobs, chunk_size=50))
+
+        self.assertEqual(upserted, 120)
+        self.assertEqual(len(server.rows('jobs')), 120)
+        self.assertEqual(len(server.requests), 3)
+        # The last duplicate wins.
+        self.assertEqual(next(row for row in server.rows('jobs') if row['hash'] == 'h0')['title'], 'Job 120')
+
+    def test_upsert_companies_splits_on_conflict_column(self):
+        server = FakePostgrest()
+        companies = [{'name': f'Company {i}', 'description': 'x'} for i in range(5)]
+        companies += [{'name': 'Registered', 'zefix_uid': 'CHE-1'}]
+
+        async def upsert_twice():
+            client = make_client(server)
+            first = await client.upsert_companies(companies)
+            second = await client.upsert_companies(companies)
+            return first, second
+
+        first, second = asyncio.run(upsert_twice())
+        self.assertEqual(set(first), {f'Company {i}' for i in range(5)} | {'CHE-1'})
+        self.assertEqual(first, second)
+        self.assertEqual(len(server.rows('companies')), 6)
+
+    def test_upsert_candidates_with_skills(self):
+        server = FakePostgrest()
+        candidates = [({'source': 'GitHub', 'source_id': str(i), 'username': f'user{i}'}, {'python', 'go'}) for i in range(3)]
+        ids = asyncio.run(make_client(server).upsert_candidates_with_skills(candidates))
+
+        self.assertEqual(len(ids), 3)
+        self.assertEqual(len(server.rows('scraped_candidate_skills')), 6)
+
+        sourced = [({'source': 'GitHub', 'source_id': '9'}, {'python': 'bio_keyword', 'rust': 'repo_language'})]
+        asyncio.run(make_client(server).upsert_candidates_with_skills(sourced))
+        self.assertIn({'skill': 'rust', 'source_of_skill': 'repo_language'},
+                      [{key: row[key] for key in ('skill', 'source_of_skill')} for row in server.rows('scraped_candidate_skills')])
+
+    def test_reads_and_bulk_updates(self):
+        server = FakePostgrest()
+        server.rows('jobs').extend([{'id': 1, 'company_name': 'Acme', 'company_id': None, 'description': 'a'},
+                                    {'id': 2, 'company_name': 'Beta', 'company_id': 7, 'description': 'b'}])
+        server.rows('companies').extend([{'id': 7, 'name': 'Beta', 'description': 'We sponsor visas', 'tags': None},
+                                         {'id': 8, 'name': 'Acme', 'description': None, 'tags': None}])
+
+        async def exercise():
+            client = make_client(server)
+            unlinked = await client.get_jobs_without_company_link()
+            linked = await client.update_job_company_links({'1': '8'})
+            untagged = await client.get_companies_for_tagging()
+            tagged = await client.update_companies_tags({'7': ['python'], '8': []})
+            await client.update_companies_sponsorship([7, 8], True)
+            return unlinked, linked, untagged, tagged
+
+        unlinked, linked, untagged, tagged = asyncio.run(exercise())
+        self.assertEqual(unlinked, [{'id': 1, 'company_name': 'Acme'}])
+        self.assertEqual((linked, tagged), (1, 1))
+        self.assertEqual(untagged, [{'id': 7, 'description': 'We sponsor visas'}])
+        self.assertEqual(server.rows('jobs')[0]['company_id'], '8')
+        self.assertEqual(server.rows('companies')[0]['tags'], ['python'])
+        self.assertTrue(all(row['offers_visa_sponsorship'] for row in server.rows('companies')))
+
+    def test_iter_rows_streams_pages(self):
+        server = FakePostgrest()
+        server.rows('jobs').extend({'id': i, 'company_id': i % 3 or None, 'description': f'd{i}'} for i in range(1, 1001))
+
+        async def stream():
+            client = make_client(server)
+            return [job async for job in client.iter_jobs_with_company(columns='company_id', page_size=100)]
+
+        jobs = asyncio.run(stream())
+        self.assertEqual([job['id'] for job in jobs], [i for i in range(1, 1001) if i % 3])
+        self.assertEqual(set(jobs[0]), {'id', 'company_id'})
+        self.assertEqual(server.selects, 7)
+
+    def test_job_embeddings_are_read_in_pages(self):
+        server = FakePostgrest()
+        server.rows('jobs').extend({'id': i, 'embedding': None if i % 3 == 0 else '[0.1,0.2]'} for i in range(1, 101))
+
+        async def read():
+            client = make_client(server)
+            return [row async for row in client.iter_job_embeddings(page_size=20)], await client.get_job_embeddings()
+
+        streamed, fetched = asyncio.run(read())
+        self.assertEqual([row['id'] for row in streamed], [i for i in range(1, 101) if i % 3])
+        self.assertEqual(fetched, streamed)
+        self.assertEqual(server.selects, 5)
+
+    def test_shared_client_is_per_loop_and_closed_on_shutdown(self):
+        async def share():
+            client = AsyncSupabaseClient.shared()
+            self.assertIs(AsyncSupabaseClient.shared(), client)
+            await AsyncSupabaseClient.close_shared()
+            self.assertIsNot(AsyncSupabaseClient.shared(), client)
+            await AsyncSupabaseClient.close_shared()
+            return client
+
+        with mock.patch.dict(os.environ, {"SUPABASE_URL": "https://db.test", "SUPABASE_SERVICE_ROLE_KEY": "key"}):
+            first, second = asyncio.run(share()), asyncio.run(share())
+        self.assertIsNot(first, second)
+        self.assertTrue(first.client.is_closed and second.client.is_closed)
+
+    def test_retries_idempotent_requests(self):
+        server = FakePostgrest()
+        server.fail_next = [503, 429]
+        upserted = asyncio.run(make_client(server).upsert_jobs([{'hash': 'h', 'title': 'Job'}]))
+
+        self.assertEqual(upserted, 1)
+        self.assertEqual(len(server.requests), 3)
+
+    def test_does_not_retry_inserts(self):
+        server = FakePostgrest()
+        server.fail_next = [503]
+        entry = {'company_id': 'c', 'source': 'zefix', 'source_id': 'CHE-1', 'raw_data': {'a': 1}}
+        asyncio.run(make_client(server).log_raw_company_scrapes([entry]))
+
+        self.assertEqual(len(server.requests), 1)
+        self.assertEqual(server.rows('companies_scraped_raw_data'), [])
+
+    def test_bounds_concurrent_requests(self):
+        server = FakePostgrest(latency=0.01)
+        jobs = [{'hash': f'h{i}'} for i in range(100)]
+
+        async def upsert_from_many_tasks():
+            client = make_client(server, max_concurrency=3)
+            await asyncio.gather(*(client.upsert_jobs(jobs[i:i + 10], chunk_size=5) for i in range(0, 100, 10)))
+
+        asyncio.run(upsert_from_many_tasks())
+        self.assertEqual(len(server.rows('jobs')), 100)
+        self.assertEqual(server.max_in_flight, 3)
+
+    def test_shared_client_is_per_event_loop(self):
+        os.environ.setdefault("SUPABASE_URL", FakePostgrest.base_url)
+        os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "service-key")
+
+        async def shared_twice():
+            return AsyncSupabaseClient.shared(), AsyncSupabaseClient.shared()
+
+        first, second = asyncio.run(shared_twice())
+        third, _ = asyncio.run(shared_twice())
+        self.assertIs(first, second)
+        self.assertIsNot(first, third)
+
+if __name__ == '__main__':
+    unittest.main()
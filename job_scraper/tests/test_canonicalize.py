@@ -5,7 +5,7 @@ import os
 # Add the parent directory to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
-from job_scraper.dedupe.canonicalize import are_titles_similar
+from job_scraper.dedupe.canonicalize import are_titles_similar, canonicalize_url, dedupe_and_merge
 
 class TestCanonicalize(unittest.TestCase):
 
@@ -17,5 +17,70 @@ class TestCanonicalize(unittest.TestCase):
         self.assertFalse(are_titles_similar("Software Engineer", "Project Manager"))
         self.assertFalse(are_titles_similar("Software Engineer", "Data Scientist"))
 
+    def test_canonicalize_url(self):
+        self.assertEqual(
+            canonicalize_url("HTTPS://www.Example.com/jobs/42/?utm_source=x&b=2&a=1#apply"),
+            "https://example.com/jobs/42?a=1&b=2"
+        )
+        self.assertEqual(canonicalize_url("example.com/jobs/42"), "https://example.com/jobs/42")
+        self.assertEqual(canonicalize_url(None), "")
+
+    def test_dedupe_merges_similar_titles_within_a_block(self):
+        existing = [{"id": 1, "title": "Senior Software Engineer", "company_name": "Acme AG", "canton": "ZH", "salary": None}]
+        new = [
+            {"title": "Sr. Software Engineer", "company_name": "ACME AG", "canton": "ZH", "salary": "120k"},
+            {"title": "Software Engineer", "company_name": "Acme AG", "canton": "BE"},
+            {"title": "Project Manager", "company_name": "Acme AG", "canton": "ZH"},
+        ]
+        merged = dedupe_and_merge(new, existing)
+
+        self.assertEqual(len(merged), 3)
+        canonical = next(job for job in merged if job.get("id") == 1)
+        self.assertEqual(canonical["title"], "Senior Software Engineer")
+        self.assertEqual(canonical["salary"], "120k")
+
+    def test_dedupe_short_circuits_on_hash_and_url(self):
+        new = [
+            {"title": "Data Engineer", "company_name": "Foo", "hash": "h1"},
+            {"title": "Data Engineer (m/w/d)", "company_name": "Foo GmbH", "hash": "h1", "description": "Pipelines"},
+            {"title": "Backend Developer", "company_name": "Bar", "url": "https://bar.ch/jobs/7?utm_medium=feed"},
+            {"title": "Backend Dev", "company_name": "Bar Holding", "url": "https://www.bar.ch/jobs/7"},
+        ]
+        merged = dedupe_and_merge(new, [])
+
+        self.assertEqual(len(merged), 2)
+        data_engineer = next(job for job in merged if job["hash"] == "h1")
+        self.assertEqual(data_engineer["description"], "Pipelines")
+
+    def test_dedupe_skips_clusters_without_new_jobs(self):
+        existing = [{"id": 1, "title": "Designer", "company_name": "Foo"}]
+        self.assertEqual(dedupe_and_merge([], existing), [])
+
+    def test_dedupe_does_not_merge_company_less_jobs_by_title(self):
+        new = [
+            {"title": "Software Engineer", "canton": "ZH", "url": "https://a.ch/jobs/1", "hash": "a1"},
+            {"title": "Software Engineer", "canton": "ZH", "url": "https://b.ch/jobs/2", "hash": "b2"},
+            {"title": "Software Engineer", "url": "https://c.ch/jobs/3", "hash": "c3"},
+            {"title": "Software Engineer", "url": "https://c.ch/jobs/3/", "hash": "c4"},
+        ]
+        merged = dedupe_and_merge(new, [])
+        self.assertEqual(sorted(job["hash"] for job in merged), ["a1", "b2", "c3"])
+
+    def test_dedupe_does_not_chain_title_matches(self):
+        # Each neighbour is similar, but "Software Engineer" and "Backend Engineer" are not.
+        titles = ["Software Engineer", "Senior Software Engineer Backend", "Backend Engineer"]
+        self.assertTrue(are_titles_similar(titles[0], titles[1]) and are_titles_similar(titles[1], titles[2]))
+        self.assertFalse(are_titles_similar(titles[0], titles[2]))
+
+        merged = dedupe_and_merge([{"title": title, "company_name": "Acme AG", "canton": "ZH"} for title in titles], [])
+        self.assertEqual(len(merged), 2)
+
+    def test_dedupe_large_block(self):
+        titles = [f"Engineer Team {i}" for i in range(100)]
+        new = [{"title": title, "company_name": "Big Corp"} for title in titles]
+        new.append({"title": "Engineer - Team 42", "company_name": "Big Corp"})
+        merged = dedupe_and_merge(new, [])
+        self.assertEqual(len(merged), 100)
+
 if __name__ == '__main__':
     unittest.main()
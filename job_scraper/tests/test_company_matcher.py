@@ -0,0 +1,51 @@
+import os
+import sys
+import unittest
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.utils.company_matcher import CompanyMatcher, blocking_tokens
+
+COMPANIES = [
+    {'id': 1, 'name': 'Google Switzerland GmbH'},
+    {'id': 2, 'name': 'UBS AG'},
+    {'id': 3, 'name': 'Crédit Suisse'},
+    {'id': 4, 'name': 'Roche Diagnostics AG'},
+    {'id': 5, 'name': 'Google Switzerland GmbH'},
+]
+
+class TestCompanyMatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.matcher = CompanyMatcher(COMPANIES)
+
+    def test_matches(self):
+        self.assertEqual(self.matcher.match('google switzerland gmbh'), (1, 'Google Switzerland GmbH', 100))
+        self.assertEqual(self.matcher.match('Google')[0], 1)
+        self.assertEqual(self.matcher.match('Credit Suisse AG')[0], 3)
+        # A typo in the only informative token is caught through trigrams.
+        self.assertEqual(self.matcher.match('Roche Diagnostic')[0], 4)
+        self.assertEqual(self.matcher.match('Gogle Switzerland')[0], 1)
+
+    def test_no_match(self):
+        self.assertIsNone(self.matcher.match('Migros'))
+        self.assertIsNone(self.matcher.match('AG'))
+        self.assertIsNone(self.matcher.match(''))
+        self.assertIsNone(self.matcher.match(None))
+
+    def test_names_whose_keys_are_all_common_still_get_candidates(self):
+        companies = [{'id': i, 'name': f'Swiss {suffix} AG'} for i, suffix in enumerate(['', 'Re', 'Life', 'Post', 'Prime'])]
+        matcher = CompanyMatcher(companies, max_postings=2)
+        # Every key of "swis" is shared by all five companies, over the cap of 2.
+        self.assertGreater(len(matcher.candidates('swis')), 0)
+        self.assertEqual(matcher.match('Swis AG')[0], 0)
+
+    def test_duplicate_names_are_indexed_once(self):
+        self.assertEqual(len(self.matcher), 4)
+
+    def test_blocking_ignores_legal_forms(self):
+        self.assertEqual(blocking_tokens('roche diagnostics ag'), {'roche', 'diagnostics'})
+
+if __name__ == '__main__':
+    unittest.main()
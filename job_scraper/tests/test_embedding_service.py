@@ -0,0 +1,104 @@
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.analysis import embedding_service
+from job_scraper.analysis.embedding_service import EmbeddingService, FakeEmbeddingBackend
+
+class BadRequestError(Exception):
+    status_code = 400
+
+class RejectingBackend(FakeEmbeddingBackend):
+    """
+    Rejects any request with an input over the API's token limit, like the embeddings API.
+    """
+    def embed(self, texts):
+        if any(len(text) > 100 for text in texts):
+            self.calls += 1
+            raise BadRequestError("maximum context length exceeded")
+        return super().embed(texts)
+
+class TestEmbeddingService(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache_file = os.path.join(self.tmpdir.name, "embeddings.sqlite3")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_batches_and_aligns_results(self):
+        backend = FakeEmbeddingBackend(dimensions=16)
+        service = EmbeddingService(backend=backend, cache_file=self.cache_file)
+        texts = ["python developer", "", "react engineer", "python developer", None]
+
+        embeddings = asyncio.run(service.get_embeddings(texts))
+
+        self.assertEqual(len(embeddings), 5)
+        self.assertIsNone(embeddings[1])
+        self.assertIsNone(embeddings[4])
+        self.assertEqual(embeddings[0], embeddings[3])
+        self.assertEqual(len(embeddings[2]), 16)
+        # One request for the two distinct texts.
+        self.assertEqual(backend.calls, 1)
+        self.assertEqual(backend.inputs_embedded, 2)
+
+    def test_respects_request_limits(self):
+        backend = FakeEmbeddingBackend(dimensions=8)
+        service = EmbeddingService(backend=backend, use_cache=False, max_concurrency=2)
+        texts = [f"job description number {i}" for i in range(25)]
+
+        with mock.patch.object(embedding_service, "MAX_INPUTS_PER_REQUEST", 10):
+            embeddings = asyncio.run(service.get_embeddings(texts))
+
+        self.assertTrue(all(embeddings))
+        self.assertEqual(backend.calls, 3)
+
+    def test_cache_survives_restarts(self):
+        first_backend = FakeEmbeddingBackend(dimensions=16)
+        first = EmbeddingService(backend=first_backend, cache_file=self.cache_file)
+        expected = asyncio.run(first.get_embeddings(["unchanged description", "another one"]))
+
+        second_backend = FakeEmbeddingBackend(dimensions=16)
+        second = EmbeddingService(backend=second_backend, cache_file=self.cache_file)
+        embeddings = asyncio.run(second.get_embeddings(["another one", "unchanged description", "brand new"]))
+
+        self.assertEqual(second_backend.inputs_embedded, 1)
+        for got, want in zip(embeddings[:2], [expected[1], expected[0]]):
+            for a, b in zip(got, want):
+                self.assertAlmostEqual(a, b, places=6)
+        # The single-text API shares the same cache.
+        self.assertIsNotNone(second.get_embedding("brand new"))
+        self.assertEqual(second_backend.calls, 1)
+
+    def test_rejected_batches_are_split_until_only_the_offending_input_fails(self):
+        backend = RejectingBackend(dimensions=8)
+        service = EmbeddingService(backend=backend, use_cache=False)
+        texts = [f"job description number {i}" for i in range(16)]
+        texts[5] = "x" * 200
+
+        embeddings = asyncio.run(service.get_embeddings(texts))
+
+        self.assertIsNone(embeddings[5])
+        self.assertTrue(all(embedding for i, embedding in enumerate(embeddings) if i != 5))
+        # Halving a batch of 16 isolates the input in four levels: 5 rejected requests and 4 accepted.
+        self.assertEqual(backend.calls, 9)
+
+    def test_other_errors_are_not_retried(self):
+        backend = FakeEmbeddingBackend(dimensions=8)
+        backend.embed = mock.Mock(side_effect=RuntimeError("service unavailable"))
+        service = EmbeddingService(backend=backend, use_cache=False)
+
+        embeddings = asyncio.run(service.get_embeddings(["python developer", "react engineer"]))
+
+        self.assertEqual(embeddings, [None, None])
+        self.assertEqual(backend.embed.call_count, 1)
+
+if __name__ == '__main__':
+    unittest.main()
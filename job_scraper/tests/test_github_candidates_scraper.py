@@ -0,0 +1,202 @@
+import asyncio
+import json
+import re
+import time
+import unittest
+import sys
+import os
+import tempfile
+from datetime import date, timedelta
+
+import httpx
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.scrapers.github_candidates_scraper import GitHubCandidatesScraper
+from job_scraper.utils.http import QuotaRateLimiter, ValidatorCache
+
+class FakeGitHub:
+    """
+    Serves user search (capped at 1,000 results like GitHub) and user profiles,
+    over REST and over GraphQL.
+    """
+    def __init__(self, num_users: int):
+        start = date(2010, 1, 1)
+        self.users = [(f"user{i}", start + timedelta(days=i)) for i in range(num_users)]
+        self.search_requests = 0
+        self.profile_requests = 0
+        self.graphql_requests = 0
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        headers = {"X-RateLimit-Remaining": "4000", "X-RateLimit-Reset": str(int(time.time()) + 3600)}
+        if request.url.path == "/search/users":
+            self.search_requests += 1
+            query = request.url.params["q"]
+            users = self.users
+            created = re.search(r'created:(\S+)\.\.(\S+)', query)
+            if created:
+                start, end = date.fromisoformat(created.group(1)), date.fromisoformat(created.group(2))
+                users = [user for user in users if start <= user[1] <= end]
+            page, per_page = int(request.url.params["page"]), int(request.url.params["per_page"])
+            if page * per_page > 1000:
+                return httpx.Response(422, headers=headers)
+            items = [{"login": login} for login, _ in users[(page - 1) * per_page:page * per_page]]
+            return httpx.Response(200, json={"total_count": len(users), "items": items}, headers=headers)
+
+        if request.url.path == "/graphql":
+            self.graphql_requests += 1
+            body = json.loads(request.content)
+            data = {"rateLimit": {"cost": 1, "remaining": 4999}}
+            for name, login in body["variables"].items():
+                alias = f"user{name[len('login'):]}"
+                if login == "ghost":
+                    data[alias] = None
+                    continue
+                repositories = [{"primaryLanguage": {"name": language}} for language in ("Rust", "Go", "Rust")]
+                data[alias] = {"databaseId": int(login[4:]), "login": login, "bio": "Python and Kubernetes",
+                               "location": "Zurich", "email": "", "followers": {"totalCount": 51},
+                               "repositories": {"nodes": repositories + [{"primaryLanguage": None}]}}
+            return httpx.Response(200, json={"data": data}, headers=headers)
+
+        self.profile_requests += 1
+        login = request.url.path.rsplit('/', 1)[-1]
+        etag = f'"{login}"'
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304, headers=headers)
+        profile = {"id": int(login[4:]), "login": login, "bio": "Python and Kubernetes", "location": "Zurich"}
+        return httpx.Response(200, json=profile, headers={**headers, "ETag": etag})
+
+class FakeDB:
+    def __init__(self, fail_batches: int = 0):
+        self.batches = []
+        self.fail_batches = fail_batches
+
+    async def upsert_candidates_with_skills(self, candidates):
+        self.batches.append(list(candidates))
+        if self.fail_batches:
+            self.fail_batches -= 1
+            return {}
+        return {(candidate["source"], candidate["source_id"]): i for i, (candidate, _) in enumerate(candidates)}
+
+class TestGitHubCandidatesScraper(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.validators = ValidatorCache(os.path.join(self.tmpdir.name, "validators.sqlite3"))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def make_scraper(self, github: FakeGitHub, use_graphql: bool = False, fail_batches: int = 0) -> GitHubCandidatesScraper:
+        client = httpx.AsyncClient(transport=httpx.MockTransport(github.handle))
+        self.db = FakeDB(fail_batches)
+        scraper = GitHubCandidatesScraper("token", db_client=self.db, client=client, base_url="https://api.github.test",
+                                          validators=self.validators, use_graphql=use_graphql)
+        scraper.batch_size = 1000
+        return scraper
+
+    def test_splits_queries_past_the_search_cap(self):
+        github = FakeGitHub(2500)
+        num_profiles = asyncio.run(self.make_scraper(github).run("location:switzerland"))
+
+        self.assertEqual(num_profiles, 2500)
+        self.assertEqual(github.profile_requests, 2500)
+        self.assertEqual([len(batch) for batch in self.db.batches], [1000, 1000, 500])
+        candidate, skills = self.db.batches[0][0]
+        self.assertEqual(candidate["source"], "github")
+        self.assertIn("python", skills)
+
+    def test_small_query_is_not_split(self):
+        github = FakeGitHub(250)
+        num_profiles = asyncio.run(self.make_scraper(github).run(max_pages=2))
+
+        self.assertEqual(num_profiles, 200)
+        self.assertEqual(github.search_requests, 2)
+
+    def test_max_pages_stops_the_search_early(self):
+        github = FakeGitHub(2500)
+        self.assertEqual(asyncio.run(self.make_scraper(github).run("location:switzerland", max_pages=2)), 200)
+        self.assertEqual(github.search_requests, 2)
+
+        full = FakeGitHub(2500)
+        asyncio.run(self.make_scraper(full, use_graphql=True).run("location:switzerland"))
+        partial = FakeGitHub(2500)
+        # Twelve pages of date-range parts, which are not all full.
+        num_profiles = asyncio.run(self.make_scraper(partial, use_graphql=True).run("location:switzerland", max_pages=12))
+        self.assertTrue(1000 < num_profiles <= 1200)
+        self.assertLess(partial.search_requests, full.search_requests)
+
+    def test_unchanged_profiles_are_skipped(self):
+        github = FakeGitHub(150)
+        self.assertEqual(asyncio.run(self.make_scraper(github).run()), 150)
+
+        scraper = self.make_scraper(github)
+        self.assertEqual(asyncio.run(scraper.run()), 0)
+        self.assertEqual(scraper.unchanged_profiles, 150)
+        self.assertEqual(self.db.batches, [])
+
+    def test_profiles_whose_write_failed_are_fetched_again(self):
+        github = FakeGitHub(150)
+        self.assertEqual(asyncio.run(self.make_scraper(github, fail_batches=1).run()), 150)
+
+        scraper = self.make_scraper(github)
+        self.assertEqual(asyncio.run(scraper.run()), 150)
+        self.assertEqual(scraper.unchanged_profiles, 0)
+
+    def test_graphql_fetches_profiles_in_batches_with_repo_languages(self):
+        github = FakeGitHub(250)
+        scraper = self.make_scraper(github, use_graphql=True)
+        num_profiles = asyncio.run(scraper.run())
+
+        self.assertEqual(num_profiles, 250)
+        self.assertEqual(github.graphql_requests, 3)
+        self.assertEqual(github.profile_requests, 0)
+        self.assertEqual(scraper.graphql_points, 3)
+        candidate, skills = self.db.batches[0][0]
+        self.assertEqual(candidate["source"], "github")
+        self.assertEqual(candidate["followers_count"], 51)
+        self.assertIsNone(candidate["email"])
+        self.assertEqual(candidate["raw_data"]["repo_languages"], ["Rust", "Go"])
+        self.assertEqual(skills, {"python": "bio_keyword", "kubernetes": "bio_keyword", "rust": "repo_language", "go": "repo_language"})
+
+    def test_graphql_skips_missing_users(self):
+        github = FakeGitHub(0)
+        scraper = self.make_scraper(github, use_graphql=True)
+        profiles = asyncio.run(self._scrape_profiles(scraper, ["user1", "ghost", "user2"]))
+        self.assertEqual([candidate["username"] for candidate, _ in profiles], ["user1", "user2"])
+
+    async def _scrape_profiles(self, scraper, usernames):
+        async with scraper._session():
+            return await scraper.scrape_profiles(usernames)
+
+class TestQuotaRateLimiter(unittest.TestCase):
+
+    def test_waits_for_reset_when_quota_is_exhausted(self):
+        limiter = QuotaRateLimiter()
+        exhausted = httpx.Response(403, headers={"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(time.time() + 0.2)})
+        self.assertTrue(limiter.update(exhausted))
+
+        async def acquire():
+            start = time.perf_counter()
+            await limiter.acquire()
+            return time.perf_counter() - start
+
+        self.assertGreaterEqual(asyncio.run(acquire()), 0.2)
+
+    def test_paces_when_quota_is_low(self):
+        limiter = QuotaRateLimiter(pace_below=100)
+        limiter.update(httpx.Response(200, headers={"X-RateLimit-Remaining": "10", "X-RateLimit-Reset": str(time.time() + 1)}))
+
+        async def acquire_many(n):
+            start = time.perf_counter()
+            for _ in range(n):
+                await limiter.acquire()
+            return time.perf_counter() - start
+
+        # Ten requests left for one second: about 0.1s apart.
+        self.assertGreaterEqual(asyncio.run(acquire_many(4)), 0.25)
+        self.assertEqual(limiter.remaining, 6)
+
+if __name__ == '__main__':
+    unittest.main()
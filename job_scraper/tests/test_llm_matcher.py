@@ -0,0 +1,108 @@
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.analysis.embedding_service import EmbeddingService, FakeEmbeddingBackend
+from job_scraper.analysis.llm_matcher import FakeMatchBackend, LLMMatcher
+
+CANDIDATES = [
+    "Python developer with machine learning and data pipelines experience",
+    "Graphic designer focused on branding and typography",
+]
+JOBS = [
+    "Backend engineer for payment APIs in Go",
+    "Python developer for machine learning pipelines",
+    "Brand designer for typography and packaging",
+    "Data engineer building Python data pipelines",
+]
+
+class FailingBackend:
+    model = "failing"
+
+    async def score(self, candidate_text, job_text):
+        raise RuntimeError("service unavailable")
+
+class TestLLMMatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache_file = os.path.join(self.tmpdir.name, "llm_matches.sqlite3")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def make_matcher(self, backend, **kwargs) -> LLMMatcher:
+        embeddings = EmbeddingService(backend=FakeEmbeddingBackend(dimensions=256), use_cache=False)
+        return LLMMatcher(backend=backend, cache_file=self.cache_file, prefilter="embedding",
+                          embedding_service=embeddings, **kwargs)
+
+    def test_only_shortlisted_pairs_reach_the_llm(self):
+        backend = FakeMatchBackend()
+        matches = asyncio.run(self.make_matcher(backend, top_k=2).match(CANDIDATES, JOBS))
+
+        # Jobs with no similarity to the designer are not worth an LLM call.
+        self.assertEqual(backend.calls, 3)
+        self.assertEqual([match["job_index"] for match in matches[0]], [1, 3])
+        self.assertGreaterEqual(matches[0][0]["score"], matches[0][1]["score"])
+        self.assertEqual([match["job_index"] for match in matches[1]], [2])
+
+    def test_calls_are_bounded_and_results_cached_across_restarts(self):
+        backend = FakeMatchBackend(latency=0.01)
+        pairs = [(f"candidate {i} python", f"job {j} python") for i in range(10) for j in range(5)]
+        first = asyncio.run(self.make_matcher(backend, max_concurrency=3).score_pairs(pairs))
+        self.assertEqual(backend.calls, 50)
+        self.assertEqual(backend.max_in_flight, 3)
+
+        restarted = FakeMatchBackend()
+        matcher = self.make_matcher(restarted)
+        self.assertEqual(asyncio.run(matcher.score_pairs(pairs + [("new candidate", "job 0 python")]))[:50], first)
+        self.assertEqual(restarted.calls, 1)
+        self.assertEqual(matcher.cache_hits, 50)
+
+    def test_prompt_or_model_change_invalidates_the_cache(self):
+        pairs = [("python developer", "python job")]
+        asyncio.run(self.make_matcher(FakeMatchBackend()).score_pairs(pairs))
+
+        other_model = FakeMatchBackend()
+        other_model.model = "fake-llm-v2"
+        asyncio.run(self.make_matcher(other_model).score_pairs(pairs))
+        self.assertEqual(other_model.calls, 1)
+
+    def test_failed_calls_fall_back_to_the_prefilter_and_are_not_cached(self):
+        matches = asyncio.run(self.make_matcher(FailingBackend(), top_k=1).match(CANDIDATES[:1], JOBS))
+        match = matches[0][0]
+        self.assertEqual(match["score"], int(match["similarity"] * 100))
+        self.assertIn("AI analysis failed", match["explanation"])
+
+        backend = FakeMatchBackend()
+        asyncio.run(self.make_matcher(backend, top_k=1).match(CANDIDATES[:1], JOBS))
+        self.assertEqual(backend.calls, 1)
+
+class TestGPT4MatchScore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.env = mock.patch.dict(os.environ, {"MATCH_LLM_BACKEND": "fake", "JOB_SCRAPER_CACHE_DIR": self.tmpdir.name})
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmpdir.cleanup()
+
+    def test_works_with_and_without_a_running_loop(self):
+        from job_scraper.analysis.matching_service import get_gpt4_match_score
+
+        async def from_a_coroutine():
+            return get_gpt4_match_score("python developer", "python job")
+
+        self.assertEqual(get_gpt4_match_score("python developer", "python job")["score"], 50)
+        self.assertEqual(asyncio.run(from_a_coroutine())["score"], 50)
+
+if __name__ == '__main__':
+    unittest.main()
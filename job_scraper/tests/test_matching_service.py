@@ -1,3 +1,4 @@
+import subprocess
 import unittest
 import sys
 import os
@@ -5,7 +6,7 @@ import os
 # Add the parent directory to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
-from job_scraper.analysis.matching_service import calculate_match_score
+from job_scraper.analysis.matching_service import calculate_match_score, calculate_match_matrix
 
 class TestMatchingService(unittest.TestCase):
 
@@ -30,5 +31,38 @@ class TestMatchingService(unittest.TestCase):
         score_4 = calculate_match_score("Some text", "")
         self.assertEqual(score_4, 0)
 
+    def test_calculate_match_matrix(self):
+        candidates = [
+            "Experienced Python developer with a background in machine learning.",
+            "A creative graphic designer focused on branding and UI/UX.",
+            "",
+        ]
+        jobs = [
+            "Seeking a backend engineer for database management and API development.",
+            "We are looking for a Python developer with machine learning experience.",
+            "Brand designer wanted for our creative studio.",
+        ]
+        matrix = calculate_match_matrix(candidates, jobs, block_size=2)
+        self.assertEqual(matrix.shape, (3, 3))
+        scores = matrix.toarray()
+        self.assertEqual(scores[0].argmax(), 1)
+        self.assertEqual(scores[1].argmax(), 2)
+        self.assertEqual(scores[2].sum(), 0)
+
+        top_1 = calculate_match_matrix(candidates, jobs, top_k=1)
+        self.assertEqual(top_1.getrow(0).nnz, 1)
+        self.assertAlmostEqual(top_1[0, 1], scores[0, 1])
+
+class TestColdStart(unittest.TestCase):
+
+    def test_import_does_not_load_nlp_libraries(self):
+        # Each call of the matching CLI pays the import cost, so the heavy libraries must load on first use.
+        check = ("import sys, job_scraper.analysis.matching_service; "
+                 "print(','.join(m for m in ('nltk', 'sklearn', 'scipy', 'openai') if m in sys.modules))")
+        result = subprocess.run([sys.executable, "-c", check], capture_output=True, text=True, check=True,
+                                cwd=os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+        self.assertEqual(result.stdout.strip(), "")
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,91 @@
+import os
+import sys
+import tempfile
+import unittest
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.dedupe.minhash import LSHIndex, MinHasher, NearDuplicateDetector, estimate_similarity, shingles
+from job_scraper.utils.cache import DEFAULT_CACHE_DIR
+
+DESCRIPTION = (
+    "We are looking for a backend engineer to design and operate our payment platform. "
+    "You will build services in Python and Go, run them on Kubernetes and work closely "
+    "with product managers in our Zurich office. Experience with PostgreSQL is a plus."
+)
+REWORDED = (
+    "We are looking for a backend engineer to design and operate our payment platform. "
+    "You will build services in Python and Go, run them on Kubernetes and work closely "
+    "with product owners in our Zurich office. Experience with PostgreSQL is an advantage."
+)
+UNRELATED = (
+    "Our bakery in Bern is hiring a pastry chef for early morning shifts. "
+    "You bake bread, croissants and cakes and help train our apprentices."
+)
+
+class TestMinHash(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "lsh.sqlite3")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_shingles(self):
+        self.assertEqual(shingles("Senior Python Developer", size=2), {"senior python", "python developer"})
+        self.assertEqual(shingles("Go", size=3), {"go"})
+        self.assertEqual(shingles("", size=3), set())
+
+    def test_signature_estimates_similarity(self):
+        hasher = MinHasher()
+        original = hasher.signature(DESCRIPTION)
+        self.assertEqual(estimate_similarity(original, hasher.signature(DESCRIPTION)), 1.0)
+        self.assertGreater(estimate_similarity(original, hasher.signature(REWORDED)), 0.5)
+        self.assertLess(estimate_similarity(original, hasher.signature(UNRELATED)), 0.1)
+
+    def cache_dir_state(self):
+        if not os.path.isdir(DEFAULT_CACHE_DIR):
+            return {}
+        return {name: os.stat(os.path.join(DEFAULT_CACHE_DIR, name)).st_mtime_ns for name in os.listdir(DEFAULT_CACHE_DIR)}
+
+    def test_index_finds_near_duplicates_and_persists(self):
+        before = self.cache_dir_state()
+        index = LSHIndex(self.path)
+        detector = NearDuplicateDetector(index)
+        self.assertIs(detector.index, index)
+        detector.add_jobs([
+            {"id": "a", "title": "Backend Engineer", "description": DESCRIPTION},
+            {"id": "b", "title": "Pastry Chef", "description": UNRELATED},
+        ])
+        detector.index.close()
+
+        reopened = NearDuplicateDetector(LSHIndex(self.path))
+        self.assertEqual(len(reopened.index), 2)
+        duplicates = reopened.find_duplicates({"title": "Backend Engineer (m/f/d)", "description": REWORDED})
+        self.assertEqual([job_id for job_id, _ in duplicates], ["a"])
+        self.assertEqual(reopened.find_duplicates({"id": "a", "title": "Backend Engineer", "description": DESCRIPTION}), [])
+        reopened.index.close()
+        self.assertEqual(self.cache_dir_state(), before)
+
+    def test_jobs_without_text_are_not_indexed_or_matched(self):
+        detector = NearDuplicateDetector(LSHIndex(self.path))
+        detector.add_jobs([{"id": "a", "title": "", "description": None}, {"id": "b", "title": "Pastry Chef", "description": UNRELATED}])
+        self.assertEqual(len(detector.index), 1)
+        self.assertEqual(detector.find_duplicates({"title": None, "description": " "}), [])
+
+    def test_replace_and_remove(self):
+        index = LSHIndex(self.path)
+        hasher = MinHasher()
+        index.add("a", hasher.signature(DESCRIPTION))
+        index.add("a", hasher.signature(UNRELATED))
+        self.assertEqual(len(index), 1)
+        self.assertEqual(index.query(hasher.signature(DESCRIPTION)), [])
+
+        index.remove(["a", "unknown"])
+        self.assertNotIn("a", index)
+        self.assertEqual(index.query(hasher.signature(UNRELATED)), [])
+
+if __name__ == '__main__':
+    unittest.main()
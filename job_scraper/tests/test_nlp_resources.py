@@ -0,0 +1,73 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.analysis import nlp_resources
+from job_scraper.analysis.nlp_resources import LemmaCache
+
+class FakeLemmatizer:
+    """
+    Strips a plural 's' and counts its calls, standing in for WordNet (which needs downloaded data).
+    """
+    def __init__(self):
+        self.calls = 0
+
+    def lemmatize(self, token):
+        self.calls += 1
+        return token[:-1] if token.endswith('s') else token
+
+class TestLemmaCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.lemmatizer = FakeLemmatizer()
+        patches = [mock.patch.object(nlp_resources, 'get_lemmatizer', return_value=self.lemmatizer),
+                   mock.patch.object(nlp_resources, 'get_tokenizer', return_value=str.split)]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_documents_and_tokens_are_lemmatized_once(self):
+        cache = LemmaCache()
+        job = "engineers building pipelines"
+        for _ in range(10):
+            self.assertEqual(cache.lemmatize(job), "engineer building pipeline")
+        self.assertEqual(cache.lemmatize("pipelines for engineers"), "pipeline for engineer")
+
+        self.assertEqual(self.lemmatizer.calls, 4)
+        stats = cache.stats()
+        self.assertEqual((stats['document_hits'], stats['document_misses']), (9, 2))
+        self.assertAlmostEqual(stats['document_hit_ratio'], 9 / 11)
+        self.assertEqual((stats['token_hits'], stats['token_misses']), (2, 4))
+
+    def test_least_recently_used_documents_are_evicted(self):
+        cache = LemmaCache(max_documents=2)
+        for text in ("a", "b", "a", "c", "a", "b"):
+            cache.lemmatize(text)
+        # "b" was evicted by "c"; "a" stayed because it was used again.
+        self.assertEqual(cache.stats()['document_misses'], 4)
+
+    def test_disk_store_survives_restarts(self):
+        path = os.path.join(self.tmpdir.name, "lemmas.sqlite3")
+        first = LemmaCache(path=path, flush_every=2)
+        first.lemmatize("cats and dogs")
+        first.lemmatize("birds")
+        first.lemmatize("fishes")
+        first.flush()
+
+        restarted = LemmaCache(path=path)
+        self.assertEqual(restarted.lemmatize("cats and dogs"), "cat and dog")
+        self.assertEqual(restarted.lemmatize("fishes"), "fishe")
+        self.assertEqual(restarted.stats()['document_disk_hits'], 2)
+        self.assertEqual(restarted.stats()['document_misses'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.utils import batching
+from job_scraper.analysis.nlp_tagger import NLPTagger, default_tag_dictionaries, dictionary_version
+from job_scraper.db.supabase_client import input_hash
+
+class FakeDB:
+    def __init__(self, companies):
+        self.companies = companies
+        self.updates = {}
+
+    def iter_companies_for_tagging(self):
+        return iter(self.companies)
+
+    def update_companies_tags(self, tags_by_company, input_hashes=None):
+        self.updates.update(tags_by_company)
+        for company in self.companies:
+            if company['id'] in (input_hashes or {}):
+                company['tags_input_hash'] = input_hashes[company['id']]
+
+    # Mimics the companies_needing_tags function of migration 010.
+    def iter_companies_needing_tags(self, version):
+        for company in self.companies:
+            if company['description'] and company.get('tags_input_hash') != input_hash(version, company['description']):
+                yield company
+
+class TestNLPTagger(unittest.TestCase):
+
+    def setUp(self):
+        self.tagger = NLPTagger(db_client=FakeDB([]), max_workers=1)
+
+    def test_matches_whole_words_only(self):
+        self.assertEqual(self.tagger.generate_tags("We maintain retail banking apps with AI."), {'ai', 'e-commerce', 'fintech'})
+        self.assertEqual(self.tagger.generate_tags("We maintain HTML emails for a mailing list."), set())
+        self.assertEqual(self.tagger.generate_tags(None), set())
+
+    def test_positions_and_counts(self):
+        text = "Machine learning for insurance. More machine learning, hybrid work."
+        self.assertEqual(self.tagger.tag_counts(text), {'ai': 2, 'fintech': 1, 'work-life balance': 1})
+        self.assertEqual(self.tagger.match_tags(text)['fintech'], [(21, 30)])
+
+    def test_dictionaries_from_config(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "tags.json")
+            with open(path, "w") as f:
+                json.dump({"industry": {"mobility": ["e-bike", "car sharing"]}, "stage": {"startup": ["seed round"]}}, f)
+            with mock.patch.dict(os.environ, {"TAG_DICTIONARIES_PATH": path}):
+                dictionaries = default_tag_dictionaries()
+
+        tagger = NLPTagger(db_client=FakeDB([]), tag_dictionaries=dictionaries, max_workers=1)
+        self.assertEqual(tagger.generate_tags("A car sharing startup after its seed round, in banking"),
+                         {'mobility', 'startup', 'fintech'})
+
+    def test_tag_many_in_parallel_matches_sequential(self):
+        descriptions = ["fintech and saas", "a medical device maker", "", "team player wanted"] * 300
+        parallel = NLPTagger(db_client=FakeDB([]), max_workers=2).tag_many(descriptions, chunk_size=100)
+        self.assertEqual(parallel, [self.tagger.generate_tags(d) for d in descriptions])
+
+    def test_run_writes_tags(self):
+        db = FakeDB([{'id': 1, 'description': 'An innovative pharma company'}, {'id': 2, 'description': 'Nothing here'}])
+        NLPTagger(db_client=db, max_workers=1, incremental=False).run()
+        self.assertEqual(db.updates, {1: ['healthtech', 'innovative'], 2: []})
+
+    def test_run_streams_chunks_through_one_pool(self):
+        companies = [{'id': i, 'description': ["fintech and saas", "a medical device maker", ""][i % 3]} for i in range(1000)]
+        sequential = FakeDB([dict(company) for company in companies])
+        NLPTagger(db_client=sequential, max_workers=1, flush_size=300).run()
+
+        parallel = FakeDB([dict(company) for company in companies])
+        with mock.patch.object(batching, "ProcessPoolExecutor", wraps=batching.ProcessPoolExecutor) as pool:
+            NLPTagger(db_client=parallel, max_workers=2, flush_size=300, chunk_size=50).run()
+        self.assertEqual(pool.call_count, 1)
+        self.assertEqual(parallel.updates, sequential.updates)
+        self.assertEqual(parallel.companies, sequential.companies)
+
+    def test_incremental_runs_retag_changed_descriptions_and_dictionaries(self):
+        companies = [{'id': i, 'description': 'A fintech startup' if i % 2 else 'A retail chain'} for i in range(10)]
+        db = FakeDB(companies)
+        NLPTagger(db_client=db, max_workers=1).run()
+        self.assertEqual(len(db.updates), 10)
+
+        db.updates.clear()
+        NLPTagger(db_client=db, max_workers=1).run()
+        self.assertEqual(db.updates, {})
+
+        companies[4]['description'] = 'A medical devices maker'
+        NLPTagger(db_client=db, max_workers=1).run()
+        self.assertEqual(db.updates, {4: ['healthtech']})
+
+        dictionaries = default_tag_dictionaries()
+        dictionaries['industry']['e-commerce'].append('chain')
+        self.assertNotEqual(dictionary_version(dictionaries), dictionary_version(default_tag_dictionaries()))
+        db.updates.clear()
+        NLPTagger(db_client=db, tag_dictionaries=dictionaries, max_workers=1).run()
+        self.assertEqual(len(db.updates), 10)
+
+if __name__ == '__main__':
+    unittest.main()
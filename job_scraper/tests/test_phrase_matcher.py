@@ -0,0 +1,68 @@
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import unittest
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.utils.normalize import COMMON_TECH_SKILLS, build_skill_matcher, extract_skills_from_text
+from job_scraper.utils.phrase_matcher import PhraseMatcher, load_taxonomy
+
+def per_skill_reference(text: str) -> set[str]:
+    # The original one-regex-per-skill semantics.
+    text_lower = text.lower()
+    return {
+        skill for skill in COMMON_TECH_SKILLS
+        if re.search(r'(^|\W)' + re.escape(skill) + r'(?!-)(\W|$)', text_lower)
+    }
+
+class TestPhraseMatcher(unittest.TestCase):
+
+    def test_overlapping_phrases_are_all_found(self):
+        text = "React Native and Ruby on Rails, plus c++/c# and .net (not asp.net)."
+        self.assertEqual(
+            extract_skills_from_text(text),
+            {"react", "react native", "ruby", "ruby on rails", "c++", "c#", ".net"}
+        )
+
+    def test_matches_per_skill_reference(self):
+        rng = random.Random(0)
+        skills = sorted(COMMON_TECH_SKILLS)
+        separators = [" ", "-", ".", ",", "/", "_", "", "\n", "(", ")", "x"]
+        for _ in range(2000):
+            parts = []
+            for _ in range(rng.randint(1, 8)):
+                parts.append(rng.choice(skills) if rng.random() < 0.7 else rng.choice(["js", "node", "golang", "rest-api"]))
+                parts.append(rng.choice(separators))
+            text = "".join(parts)
+            self.assertEqual(extract_skills_from_text(text), per_skill_reference(text), text)
+
+    def test_positions_and_counts(self):
+        matcher = PhraseMatcher({"machine learning": "ai", "ml": "ai", "banking": "fintech"})
+        text = "ML and Machine Learning for banking; html is not ml-ops"
+        self.assertEqual(
+            list(matcher.finditer(text)),
+            [("ai", 0, 2), ("ai", 7, 23), ("fintech", 28, 35), ("ai", 49, 51)]
+        )
+        self.assertEqual(matcher.counts(text), {"ai": 3, "fintech": 1})
+
+    def test_taxonomy_aliases(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "skills.json")
+            with open(path, "w") as f:
+                json.dump({"kubernetes": ["k8s", "kube"], "Elixir": []}, f)
+
+            self.assertEqual(load_taxonomy(path), {"kubernetes": "kubernetes", "k8s": "kubernetes", "kube": "kubernetes", "elixir": "elixir"})
+            matcher = build_skill_matcher(path)
+
+        self.assertEqual(
+            extract_skills_from_text("Running K8s clusters with Python and Elixir", matcher),
+            {"kubernetes", "python", "elixir"}
+        )
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.analysis.embedding_service import EmbeddingService, FakeEmbeddingBackend
+from job_scraper.scrapers.pipeline import JobPipeline, normalize_job
+
+class RecordingClient:
+    def __init__(self, latency: float = 0.0, failing_chunks=()):
+        self.latency = latency
+        self.failing_chunks = set(failing_chunks)
+        self.job_chunks = []
+        self.company_chunks = []
+        self.first_write_at = None
+
+    async def upsert_jobs(self, jobs):
+        # Like AsyncSupabaseClient: a failed chunk is logged and reported as 0 rows written.
+        await asyncio.sleep(self.latency)
+        self.job_chunks.append(list(jobs))
+        if len(self.job_chunks) - 1 in self.failing_chunks:
+            return 0
+        self.first_write_at = self.first_write_at or time.perf_counter()
+        return len({job["hash"] for job in jobs})
+
+    async def upsert_companies(self, companies):
+        self.company_chunks.append(list(companies))
+        return {company["name"]: i for i, company in enumerate(companies)}
+
+async def generate_jobs(n: int, delay: float = 0.0, produced: list = None):
+    for i in range(n):
+        if delay and i % 100 == 0:
+            await asyncio.sleep(delay)
+        if produced is not None:
+            produced.append(time.perf_counter())
+        yield {"title": f"  Python Developer {i} ", "company_name": f"Company {i % 10}", "description": "Python and Docker"}
+
+class TestJobPipeline(unittest.TestCase):
+
+    def test_normalize_job(self):
+        job = normalize_job({"title": " Data Engineer ", "company_name": "Acme"})
+        self.assertEqual(job["title"], "Data Engineer")
+        self.assertEqual(len(job["hash"]), 64)
+        self.assertEqual(normalize_job({"title": "x", "hash": "h"})["hash"], "h")
+
+    def test_streams_jobs_in_chunks_and_enriches_companies(self):
+        client = RecordingClient()
+        pipeline = JobPipeline(client, enrich_companies=True, upsert_chunk_size=100, upsert_concurrency=1)
+        stats = asyncio.run(pipeline.run(generate_jobs(1050)))
+
+        self.assertEqual(stats["scraped"], 1050)
+        self.assertEqual(stats["upserted"], 1050)
+        self.assertTrue(all(len(chunk) <= 100 for chunk in client.job_chunks))
+        self.assertEqual(sum(len(chunk) for chunk in client.company_chunks), 1050)
+        self.assertEqual(sorted(client.company_chunks[0][0]["tech_stack"]), ["docker", "python"])
+        self.assertEqual(client.job_chunks[0][0]["title"], "Python Developer 0")
+
+    def test_unwritten_chunks_are_counted_as_failed(self):
+        client = RecordingClient(failing_chunks={1})
+        pipeline = JobPipeline(client, upsert_chunk_size=100, upsert_concurrency=1)
+        stats = asyncio.run(pipeline.run(generate_jobs(250)))
+
+        self.assertEqual(stats["scraped"], 250)
+        self.assertEqual(stats["upserted"], 150)
+        self.assertEqual(stats["failed"], 100)
+
+    def test_first_rows_land_before_the_crawl_ends(self):
+        client = RecordingClient()
+        produced = []
+        pipeline = JobPipeline(client, upsert_chunk_size=50)
+        asyncio.run(pipeline.run(generate_jobs(1000, delay=0.02, produced=produced)))
+
+        self.assertLess(client.first_write_at, produced[-1])
+
+    def test_backpressure_bounds_jobs_in_flight(self):
+        # A slow database: the source must not run ahead by more than the queues can hold.
+        client = RecordingClient(latency=0.01)
+        produced = []
+        pipeline = JobPipeline(client, queue_size=20, upsert_chunk_size=10, upsert_concurrency=1,
+                               normalize_concurrency=1, skills_concurrency=1)
+        asyncio.run(pipeline.run(generate_jobs(600, produced=produced)))
+
+        first_write = client.first_write_at
+        produced_before_first_write = sum(1 for t in produced if t <= first_write)
+        self.assertLess(produced_before_first_write, 150)
+        self.assertEqual(sum(len(chunk) for chunk in client.job_chunks), 600)
+
+    def test_embeds_in_batches(self):
+        backend = FakeEmbeddingBackend(dimensions=8)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            embedding_service = EmbeddingService(backend=backend, cache_file=os.path.join(tmpdir, "embeddings.sqlite3"))
+            client = RecordingClient()
+            pipeline = JobPipeline(client, embedding_service=embedding_service, embed_batch_size=100)
+            asyncio.run(pipeline.run(generate_jobs(300)))
+
+        jobs = [job for chunk in client.job_chunks for job in chunk]
+        self.assertTrue(all(len(job["embedding"]) == 8 for job in jobs))
+        self.assertLessEqual(backend.calls, 6)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import asyncio
+import time
+import unittest
+import sys
+import os
+from unittest import mock
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.db.async_supabase_client import AsyncSupabaseClient
+from job_scraper.scrapers.base_scraper import BaseScraper
+from job_scraper.scrapers.scheduler import ScraperScheduler, format_summary
+
+class SlowScraper(BaseScraper):
+    name = "Slow"
+
+    async def scrape(self):
+        return []
+
+    async def run(self):
+        await asyncio.sleep(0.2)
+        return 3
+
+class OtherSlowScraper(SlowScraper):
+    name = "OtherSlow"
+
+class FailingScraper(SlowScraper):
+    name = "Failing"
+
+    async def run(self):
+        raise RuntimeError("boom")
+
+class HangingScraper(SlowScraper):
+    name = "Hanging"
+    timeout = 0.05
+
+    async def run(self):
+        await asyncio.sleep(10)
+
+class PartiallyWrittenScraper(SlowScraper):
+    name = "Partial"
+
+    async def run(self):
+        self.stats = {"scraped": 5, "upserted": 3, "failed": 2}
+        return 5
+
+class DatabaseScraper(SlowScraper):
+    name = "Database"
+
+    async def run(self):
+        DatabaseScraper.client = AsyncSupabaseClient.shared()
+        return 0
+
+class UnconfiguredScraper(SlowScraper):
+    name = "Unconfigured"
+    skip_reason = "credentials not found"
+
+    @classmethod
+    def is_configured(cls):
+        return False
+
+class TestScraperScheduler(unittest.TestCase):
+
+    def test_sources_run_concurrently(self):
+        start = time.perf_counter()
+        results = asyncio.run(ScraperScheduler([SlowScraper, OtherSlowScraper]).run())
+        elapsed = time.perf_counter() - start
+
+        self.assertLess(elapsed, 0.35, "Sources should overlap instead of running back to back")
+        self.assertEqual([r["status"] for r in results], ["ok", "ok"])
+        self.assertEqual([r["jobs"] for r in results], [3, 3])
+        for result in results:
+            self.assertGreaterEqual(result["duration"], 0.2)
+
+    def test_failures_and_timeouts_are_isolated(self):
+        scrapers = [FailingScraper, HangingScraper, SlowScraper, UnconfiguredScraper]
+        results = asyncio.run(ScraperScheduler(scrapers).run())
+        statuses = {r["source"]: r["status"] for r in results}
+
+        self.assertEqual(statuses, {
+            "Failing": "failed",
+            "Hanging": "timeout",
+            "Slow": "ok",
+            "Unconfigured": "skipped",
+        })
+        self.assertEqual(results[0]["error"], "boom")
+
+        summary = format_summary(results).splitlines()
+        self.assertEqual(summary[0], f"Failing: Failed to run after {results[0]['duration']:.2f}s.")
+        self.assertTrue(summary[1].startswith("Hanging: Timed out after"))
+        self.assertTrue(summary[2].startswith("Slow: Scraped 3 jobs in"))
+        self.assertEqual(summary[3], "Unconfigured: Skipped (credentials not found).")
+
+    def test_unwritten_jobs_are_reported(self):
+        result, = asyncio.run(ScraperScheduler([PartiallyWrittenScraper]).run())
+        self.assertEqual((result["status"], result["jobs"], result["failed"]), ("partial", 5, 2))
+        self.assertTrue(format_summary([result]).endswith("; 2 failed to be written."))
+
+    def test_shared_database_client_is_closed_after_the_run(self):
+        with mock.patch.dict(os.environ, {"SUPABASE_URL": "https://db.test", "SUPABASE_SERVICE_ROLE_KEY": "key"}):
+            asyncio.run(ScraperScheduler([DatabaseScraper]).run())
+        self.assertTrue(DatabaseScraper.client.client.is_closed)
+
+if __name__ == '__main__':
+    unittest.main()
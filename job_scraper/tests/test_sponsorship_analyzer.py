@@ -0,0 +1,104 @@
+import os
+import sys
+import unittest
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.analysis.sponsorship_analyzer import (
+    SPONSORSHIP_KEYWORDS_VERSION,
+    SponsorshipAnalyzer,
+    find_sponsors,
+    mentions_sponsorship,
+)
+from job_scraper.db.supabase_client import input_hash
+
+class FakeDB:
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self.updates = []
+
+    def iter_jobs_with_company(self):
+        return iter(self.jobs)
+
+    def update_companies_sponsorship(self, company_ids, status):
+        self.updates.append((sorted(company_ids), status))
+
+    # Mimics the jobs_needing_sponsorship_scan and bulk_update_job_sponsorship functions of migrations 010 to 012.
+    def iter_jobs_needing_sponsorship_scan(self, keywords_version):
+        for job in self.jobs:
+            expected = input_hash(keywords_version, job['company_id'], job['description'] or '')
+            if ((job['company_id'] and job.get('sponsorship_input_hash') != expected)
+                    or job['company_id'] != job.get('sponsorship_company_id')):
+                yield job
+
+    def update_jobs_sponsorship(self, results):
+        self.updates.append(sorted(results))
+        for job in self.jobs:
+            if job['id'] in results:
+                job['mentions_sponsorship'], job['sponsorship_input_hash'] = results[job['id']]
+                job['sponsorship_company_id'] = job['company_id']
+        return len(results)
+
+class TestSponsorshipAnalyzer(unittest.TestCase):
+
+    def test_pattern_matches_every_language(self):
+        for text in ["We provide Visa sponsorship", "relocation package included", "work permits handled",
+                     "Wir helfen bei der Arbeitsbewilligung", "Arbeitsbewilligungsverfahren inklusive",
+                     "Nous fournissons le permis de travail", "aide au déménagement", "permesso di lavoro garantito"]:
+            self.assertTrue(mentions_sponsorship(text), text)
+        for text in ["Python developer in Zurich", "no visa required", "Permit to work remotely"]:
+            self.assertFalse(mentions_sponsorship(text), text)
+
+    def test_find_sponsors(self):
+        jobs = [(1, "visa support"), (2, "nothing"), (1, "work permit"), (3, "permis de travail")]
+        self.assertEqual(find_sponsors(jobs), {1, 3})
+
+    def test_analyze_in_process_and_on_a_pool_agree(self):
+        jobs = [{'company_id': i % 50 + 1, 'description': 'Visa sponsorship available' if i % 7 == 0 else 'Backend role'}
+                for i in range(2000)]
+        jobs += [{'company_id': None, 'description': 'visa support'}, {'company_id': 99, 'description': None}]
+        expected = sorted({i % 50 + 1 for i in range(2000) if i % 7 == 0})
+
+        for max_workers in (1, 2):
+            db = FakeDB(jobs)
+            analyzer = SponsorshipAnalyzer(db_client=db, max_workers=max_workers, chunk_size=100, incremental=False)
+            analyzer.analyze()
+            self.assertEqual(db.updates, [(expected, True)])
+            self.assertEqual(analyzer.num_jobs, 2002)
+
+    def test_incremental_runs_only_scan_changed_jobs(self):
+        jobs = [{'id': i, 'company_id': i % 5 + 1, 'description': 'Visa support' if i == 3 else 'Backend role'} for i in range(20)]
+        db = FakeDB(jobs)
+        analyzer = SponsorshipAnalyzer(db_client=db, max_workers=1, chunk_size=8)
+
+        self.assertEqual(analyzer.scan_changed_jobs(), (20, 1))
+        self.assertEqual(jobs[3]['sponsorship_input_hash'], input_hash(SPONSORSHIP_KEYWORDS_VERSION, 4, 'Visa support'))
+        self.assertEqual(analyzer.scan_changed_jobs(), (0, 0))
+
+        jobs[5]['description'] = 'Arbeitsbewilligung inklusive'
+        jobs[3]['company_id'] = 2
+        db.updates.clear()
+        self.assertEqual(analyzer.scan_changed_jobs(), (2, 2))
+        self.assertEqual(db.updates, [[3, 5]])
+
+    def test_incremental_runs_rescan_jobs_that_lost_their_company(self):
+        jobs = [{'id': 1, 'company_id': 7, 'description': 'Visa support'}, {'id': 2, 'company_id': None, 'description': 'Visa support'}]
+        db = FakeDB(jobs)
+        analyzer = SponsorshipAnalyzer(db_client=db, max_workers=1)
+
+        # A job that was never linked has no flag counting towards a company.
+        self.assertEqual(analyzer.scan_changed_jobs(), (1, 1))
+
+        jobs[0]['company_id'] = None
+        self.assertEqual(analyzer.scan_changed_jobs(), (1, 1))
+        self.assertEqual(db.updates[-1], [1])
+        self.assertIsNone(jobs[0]['sponsorship_company_id'])
+        self.assertIsNone(jobs[0]['sponsorship_input_hash'])
+        self.assertEqual(analyzer.scan_changed_jobs(), (0, 0))
+
+        jobs[0]['company_id'] = 8
+        self.assertEqual(analyzer.scan_changed_jobs(), (1, 1))
+
+if __name__ == '__main__':
+    unittest.main()
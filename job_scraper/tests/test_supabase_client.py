@@ -0,0 +1,184 @@
+import os
+import sys
+import threading
+import unittest
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import hashlib
+
+from job_scraper.db.supabase_client import SupabaseClient, input_hash
+
+class FakeQuery:
+    def __init__(self, client, table):
+        self.client, self.table = client, table
+        self.columns, self.filters, self.order_by, self.size = None, [], None, None
+
+    def upsert(self, rows, on_conflict=None, ignore_duplicates=False):
+        self.rows, self.on_conflict = rows, on_conflict
+        return self
+
+    def select(self, columns):
+        self.columns = columns.split(',')
+        return self
+
+    def filter(self, column, operator, criteria):
+        self.filters.append((column, f'{operator}.{criteria}'))
+        return self
+
+    def gt(self, column, value):
+        return self.filter(column, 'gt', value)
+
+    def order(self, column):
+        self.order_by = column
+        return self
+
+    def limit(self, size):
+        self.size = size
+        return self
+
+    def matches(self, row):
+        for column, condition in self.filters:
+            value = row.get(column)
+            if condition == 'is.null' and value is not None:
+                return False
+            if condition == 'not.is.null' and value is None:
+                return False
+            if condition.startswith('gt.') and not value > type(value)(condition[3:]):
+                return False
+        return True
+
+    def execute(self):
+        if self.columns is not None:
+            self.client.selects.append(self.filters)
+            rows = sorted((row for row in self.client.tables[self.table] if self.matches(row)), key=lambda row: row[self.order_by])
+            return type('Response', (), {'data': [{column: row.get(column) for column in self.columns} for row in rows[:self.size]]})()
+        with self.client.lock:
+            self.client.calls.append((self.table, self.on_conflict, len(self.rows)))
+            returned = []
+            for row in self.rows:
+                key = (self.table, self.on_conflict, tuple(row.get(column) for column in self.on_conflict.split(',')))
+                self.client.ids.setdefault(key, len(self.client.ids) + 1)
+                returned.append({**row, 'id': self.client.ids[key]})
+        # Mimics the (('data', rows), ('count', n)) shape of a postgrest APIResponse.
+        return ('data', returned), ('count', None)
+
+class FakeRpc:
+    def __init__(self, client, function, params):
+        self.client, self.function, self.params = client, function, params
+
+    def execute(self):
+        records = next(iter(self.params.values()))
+        with self.client.lock:
+            self.client.calls.append((self.function, None, len(records)))
+        return type('Response', (), {'data': len(records)})()
+
+class FakeSupabase:
+    def __init__(self):
+        self.calls, self.ids, self.lock = [], {}, threading.Lock()
+        self.tables, self.selects = {}, []
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, function, params):
+        return FakeRpc(self, function, params)
+
+def make_client():
+    client = SupabaseClient.__new__(SupabaseClient)
+    client.client = FakeSupabase()
+    return client
+
+class TestBulkUpserts(unittest.TestCase):
+
+    def test_upsert_companies_chunks_and_splits_on_conflict_column(self):
+        client = make_client()
+        companies = [{'name': f'Company {i}', 'description': 'x'} for i in range(25)]
+        companies += [{'name': f'Registered {i}', 'zefix_uid': f'CHE-{i}'} for i in range(5)]
+        companies.append({'name': 'Company 0', 'description': 'updated'})
+        companies.append({'name': None})
+
+        ids = client.upsert_companies(companies, chunk_size=10, max_concurrency=3)
+
+        self.assertEqual(len(ids), 30)
+        self.assertIn('CHE-4', ids)
+        self.assertIn('Company 24', ids)
+        calls = client.client.calls
+        self.assertEqual(sum(rows for _, _, rows in calls), 30)
+        self.assertTrue(all(rows <= 10 for _, _, rows in calls))
+        self.assertEqual({conflict for _, conflict, _ in calls}, {'name', 'zefix_uid'})
+
+    def test_upsert_candidates_with_skills(self):
+        client = make_client()
+        candidates = [
+            ({'source': 'github', 'source_id': str(i), 'username': f'user{i}'}, {'python', 'go'} if i % 2 else set())
+            for i in range(7)
+        ]
+
+        ids = client.upsert_candidates_with_skills(candidates, chunk_size=3)
+
+        self.assertEqual(sorted(ids), [('github', str(i)) for i in range(7)])
+        calls = client.client.calls
+        self.assertEqual([rows for table, _, rows in calls if table == 'scraped_candidates'], [3, 3, 1])
+        self.assertEqual(sum(rows for table, _, rows in calls if table == 'scraped_candidate_skills'), 6)
+
+    def test_bulk_updates_use_one_request_per_chunk(self):
+        client = make_client()
+        links = {f'job-{i}': f'company-{i % 3}' for i in range(2500)}
+        self.assertEqual(client.update_job_company_links(links, chunk_size=1000), 2500)
+        self.assertEqual(sorted(client.client.calls), [('bulk_link_jobs_to_companies', None, n) for n in (500, 1000, 1000)])
+
+        client.client.calls.clear()
+        tags = {'a': ['fintech'], 'b': [], 'c': ['saas', 'ai']}
+        self.assertEqual(client.update_companies_tags(tags), 2)
+        self.assertEqual(client.client.calls, [('bulk_update_company_tags', None, 2)])
+
+    def test_tags_with_input_hashes_include_untagged_companies(self):
+        client = make_client()
+        tags = {'a': ['fintech'], 'b': [], 'c': []}
+        self.assertEqual(client.update_companies_tags(tags, input_hashes={'a': 'h1', 'b': 'h2'}), 2)
+
+    def test_input_hash_matches_postgres_md5(self):
+        # md5('v1' || ':' || company_id::text || ':' || description) in migration 010.
+        self.assertEqual(input_hash('v1', 'c-1', 'Zürich'), hashlib.md5('v1:c-1:Zürich'.encode('utf-8')).hexdigest())
+
+class TestStreamingReads(unittest.TestCase):
+
+    def test_iter_rows_pages_by_key_with_projection(self):
+        client = make_client()
+        client.client.tables['jobs'] = [{'id': i, 'company_name': f'C{i}', 'company_id': None if i % 2 else i} for i in range(1, 2502)]
+
+        jobs = list(client.iter_jobs_without_company_link(columns='company_name', page_size=500))
+
+        self.assertEqual([job['id'] for job in jobs], list(range(1, 2502, 2)))
+        self.assertEqual(set(jobs[0]), {'id', 'company_name'})
+        # 1251 rows at 500 per page: three pages, each after the last key of the previous one.
+        self.assertEqual([[f for f in filters if f[0] == 'id'] for filters in client.client.selects],
+                         [[], [('id', 'gt.999')], [('id', 'gt.1999')]])
+
+    def test_rows_updated_out_of_the_filter_are_not_skipped(self):
+        client = make_client()
+        companies = [{'id': i, 'description': 'd', 'tags': None} for i in range(1, 101)]
+        client.client.tables['companies'] = companies
+
+        seen = []
+        for company in client.iter_companies_for_tagging(page_size=10):
+            seen.append(company['id'])
+            companies[company['id'] - 1]['tags'] = ['tagged']
+
+        self.assertEqual(seen, list(range(1, 101)))
+        self.assertEqual(client.get_companies_for_tagging(), [])
+
+    def test_job_embeddings_are_read_in_pages(self):
+        client = make_client()
+        client.client.tables['jobs'] = [{'id': i, 'embedding': None if i % 3 == 0 else [0.1, 0.2]} for i in range(1, 101)]
+
+        rows = list(client.iter_job_embeddings(page_size=20))
+
+        self.assertEqual([row['id'] for row in rows], [i for i in range(1, 101) if i % 3])
+        self.assertEqual(len(client.client.selects), 4)
+        self.assertEqual(client.get_job_embeddings(), rows)
+
+if __name__ == '__main__':
+    unittest.main()
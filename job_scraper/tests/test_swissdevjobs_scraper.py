@@ -0,0 +1,145 @@
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import httpx
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.scrapers.swissdevjobs_scraper import SwissDevJobsScraper, feed_items
+from job_scraper.utils.http import ValidatorCache
+from job_scraper.utils.watermark import FeedWatermark
+
+FEED = """<?xml version="1.0"?>
+<rss version="2.0" xmlns:dc="http://purl.org/dc/elements/1.1/">
+<channel><title>SwissDevJobs</title><link>https://swissdevjobs.ch</link><description>Jobs</description>
+<item><title>Python Developer</title><link>https://swissdevjobs.ch/jobs/1</link><description>Build APIs in Python</description>
+<dc:creator>Acme AG</dc:creator><pubDate>Mon, 01 Jan 2024 10:00:00 GMT</pubDate></item>
+<item><title>React Engineer</title><link>https://swissdevjobs.ch/jobs/2</link><description>Build UIs in React</description>
+<dc:creator>Foo GmbH</dc:creator><pubDate>Tue, 02 Jan 2024 10:00:00 GMT</pubDate></item>
+</channel></rss>"""
+
+class FeedServer:
+    """
+    Serves the feed with an ETag and answers matching conditional requests with a 304.
+    """
+    etag = '"v1"'
+
+    def __init__(self):
+        self.requests = []
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if request.headers.get("If-None-Match") == self.etag:
+            return httpx.Response(304, headers={"ETag": self.etag})
+        return httpx.Response(200, text=FEED, headers={"ETag": self.etag})
+
+class TestSwissDevJobsScraper(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.env = mock.patch.dict(os.environ, {"EMBEDDING_BACKEND": "fake", "JOB_SCRAPER_CACHE_DIR": self.tmpdir.name})
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmpdir.cleanup()
+
+    def test_feed_items(self):
+        items = feed_items(FEED)
+        self.assertEqual([item["title"] for item in items], ["Python Developer", "React Engineer"])
+        self.assertEqual(items[0]["creator"], "Acme AG")
+        self.assertEqual(items[0]["link"], "https://swissdevjobs.ch/jobs/1")
+        self.assertEqual(items[0]["pubDate"].year, 2024)
+
+    def test_unchanged_feed_is_skipped(self):
+        server = FeedServer()
+        client = httpx.AsyncClient(transport=httpx.MockTransport(server.handle))
+        validators = ValidatorCache(os.path.join(self.tmpdir.name, "validators.sqlite3"))
+
+        scraper = SwissDevJobsScraper(client=client, validators=validators)
+        jobs = asyncio.run(scraper.scrape())
+        self.assertEqual(len(jobs), 2)
+        self.assertEqual(jobs[0]["company_name"], "Acme AG")
+        self.assertIsNotNone(jobs[0]["embedding"])
+        scraper.feed_written()
+
+        # A new scraper instance (the next poll) revalidates with the stored ETag.
+        jobs = asyncio.run(SwissDevJobsScraper(client=client, validators=validators).scrape())
+        self.assertEqual(jobs, [])
+        self.assertEqual(server.requests[1].headers["If-None-Match"], '"v1"')
+
+    @mock.patch("job_scraper.scrapers.base_scraper.AsyncSupabaseClient")
+    def test_incremental_polls_only_upsert_new_or_changed_items(self, supabase_client):
+        db_client = supabase_client.shared.return_value
+        db_client.upsert_jobs = mock.AsyncMock(side_effect=lambda jobs: len(jobs))
+        feeds = [FEED, FEED.replace("Build UIs in React", "Build UIs in React and TypeScript").replace(
+            "</channel>",
+            "<item><title>Go Developer</title><link>https://swissdevjobs.ch/jobs/3</link><description>Go services</description>"
+            "<dc:creator>Bar AG</dc:creator><pubDate>Wed, 03 Jan 2024 10:00:00 GMT</pubDate></item></channel>"
+        )]
+        client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, text=feeds[0])))
+        watermark = FeedWatermark("SwissDevJobs", os.path.join(self.tmpdir.name, "watermarks.sqlite3"))
+
+        def poll():
+            scraper = SwissDevJobsScraper(client=client, validators=ValidatorCache(os.path.join(self.tmpdir.name, "v.sqlite3")),
+                                          watermark=watermark)
+            return asyncio.run(scraper.run())
+
+        self.assertEqual(poll(), 2)
+        self.assertEqual(poll(), 0)
+        feeds.pop(0)
+        self.assertEqual(poll(), 2)
+        upserted = db_client.upsert_jobs.call_args_list[-1].args[0]
+        self.assertEqual(sorted(job["title"] for job in upserted), ["Go Developer", "React Engineer"])
+        self.assertEqual(watermark.watermark.day, 3)
+
+    @mock.patch("job_scraper.scrapers.base_scraper.AsyncSupabaseClient")
+    def test_items_whose_write_failed_are_retried(self, supabase_client):
+        db_client = supabase_client.shared.return_value
+        # The first write fails the way the client reports it: nothing written.
+        written = [0]
+        db_client.upsert_jobs = mock.AsyncMock(side_effect=lambda jobs: written.pop(0) if written else len(jobs))
+        client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, text=FEED)))
+        watermark = FeedWatermark("SwissDevJobs", os.path.join(self.tmpdir.name, "watermarks.sqlite3"))
+
+        def poll():
+            scraper = SwissDevJobsScraper(client=client, validators=ValidatorCache(os.path.join(self.tmpdir.name, "v.sqlite3")),
+                                          watermark=watermark)
+            asyncio.run(scraper.run())
+            return scraper.stats
+
+        self.assertEqual(poll()["failed"], 2)
+        self.assertIsNone(watermark.watermark)
+        self.assertEqual(poll()["upserted"], 2)
+        self.assertEqual(poll()["scraped"], 0)
+
+    @mock.patch("job_scraper.scrapers.base_scraper.AsyncSupabaseClient")
+    def test_feed_validators_are_saved_only_after_a_full_write(self, supabase_client):
+        db_client = supabase_client.shared.return_value
+        written = [0]
+        db_client.upsert_jobs = mock.AsyncMock(side_effect=lambda jobs: written.pop(0) if written else len(jobs))
+        server = FeedServer()
+        client = httpx.AsyncClient(transport=httpx.MockTransport(server.handle))
+        validators = ValidatorCache(os.path.join(self.tmpdir.name, "validators.sqlite3"))
+
+        def poll():
+            scraper = SwissDevJobsScraper(client=client, validators=validators, incremental=False)
+            asyncio.run(scraper.run())
+            return server.requests[-1].headers.get("If-None-Match"), scraper.stats
+
+        self.assertEqual(poll()[1]["failed"], 2)
+        # The failed write left no validators behind, so the feed is fetched in full again.
+        revalidated, stats = poll()
+        self.assertIsNone(revalidated)
+        self.assertEqual(stats["upserted"], 2)
+        revalidated, stats = poll()
+        self.assertEqual(revalidated, '"v1"')
+        self.assertEqual(stats["scraped"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.analysis.matching_service import calculate_match_score, get_corpus_model
+from job_scraper.analysis.tfidf_model import CorpusTfidfModel
+
+JOBS = [
+    "Python developer for machine learning pipelines",
+    "Backend engineer building payment APIs in Go",
+    "Brand designer for typography and packaging",
+    "Data engineer building Python data pipelines on Spark",
+    "Frontend developer with React and TypeScript",
+]
+NEW_JOBS = [
+    "Rust engineer for embedded firmware",
+    "Python backend developer for payment APIs",
+]
+
+def gram(vectors) -> np.ndarray:
+    # Pairwise cosine similarities, which do not depend on the order of the vocabulary.
+    return (vectors @ vectors.T).toarray()
+
+class TestCorpusTfidfModel(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def fit(self, texts, **kwargs) -> CorpusTfidfModel:
+        return CorpusTfidfModel(lemmatize=False, **kwargs).fit(list(range(len(texts))), texts)
+
+    def test_matches_scikit_learn(self):
+        model = self.fit(JOBS)
+        expected = TfidfVectorizer(stop_words='english').fit_transform(JOBS)
+        np.testing.assert_allclose(gram(model._vectors), gram(expected), atol=1e-6)
+
+        similarities = model.similarities("Python machine learning engineer")
+        self.assertEqual(similarities.argmax(), 0)
+        self.assertEqual(model.score("Python machine learning engineer", 0), int(similarities[0] * 100))
+        self.assertEqual(model.score("anything", 99), 0)
+
+    def test_incremental_adds_and_refit_match_a_full_fit(self):
+        model = self.fit(JOBS, refit_fraction=0.5)
+        before = model._vectors[:len(JOBS)].toarray()
+        model.add([5, 6], NEW_JOBS)
+
+        # Existing vectors keep the IDF they were fitted with until the next refit.
+        self.assertFalse(model.needs_refit)
+        np.testing.assert_allclose(model._vectors[:len(JOBS)].toarray()[:, :before.shape[1]], before)
+        self.assertGreater(model.score("embedded rust firmware", 5), 90)
+
+        model.refit()
+        np.testing.assert_allclose(gram(model._vectors), gram(self.fit(JOBS + NEW_JOBS)._vectors), atol=1e-6)
+
+        # Four new jobs are over half of the seven fitted, which triggers a refit.
+        model.add([7, 8, 9, 10], ["Go developer", "Go engineer", "Go platform team", "Go SRE"])
+        self.assertEqual(model.docs_at_fit, 11)
+
+    def test_update_only_processes_changed_jobs(self):
+        model = self.fit(JOBS)
+        rows = [{'id': i, 'description': text} for i, text in enumerate(JOBS)]
+        self.assertEqual(model.update(rows), (0, 0))
+
+        rows[1]['description'] = NEW_JOBS[0]
+        rows = rows[:4] + [{'id': 9, 'description': NEW_JOBS[1]}]
+        self.assertEqual(model.update(rows), (2, 1))
+        model.refit()
+        self.assertEqual(sorted(model.ids), [0, 1, 2, 3, 9])
+        fresh = CorpusTfidfModel(lemmatize=False).fit([row['id'] for row in rows], [row['description'] for row in rows])
+        order = [model.ids.index(job_id) for job_id in fresh.ids]
+        np.testing.assert_allclose(gram(model._vectors[order]), gram(fresh._vectors), atol=1e-6)
+
+    def test_save_and_memory_map(self):
+        model = self.fit(JOBS)
+        model.save(self.tmpdir.name)
+        loaded = CorpusTfidfModel.load(self.tmpdir.name)
+
+        # Read-only views of the mapped files, not copies.
+        self.assertFalse(loaded._vectors.data.flags.writeable or loaded._vectors.data.flags.owndata)
+        np.testing.assert_allclose(loaded.similarities("react developer"), model.similarities("react developer"))
+
+        # Saving a new generation leaves readers of the previous one intact.
+        updated = CorpusTfidfModel.load(self.tmpdir.name)
+        updated.add([5], NEW_JOBS[:1])
+        updated.save(self.tmpdir.name)
+        np.testing.assert_allclose(loaded.similarities("react developer"), model.similarities("react developer"))
+        self.assertEqual(len(CorpusTfidfModel.load(self.tmpdir.name)), 6)
+        self.assertEqual(len(os.listdir(self.tmpdir.name)), 9)
+        self.assertIsNone(CorpusTfidfModel.load(os.path.join(self.tmpdir.name, "missing")))
+
+    def test_calculate_match_score_uses_the_corpus_idf(self):
+        model = self.fit(JOBS)
+        score = calculate_match_score("Python developer, machine learning", JOBS[0], model=model)
+        self.assertEqual(score, model.score("Python developer, machine learning", 0))
+        self.assertEqual(calculate_match_score("", JOBS[0], model=model), 0)
+
+    def test_corpus_model_is_opt_in_and_picked_up_once_built(self):
+        model_dir = os.path.join(self.tmpdir.name, "model")
+        with mock.patch.dict(os.environ, {"TFIDF_MODEL_DIR": ""}):
+            self.assertIsNone(get_corpus_model())
+        with mock.patch.dict(os.environ, {"TFIDF_MODEL_DIR": model_dir}):
+            self.assertIsNone(get_corpus_model())
+            self.fit(JOBS).save(model_dir)
+            self.assertEqual(len(get_corpus_model()), len(JOBS))
+            self.assertIs(get_corpus_model(), get_corpus_model(model_dir))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.analysis.vector_index import VectorIndex
+
+class TestVectorIndex(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.vectors = rng.normal(size=(500, 16)).astype(np.float32)
+        self.ids = [f"job-{i}" for i in range(500)]
+
+    def test_search_returns_nearest_first(self):
+        index = VectorIndex(16)
+        index.add(self.ids, self.vectors)
+        results = index.search(self.vectors[42], k=3)
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0][0], "job-42")
+        self.assertAlmostEqual(results[0][1], 1.0, places=5)
+        self.assertGreaterEqual(results[1][1], results[2][1])
+
+    def test_incremental_add_replace_remove(self):
+        index = VectorIndex.from_rows([{"id": 1, "embedding": "[1, 0, 0]"}, {"id": 2, "embedding": [0, 1, 0]}, {"id": 3, "embedding": None}])
+        self.assertEqual(len(index), 2)
+
+        index.add([3, 1], [[0, 0, 1], [0, 1, 0.1]])
+        self.assertEqual(len(index), 3)
+        self.assertEqual(index.search([0, 0, 1], k=1)[0][0], 3)
+        self.assertEqual({job_id for job_id, _ in index.search([0, 1, 0], k=2)}, {1, 2})
+
+        self.assertEqual(index.remove([2, 99]), 1)
+        self.assertNotIn(2, index)
+        self.assertEqual([job_id for job_id, _ in index.search([0, 1, 0], k=5)], [1, 3])
+
+    def test_save_and_memory_mapped_load(self):
+        index = VectorIndex(16)
+        index.add(self.ids, self.vectors)
+        index.train_partitions(nlist=8)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            index.save(tmpdir)
+            loaded = VectorIndex.load(tmpdir)
+            self.assertEqual(len(loaded), 500)
+            self.assertEqual(loaded.search(self.vectors[7], k=1, nprobe=8), index.search(self.vectors[7], k=1, nprobe=8))
+            # Modifying a memory-mapped index copies it into memory first.
+            loaded.add(["new"], [self.vectors[0] * -1])
+            loaded.remove(["job-0"])
+            self.assertEqual(loaded.search(-self.vectors[0], k=1)[0][0], "new")
+
+    def test_partitioned_search_recall(self):
+        index = VectorIndex(16)
+        index.add(self.ids, self.vectors)
+        queries = self.vectors[:50]
+        exact = index.search_many(queries, k=10)
+        index.train_partitions(nlist=10)
+        approximate = index.search_many(queries, k=10, nprobe=4)
+        hits = sum(len({a for a, _ in e} & {a for a, _ in p}) for e, p in zip(exact, approximate))
+        self.assertGreater(hits / 500, 0.6)
+        # Scanning every partition is exact.
+        self.assertEqual(index.search_many(queries, k=10, nprobe=10), exact)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, TypeVar
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+def chunked(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """
+    Splits an iterable into lists of at most `size` items.
+    """
+    if size <= 0:
+        raise ValueError("Chunk size must be positive.")
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def map_chunks(function: Callable[[List[T]], R], chunks: Iterable[List[T]], max_workers: int,
+               initializer: Optional[Callable[..., Any]] = None, initargs: Sequence[Any] = ()) -> Iterator[R]:
+    """
+    Yields `function(chunk)` for every chunk, in completion order, computed on one
+    pool of `max_workers` processes (in this process if `max_workers` is 1 or less).
+
+    At most two chunks per worker are in flight, so a streamed input is read only
+    slightly ahead of the workers instead of being pulled into memory at once.
+    `function` and `initializer` must be picklable module-level functions.
+    """
+    if max_workers <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for chunk in chunks:
+            yield function(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=initializer, initargs=tuple(initargs)) as executor:
+        pending = set()
+        for chunk in chunks:
+            pending.add(executor.submit(function, chunk))
+            if len(pending) >= 2 * max_workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in pending:
+            yield future.result()
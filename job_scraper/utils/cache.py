@@ -0,0 +1,12 @@
+import os
+
+# Local state (caches, watermarks) lives here unless JOB_SCRAPER_CACHE_DIR is set.
+DEFAULT_CACHE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.cache'))
+
+def cache_path(filename: str) -> str:
+    """
+    Returns the path of a file in the local cache directory, creating the directory if needed.
+    """
+    cache_dir = os.environ.get('JOB_SCRAPER_CACHE_DIR', DEFAULT_CACHE_DIR)
+    os.makedirs(cache_dir, exist_ok=True)
+    return os.path.join(cache_dir, filename)
@@ -1,19 +1,21 @@
 import sys
 import os
-from thefuzz import process
 
 # Add the parent directory to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
 from job_scraper.db.supabase_client import SupabaseClient
+from job_scraper.utils.company_matcher import CompanyMatcher
 
 class CompanyLinker:
     """
-    A utility to link jobs to canonical companies using fuzzy name matching.
+    A utility to link jobs to canonical companies using indexed fuzzy name matching.
     """
-    def __init__(self, match_threshold: int = 85):
+    def __init__(self, match_threshold: int = 85, flush_size: int = 1000):
         self.db_client = SupabaseClient()
         self.match_threshold = match_threshold
+        # Links are written every `flush_size` matches, so memory stays bounded however many jobs there are.
+        self.flush_size = flush_size
 
     def run(self):
         """
@@ -21,41 +23,44 @@ class CompanyLinker:
         """
         print("Starting company linking process...")
 
-        # 1. Fetch data
-        jobs_to_link = self.db_client.get_jobs_without_company_link()
-        all_companies = self.db_client.get_all_companies()
-
-        if not jobs_to_link or not all_companies:
-            print("No jobs to link or no canonical companies found. Exiting.")
+        # 1. Normalize and index the company names once, streaming them in pages
+        matcher = CompanyMatcher(self.db_client.iter_all_companies(), match_threshold=self.match_threshold)
+        if not len(matcher):
+            print("No canonical companies found. Exiting.")
             return
 
-        # Create a dictionary for easy lookup of company names for matching
-        company_choices = {company['name']: company['id'] for company in all_companies}
-
-        # 2. Match and update
+        # 2. Stream the unlinked jobs and match them, writing the links in bulk as they accumulate.
+        # Linked jobs drop out of the filter behind the keyset cursor, so none are skipped.
+        num_jobs = 0
         linked_count = 0
-        for job in jobs_to_link:
+        links = {}
+        for job in self.db_client.iter_jobs_without_company_link():
+            num_jobs += 1
             job_id = job.get('id')
             job_company_name = job.get('company_name')
 
             if not job_company_name:
                 continue
 
-            # Find the best match using fuzzy string matching
-            best_match = process.extractOne(job_company_name, company_choices.keys())
-
-            if best_match and best_match[1] >= self.match_threshold:
-                matched_name = best_match[0]
-                matched_id = company_choices[matched_name]
-                match_score = best_match[1]
+            # Find the best match among the companies that share a blocking key with this name
+            best_match = matcher.match(job_company_name)
 
+            if best_match:
+                matched_id, matched_name, match_score = best_match
                 print(f"  - Match found for '{job_company_name}': '{matched_name}' (Score: {match_score})")
-                self.db_client.update_job_company_link(job_id, matched_id)
-                linked_count += 1
+                links[job_id] = matched_id
             else:
                 print(f"  - No high-confidence match found for '{job_company_name}'.")
 
-        print(f"\nCompany linking process finished. {linked_count} jobs were linked.")
+            # 3. Update
+            if len(links) >= self.flush_size:
+                linked_count += self.db_client.update_job_company_links(links)
+                links = {}
+
+        if links:
+            linked_count += self.db_client.update_job_company_links(links)
+
+        print(f"\nCompany linking process finished. {linked_count} of {num_jobs} jobs were linked.")
 
 if __name__ == '__main__':
     linker = CompanyLinker(match_threshold=85)
@@ -0,0 +1,147 @@
+import sys
+import os
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from thefuzz import fuzz, process
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.dedupe.canonicalize import canonicalize_company_name
+from job_scraper.utils.normalize import normalize_company
+
+# Legal forms and filler words that appear in thousands of names and carry no signal for blocking.
+BLOCKING_STOPWORDS = {
+    'ag', 'gmbh', 'sa', 'sarl', 'sagl', 'kg', 'ltd', 'llc', 'inc', 'co', 'corp', 'plc', 'bv', 'nv',
+    'the', 'and', 'et', 'und', 'de', 'der', 'die', 'la', 'le', 'cie', 'group', 'holding', 'switzerland', 'schweiz', 'suisse'
+}
+
+# A shared whole token counts as much as this many shared trigrams when ranking candidates.
+TOKEN_WEIGHT = 3
+
+def normalize_for_matching(name: str) -> str:
+    """
+    Normalizes a company name once for indexing and lookups.
+    """
+    return canonicalize_company_name(normalize_company(name))
+
+def blocking_tokens(normalized_name: str) -> Set[str]:
+    """
+    Returns the informative tokens of a normalized name.
+    """
+    return {token for token in normalized_name.split() if token not in BLOCKING_STOPWORDS}
+
+def blocking_trigrams(normalized_name: str) -> Set[str]:
+    """
+    Returns the character trigrams of the informative tokens, so names with a typo
+    ("Gogle" vs "Google") still share blocking keys.
+    """
+    trigrams = set()
+    for token in blocking_tokens(normalized_name):
+        padded = f" {token} "
+        trigrams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return trigrams
+
+class CompanyMatcher:
+    """
+    Matches free-text company names to canonical companies.
+
+    Names are normalized once, and inverted indexes from blocking keys (whole tokens
+    and character trigrams) to companies narrow each lookup to a small set of
+    candidates before fuzzy scoring. Results are memoized per distinct normalized
+    name, so jobs that share a company name cost a single lookup.
+    """
+    def __init__(self, companies: Iterable[Dict[str, Any]], match_threshold: int = 85,
+                 max_candidates: int = 200, max_postings: int = 2000):
+        self.match_threshold = match_threshold
+        self.max_candidates = max_candidates
+        self.max_postings = max_postings
+
+        self._names: List[str] = []
+        self._ids: List[Any] = []
+        self._display_names: List[str] = []
+        self._by_normalized: Dict[str, int] = {}
+        self._token_index: Dict[str, List[int]] = defaultdict(list)
+        self._trigram_index: Dict[str, List[int]] = defaultdict(list)
+        self._cache: Dict[str, Optional[Tuple[Any, str, int]]] = {}
+
+        for company in companies:
+            normalized = normalize_for_matching(company.get('name'))
+            if not normalized or normalized in self._by_normalized:
+                continue
+            position = len(self._names)
+            self._names.append(normalized)
+            self._ids.append(company['id'])
+            self._display_names.append(company['name'])
+            self._by_normalized[normalized] = position
+            for token in blocking_tokens(normalized):
+                self._token_index[token].append(position)
+            for trigram in blocking_trigrams(normalized):
+                self._trigram_index[trigram].append(position)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def match(self, company_name: str) -> Optional[Tuple[Any, str, int]]:
+        """
+        Returns (company_id, matched_name, score) for the best match scoring at least
+        `match_threshold`, or None.
+        """
+        normalized = normalize_for_matching(company_name)
+        if not normalized:
+            return None
+        if normalized not in self._cache:
+            self._cache[normalized] = self._match_normalized(normalized)
+        return self._cache[normalized]
+
+    def candidates(self, normalized_name: str) -> List[int]:
+        """
+        Returns the positions of the companies worth scoring against a normalized name:
+        those sharing the most blocking keys, with a shared whole token counting
+        as much as several shared trigrams.
+
+        Keys shared by more than `max_postings` companies ("labs", "ing") are skipped.
+        If every key of the name is that common, its rarest keys are used instead,
+        up to about `max_postings` postings, so the name still gets candidates.
+        """
+        postings = [
+            (posting, weight)
+            for keys, index, weight in (
+                (blocking_tokens(normalized_name), self._token_index, TOKEN_WEIGHT),
+                (blocking_trigrams(normalized_name), self._trigram_index, 1),
+            )
+            for posting in (index.get(key) for key in keys)
+            if posting
+        ]
+        selected = [(posting, weight) for posting, weight in postings if len(posting) <= self.max_postings]
+        if not selected and postings:
+            postings.sort(key=lambda entry: len(entry[0]))
+            budget = self.max_postings
+            for posting, weight in postings:
+                if selected and len(posting) > budget:
+                    break
+                selected.append((posting, weight))
+                budget -= len(posting)
+
+        shared = Counter()
+        for posting, weight in selected:
+            for position in posting:
+                shared[position] += weight
+        return [position for position, _ in shared.most_common(self.max_candidates)]
+
+    def _match_normalized(self, normalized: str) -> Optional[Tuple[Any, str, int]]:
+        exact = self._by_normalized.get(normalized)
+        if exact is not None:
+            return self._ids[exact], self._display_names[exact], 100
+        return self._best_of(normalized, self.candidates(normalized))
+
+    def _best_of(self, normalized: str, positions: List[int]) -> Optional[Tuple[Any, str, int]]:
+        if not positions:
+            return None
+        choices = {position: self._names[position] for position in positions}
+        best = process.extractOne(normalized, choices, scorer=fuzz.WRatio, score_cutoff=self.match_threshold)
+        if not best:
+            return None
+        _, score, position = best
+        return self._ids[position], self._display_names[position], score
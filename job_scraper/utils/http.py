@@ -0,0 +1,300 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Dict, NamedTuple, Optional, Tuple, Union
+
+import httpx
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.utils.cache import cache_path
+
+# Server errors worth retrying. Rate-limit responses are recognised by the limiter.
+RETRY_STATUSES = {500, 502, 503, 504}
+
+def create_http_client(max_connections: int = 10, timeout: float = 30.0, **kwargs) -> httpx.AsyncClient:
+    """
+    Returns a pooled HTTP/2 client. Share one per crawl so requests reuse connections
+    instead of paying a TLS handshake each.
+    """
+    return httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        timeout=timeout,
+        **kwargs
+    )
+
+def parse_retry_after(response: httpx.Response) -> Optional[float]:
+    """
+    Returns the delay in seconds requested by a Retry-After header, if it holds a number of seconds.
+    """
+    try:
+        return max(0.0, float(response.headers.get("Retry-After", "")))
+    except ValueError:
+        return None
+
+class Validators(NamedTuple):
+    """
+    The ETag and Last-Modified validators of a fetched URL.
+    """
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+class ValidatorCache:
+    """
+    An on-disk cache of the ETag and Last-Modified validators of fetched URLs,
+    shared by all scrapers so unchanged resources can be revalidated with a
+    conditional GET instead of being downloaded again.
+    """
+    def __init__(self, path: Optional[str] = None):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path or cache_path("http_validators.sqlite3"), check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS validators (url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT)")
+        self._conn.commit()
+
+    def headers_for(self, url: str) -> Dict[str, str]:
+        """
+        Returns the If-None-Match / If-Modified-Since headers for a URL, if it was fetched before.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT etag, last_modified FROM validators WHERE url = ?", (url,)).fetchone()
+        headers = {}
+        if row and row[0]:
+            headers["If-None-Match"] = row[0]
+        if row and row[1]:
+            headers["If-Modified-Since"] = row[1]
+        return headers
+
+    def save(self, validators: Optional[Validators]):
+        """
+        Remembers validators returned by `conditional_get`. None is ignored.
+        """
+        if validators is None:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO validators (url, etag, last_modified) VALUES (?, ?, ?)",
+                validators
+            )
+            self._conn.commit()
+
+async def conditional_get(client: httpx.AsyncClient, url: str, validators: ValidatorCache,
+                          **kwargs) -> Tuple[httpx.Response, Optional[Validators]]:
+    """
+    Sends a GET revalidating any cached validators for the URL. A 304 response
+    means the resource is unchanged since it was last fetched.
+
+    Returns the response with the validators of a successful response (None if it
+    has none). They are not stored: pass them to `ValidatorCache.save` once the
+    response's data is stored, or a failed write would be skipped as unchanged forever.
+    """
+    key = str(httpx.URL(url, params=kwargs.get("params")))
+    kwargs["headers"] = {**kwargs.get("headers", {}), **validators.headers_for(key)}
+    response = await client.get(url, **kwargs)
+    etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+    if not response.is_success or (not etag and not last_modified):
+        return response, None
+    return response, Validators(key, etag, last_modified)
+
+class AdaptiveRateLimiter:
+    """
+    A token bucket whose rate adapts to the server.
+
+    Requests take one token each; tokens refill at `rate` per second up to `burst`.
+    A 429 halves the rate (down to `min_rate`) and pauses every caller until the
+    server's Retry-After has passed. Each success then raises the rate by
+    `increase` x the configured rate, so throughput recovers gradually.
+    """
+    def __init__(self, rate: float, burst: int = 1, min_rate: float = 0.1, increase: float = 0.05):
+        if rate <= 0:
+            raise ValueError("Rate must be positive.")
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min(min_rate, rate)
+        self.increase = increase
+        self.throttled = 0
+
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """
+        Waits until a request may be sent. Callers are served in arrival order.
+        """
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def update(self, response: httpx.Response) -> bool:
+        """
+        Adapts the rate to a response. Returns True if the request was throttled and should be retried.
+        """
+        if response.status_code == 429:
+            self.on_throttle(parse_retry_after(response))
+            return True
+        if response.is_success:
+            self.on_success()
+        return False
+
+    def on_success(self) -> None:
+        self.rate = min(self.max_rate, self.rate + self.increase * self.max_rate)
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        self.throttled += 1
+        self.rate = max(self.min_rate, self.rate / 2)
+        self._tokens = 0.0
+        delay = retry_after if retry_after is not None else 1 / self.rate
+        self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+
+class QuotaRateLimiter:
+    """
+    Paces requests from the quota a server reports in X-RateLimit-Remaining and
+    X-RateLimit-Reset (an epoch timestamp), as GitHub does.
+
+    Requests go out freely while plenty of quota is left. Once fewer than
+    `pace_below` requests remain, they are spread evenly until the reset, and
+    when the quota is used up every caller waits for the reset. Requests in
+    flight are counted against the quota before their response arrives.
+    """
+    def __init__(self, pace_below: int = 100):
+        self.pace_below = pace_below
+        self.remaining: Optional[int] = None
+        self.reset_at = 0.0
+        self.throttled = 0
+
+        self._next_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """
+        Waits until a request may be sent. Callers are served in arrival order.
+        """
+        async with self._lock:
+            now = time.time()
+            if self.remaining is None or now >= self.reset_at:
+                # Unknown quota or a new window: let requests through until a response tells us otherwise.
+                self.remaining = None
+                return
+            if self.remaining <= 0:
+                await asyncio.sleep(self.reset_at - now + 1)
+                self.remaining = None
+                return
+            if self.remaining < self.pace_below:
+                interval = (self.reset_at - now) / self.remaining
+                self._next_at = max(self._next_at, now)
+                await asyncio.sleep(self._next_at - now)
+                self._next_at += interval
+            self.remaining -= 1
+
+    def update(self, response: httpx.Response) -> bool:
+        """
+        Records the quota reported by a response. Returns True if the request was
+        rejected by a rate limit and should be retried.
+        """
+        headers = response.headers
+        try:
+            remaining = int(headers["X-RateLimit-Remaining"])
+            reset_at = float(headers["X-RateLimit-Reset"])
+        except (KeyError, ValueError):
+            remaining, reset_at = None, None
+
+        if remaining is not None:
+            if reset_at > self.reset_at or self.remaining is None:
+                self.reset_at, self.remaining = reset_at, remaining
+            else:
+                # Responses arrive out of order; the lowest count in a window is the freshest.
+                self.remaining = min(self.remaining, remaining)
+
+        retry_after = parse_retry_after(response)
+        if response.status_code == 429 or (response.status_code == 403 and (remaining == 0 or retry_after is not None)):
+            self.throttled += 1
+            self.remaining = 0
+            if retry_after is not None:
+                self.reset_at = max(self.reset_at, time.time() + retry_after)
+            elif self.reset_at <= time.time():
+                # No hint when to come back; GitHub asks clients to wait at least a minute.
+                self.reset_at = time.time() + 60
+            return True
+        return False
+
+class RateLimitedFetcher:
+    """
+    Sends requests through a shared client, rate limiter and concurrency limit.
+    Throttled responses, server errors and transport errors are retried with backoff.
+    With a `ValidatorCache`, `conditional_get` revalidates and may return 304 Not Modified.
+    """
+    def __init__(self, client: httpx.AsyncClient, limiter: Union[AdaptiveRateLimiter, QuotaRateLimiter], semaphore: asyncio.Semaphore,
+                 max_retries: int = 4, backoff: float = 1.0, validators: Optional[ValidatorCache] = None):
+        self.client = client
+        self.validators = validators
+        self.limiter = limiter
+        self.semaphore = semaphore
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        """
+        Returns the first successful (or 304 Not Modified) response. Raises
+        httpx.HTTPStatusError for non-retryable statuses and once retries are exhausted.
+        """
+        return (await self._send("GET", url, False, **kwargs))[0]
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        """
+        As `get`, for a POST such as a GraphQL query.
+        """
+        return (await self._send("POST", url, False, **kwargs))[0]
+
+    async def conditional_get(self, url: str, **kwargs) -> Tuple[httpx.Response, Optional[Validators]]:
+        """
+        As `get`, revalidating with the fetcher's `ValidatorCache`. Returns the
+        validators to save once the response's data is stored, as `conditional_get`.
+        """
+        if self.validators is None:
+            raise ValueError("conditional_get needs a fetcher with a ValidatorCache.")
+        return await self._send("GET", url, True, **kwargs)
+
+    async def _send(self, method: str, url: str, conditional: bool, **kwargs) -> Tuple[httpx.Response, Optional[Validators]]:
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            await self.limiter.acquire()
+            validators = None
+            try:
+                async with self.semaphore:
+                    if conditional:
+                        response, validators = await conditional_get(self.client, url, self.validators, **kwargs)
+                    else:
+                        response = await self.client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                if last_attempt:
+                    raise
+                logging.warning(f"Request to {url} failed ({e!r}), retrying.")
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+                continue
+
+            throttled = self.limiter.update(response)
+            if last_attempt or not (throttled or response.status_code in RETRY_STATUSES):
+                if response.status_code != 304:
+                    response.raise_for_status()
+                return response, validators
+            if not throttled:
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+        raise AssertionError("unreachable")
@@ -1,7 +1,14 @@
+import os
 import re
+import sys
 import unicodedata
 from urllib.parse import urlparse, urlunparse
 
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.utils.phrase_matcher import PhraseMatcher, load_taxonomy
+
 # --- Predefined Lists for Normalization ---
 
 # A non-exhaustive list of common tech skills.
@@ -86,30 +93,38 @@ def normalize_location(location: str) -> str:
     # Could add major cities mapping here, e.g., "zurich" -> "Zurich, Switzerland"
     return location # Return original if no simple rule matches
 
-def extract_skills_from_text(text: str) -> set[str]:
+def build_skill_matcher(taxonomy_path: str | None = None) -> PhraseMatcher:
+    """
+    Builds a skill matcher from COMMON_TECH_SKILLS, optionally extended with an
+    external taxonomy file (see `load_taxonomy`) that may map aliases to skills.
+    """
+    phrases = {skill: skill for skill in COMMON_TECH_SKILLS}
+    if taxonomy_path:
+        phrases.update(load_taxonomy(taxonomy_path))
+    # Skills must be whole words and not followed by a hyphen (to prevent matching 'go' in 'go-getter').
+    return PhraseMatcher(phrases, forbid_hyphen_suffix=True)
+
+_skill_matcher = None
+
+def get_skill_matcher() -> PhraseMatcher:
+    """
+    Returns the shared skill matcher, built on first use.
+    Set SKILL_TAXONOMY_PATH to extend the built-in skills with a larger taxonomy.
+    """
+    global _skill_matcher
+    if _skill_matcher is None:
+        _skill_matcher = build_skill_matcher(os.environ.get("SKILL_TAXONOMY_PATH"))
+    return _skill_matcher
+
+def extract_skills_from_text(text: str, matcher: PhraseMatcher | None = None) -> set[str]:
     """
     Extracts a set of predefined skills from a text blob (e.g., a bio).
+    All skills are found in a single pass over the text.
     """
     if not text:
         return set()
 
-    # Use a less aggressive normalization for skill extraction.
-    # We lowercase the text but keep special characters needed for skill names.
-    text_lower = text.lower()
-    found_skills = set()
-
-    for skill in COMMON_TECH_SKILLS:
-        # This regex is designed to find whole words, including those with special characters.
-        # 1. (^|\W): Asserts the position is at the start of the string or a non-word character.
-        # 2. re.escape(skill): The literal skill.
-        # 3. (?!-): A negative lookahead to ensure the skill is not followed by a hyphen
-        #    (to prevent matching 'go' in 'go-getter').
-        # 4. (\W|$): Asserts the position is followed by a non-word character or the end of the string.
-        pattern = r'(^|\W)' + re.escape(skill) + r'(?!-)(\W|$)'
-        if re.search(pattern, text_lower):
-            found_skills.add(skill)
-
-    return found_skills
+    return (matcher or get_skill_matcher()).labels(text)
 
 def normalize_url(url: str) -> str:
     """
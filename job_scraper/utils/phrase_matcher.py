@@ -0,0 +1,117 @@
+import json
+import re
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+class PhraseMatcher:
+    """
+    Finds whole-word occurrences of many literal phrases in a single pass over a text.
+
+    All phrases are compiled into one trie-shaped regex, so the cost of a scan
+    depends on the length of the text rather than on the number of phrases.
+    Every phrase maps to a label, which lets aliases (e.g. "k8s") resolve to a
+    canonical name (e.g. "kubernetes").
+
+    Matching is case-insensitive (the text is lowercased) and whole-word: a phrase
+    must not be preceded or followed by a word character. With `forbid_hyphen_suffix`,
+    a phrase followed by a hyphen is rejected too, so 'go' does not match 'go-getter'.
+    """
+    def __init__(self, phrases: Dict[str, str] | Iterable[str], forbid_hyphen_suffix: bool = False):
+        if not isinstance(phrases, dict):
+            phrases = {phrase: phrase for phrase in phrases}
+        self.labels_by_phrase: Dict[str, str] = {
+            phrase.lower(): label for phrase, label in phrases.items() if phrase
+        }
+
+        tail = r'(?![\w-])' if forbid_hyphen_suffix else r'(?!\w)'
+        self._tail = re.compile(tail)
+        # The lookahead keeps matches zero-width, so phrases starting inside a previous
+        # match are still found. Alternatives are tried longest first.
+        trie = _build_trie(self.labels_by_phrase)
+        trie_pattern = _trie_pattern(trie) or r'(?!)'
+        self._regex = re.compile(r'(?<!\w)(?=(' + trie_pattern + r')' + tail + r')')
+
+        # The regex reports the longest phrase at each position; shorter phrases
+        # that are prefixes of it ("react" in "react native") are checked separately.
+        self._prefixes: Dict[str, List[str]] = {}
+        for phrase in self.labels_by_phrase:
+            node, prefixes = trie, []
+            for i, char in enumerate(phrase[:-1]):
+                node = node[char]
+                if '' in node:
+                    prefixes.append(phrase[:i + 1])
+            if prefixes:
+                self._prefixes[phrase] = prefixes
+
+    def finditer(self, text: str) -> Iterator[Tuple[str, int, int]]:
+        """
+        Yields (label, start, end) for every phrase occurrence, including overlapping ones.
+        Positions refer to the lowercased text.
+        """
+        if not text:
+            return
+        text = text.lower()
+        for match in self._regex.finditer(text):
+            start, phrase = match.start(), match.group(1)
+            yield self.labels_by_phrase[phrase], start, start + len(phrase)
+            for prefix in self._prefixes.get(phrase, ()):
+                end = start + len(prefix)
+                if self._tail.match(text, end):
+                    yield self.labels_by_phrase[prefix], start, end
+
+    def labels(self, text: str) -> Set[str]:
+        """
+        Returns the set of labels found in the text.
+        """
+        return {label for label, _, _ in self.finditer(text)}
+
+    def counts(self, text: str) -> Dict[str, int]:
+        """
+        Returns how many times each label occurs in the text.
+        """
+        return dict(Counter(label for label, _, _ in self.finditer(text)))
+
+def load_taxonomy(path: str) -> Dict[str, str]:
+    """
+    Loads a phrase taxonomy from a JSON file and returns a mapping of phrase -> label.
+
+    The file holds either a list of phrases, or an object mapping each canonical
+    label to a list of aliases, e.g. {"kubernetes": ["k8s", "kube"]}.
+    The canonical label always matches itself.
+    """
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+
+    if isinstance(data, list):
+        return {phrase.lower(): phrase.lower() for phrase in data}
+
+    phrases = {}
+    for label, aliases in data.items():
+        label = label.lower()
+        phrases[label] = label
+        for alias in aliases or []:
+            phrases[alias.lower()] = label
+    return phrases
+
+def _build_trie(phrases: Iterable[str]) -> dict:
+    trie: dict = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[''] = True
+    return trie
+
+def _trie_pattern(node: dict) -> str:
+    """
+    Turns a trie into a regex. Greedy optional groups make longer phrases win,
+    while backtracking still falls back to a shorter phrase when the longer one
+    fails the word-boundary check.
+    """
+    branches = [re.escape(char) + _trie_pattern(child) for char, child in sorted(node.items()) if char != '']
+    if not branches:
+        return ''
+    pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    if '' in node:
+        pattern = '(?:' + pattern + ')?'
+    return pattern
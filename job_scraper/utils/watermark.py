@@ -0,0 +1,113 @@
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from job_scraper.utils.cache import cache_path
+
+def fingerprint(*parts) -> str:
+    """
+    Returns a short hash of an item's content, used to notice when a seen item changes.
+    """
+    return hashlib.sha256("\0".join(str(part or "") for part in parts).encode()).hexdigest()[:16]
+
+class FeedWatermark:
+    """
+    Remembers which items of a feed were already ingested, so a poll only
+    processes new or changed items.
+
+    Every item is keyed (e.g. by its link) and fingerprinted by its content. The
+    watermark is the newest publication date ingested so far; items published
+    after it are new without a lookup, older ones are looked up in the seen set.
+    Items are only recorded once `commit` is called, after they were stored, so a
+    failed run is retried on the next poll. Entries older than `retention`
+    before the watermark are pruned.
+    """
+    def __init__(self, source: str, path: Optional[str] = None, retention: timedelta = timedelta(days=90)):
+        self.source = source
+        self.retention = retention
+        self._pending: Dict[str, Tuple[str, Optional[str]]] = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path or cache_path("feed_watermarks.sqlite3"), check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS watermarks (source TEXT PRIMARY KEY, published TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS seen_items (
+                source TEXT NOT NULL, key TEXT NOT NULL, fingerprint TEXT NOT NULL, published TEXT,
+                PRIMARY KEY (source, key)
+            );
+        """)
+        self._conn.commit()
+
+    @property
+    def watermark(self) -> Optional[datetime]:
+        with self._lock:
+            row = self._conn.execute("SELECT published FROM watermarks WHERE source = ?", (self.source,)).fetchone()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    def unseen(self, items: Iterable[Tuple[str, str, Optional[datetime]]]) -> Set[str]:
+        """
+        Takes (key, fingerprint, published) triples and returns the keys of the items
+        that are new or whose content changed since they were ingested.
+        """
+        watermark = self.watermark
+        new, to_check = set(), {}
+        for key, item_fingerprint, published in items:
+            if watermark is not None and published is not None and _aware(published) > watermark:
+                new.add(key)
+            else:
+                to_check[key] = item_fingerprint
+
+        keys = list(to_check)
+        with self._lock:
+            seen = {}
+            # Stay below SQLite's bound-parameter limit.
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                seen.update(self._conn.execute(
+                    f"SELECT key, fingerprint FROM seen_items WHERE source = ? AND key IN ({placeholders})",
+                    [self.source, *chunk]
+                ))
+        new.update(key for key, item_fingerprint in to_check.items() if seen.get(key) != item_fingerprint)
+        return new
+
+    def mark_seen(self, items: Iterable[Tuple[str, str, Optional[datetime]]]):
+        """
+        Stages (key, fingerprint, published) triples to be recorded by the next `commit`.
+        """
+        for key, item_fingerprint, published in items:
+            self._pending[key] = (item_fingerprint, _aware(published).isoformat() if published else None)
+
+    def commit(self):
+        """
+        Records the staged items, advances the watermark and prunes old entries.
+        """
+        if not self._pending:
+            return
+        newest = max((published for _, published in self._pending.values() if published), default=None)
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO seen_items (source, key, fingerprint, published) VALUES (?, ?, ?, ?)",
+                [(self.source, key, item_fingerprint, published) for key, (item_fingerprint, published) in self._pending.items()]
+            )
+            if newest:
+                self._conn.execute(
+                    "INSERT INTO watermarks (source, published) VALUES (?, ?) "
+                    "ON CONFLICT (source) DO UPDATE SET published = MAX(published, excluded.published)",
+                    (self.source, newest)
+                )
+                row = self._conn.execute("SELECT published FROM watermarks WHERE source = ?", (self.source,)).fetchone()
+                cutoff = (datetime.fromisoformat(row[0]) - self.retention).isoformat()
+                self._conn.execute("DELETE FROM seen_items WHERE source = ? AND published < ?", (self.source, cutoff))
+            self._conn.commit()
+        self._pending.clear()
+
+def _aware(value: datetime) -> datetime:
+    # Dates are stored in UTC so they compare correctly as ISO strings; naive dates are taken to be UTC.
+    return value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
@@ -0,0 +1,40 @@
+-- Functions that apply many per-row updates in a single request.
+-- The job scraper's linker and analyzers send their results in chunks to these
+-- functions instead of issuing one UPDATE ... WHERE id = ... request per row.
+
+-- Links jobs to companies. `links` is a JSON array of {"job_id": ..., "company_id": ...} objects.
+-- Returns the number of jobs updated.
+CREATE OR REPLACE FUNCTION public.bulk_link_jobs_to_companies(links jsonb)
+RETURNS integer
+LANGUAGE sql AS $$
+  WITH updated AS (
+    UPDATE public.jobs AS j
+    SET company_id = l.company_id
+    FROM jsonb_to_recordset(links) AS l(job_id uuid, company_id uuid)
+    WHERE j.id = l.job_id
+    RETURNING 1
+  )
+  SELECT count(*)::integer FROM updated;
+$$;
+
+-- Sets the tags of many companies. `updates` is a JSON array of {"company_id": ..., "tags": [...]} objects.
+-- Returns the number of companies updated.
+CREATE OR REPLACE FUNCTION public.bulk_update_company_tags(updates jsonb)
+RETURNS integer
+LANGUAGE sql AS $$
+  WITH updated AS (
+    UPDATE public.companies AS c
+    SET tags = u.tags
+    FROM jsonb_to_recordset(updates) AS u(company_id uuid, tags text[])
+    WHERE c.id = u.company_id
+    RETURNING 1
+  )
+  SELECT count(*)::integer FROM updated;
+$$;
+
+-- These functions are only meant for the scraper's service role.
+REVOKE EXECUTE ON FUNCTION public.bulk_link_jobs_to_companies(jsonb) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.bulk_update_company_tags(jsonb) FROM PUBLIC, anon, authenticated;
+
+-- Notify PostgREST to reload its schema cache
+NOTIFY pgrst, 'reload schema';
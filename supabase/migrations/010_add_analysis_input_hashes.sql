@@ -0,0 +1,99 @@
+-- Lets the job scraper's tagger and sponsorship analyzer process only what changed.
+-- Each analyzed row stores md5(<dictionary version> || ':' || <input text>) for the
+-- input it was analyzed with. A row needs analysis again when its text or the
+-- dictionary version changes, i.e. when the stored hash no longer matches.
+
+ALTER TABLE public.companies
+ADD COLUMN IF NOT EXISTS tags_input_hash text;
+
+COMMENT ON COLUMN public.companies.tags_input_hash IS 'md5 of the tag dictionary version and the description the tags were generated from.';
+
+ALTER TABLE public.jobs
+ADD COLUMN IF NOT EXISTS mentions_sponsorship boolean,
+ADD COLUMN IF NOT EXISTS sponsorship_input_hash text;
+
+COMMENT ON COLUMN public.jobs.mentions_sponsorship IS 'Whether the job description mentions visa sponsorship, a work permit or relocation support.';
+COMMENT ON COLUMN public.jobs.sponsorship_input_hash IS 'md5 of the sponsorship keyword version, company and description the flag was computed from.';
+
+-- Companies whose tags are missing or stale for `dictionary_version`, one keyset page at a time.
+CREATE OR REPLACE FUNCTION public.companies_needing_tags(dictionary_version text, after uuid DEFAULT NULL, page_size integer DEFAULT 1000)
+RETURNS TABLE (id uuid, description text)
+LANGUAGE sql STABLE AS $$
+  SELECT c.id, c.description
+  FROM public.companies AS c
+  WHERE c.description IS NOT NULL
+    AND c.tags_input_hash IS DISTINCT FROM md5(dictionary_version || ':' || c.description)
+    AND (after IS NULL OR c.id > after)
+  ORDER BY c.id
+  LIMIT page_size;
+$$;
+
+-- Linked jobs whose sponsorship flag is missing or stale for `keywords_version`, one keyset page at a time.
+CREATE OR REPLACE FUNCTION public.jobs_needing_sponsorship_scan(keywords_version text, after uuid DEFAULT NULL, page_size integer DEFAULT 1000)
+RETURNS TABLE (id uuid, company_id uuid, description text)
+LANGUAGE sql STABLE AS $$
+  SELECT j.id, j.company_id, j.description
+  FROM public.jobs AS j
+  WHERE j.company_id IS NOT NULL
+    AND j.sponsorship_input_hash IS DISTINCT FROM
+        md5(keywords_version || ':' || j.company_id::text || ':' || coalesce(j.description, ''))
+    AND (after IS NULL OR j.id > after)
+  ORDER BY j.id
+  LIMIT page_size;
+$$;
+
+-- Sets the tags of many companies. `updates` is a JSON array of {"company_id": ..., "tags": [...], "input_hash": ...}
+-- objects; "input_hash" is optional. An empty tag list clears the tags.
+-- Returns the number of companies updated.
+CREATE OR REPLACE FUNCTION public.bulk_update_company_tags(updates jsonb)
+RETURNS integer
+LANGUAGE sql AS $$
+  WITH updated AS (
+    UPDATE public.companies AS c
+    SET tags = NULLIF(u.tags, '{}'),
+        tags_input_hash = coalesce(u.input_hash, c.tags_input_hash)
+    FROM jsonb_to_recordset(updates) AS u(company_id uuid, tags text[], input_hash text)
+    WHERE c.id = u.company_id
+    RETURNING 1
+  )
+  SELECT count(*)::integer FROM updated;
+$$;
+
+-- Stores the sponsorship flag of many jobs. `updates` is a JSON array of
+-- {"job_id": ..., "mentions_sponsorship": ..., "input_hash": ...} objects.
+-- The companies of those jobs are then flagged if any of their jobs mentions sponsorship.
+-- Returns the number of jobs updated.
+CREATE OR REPLACE FUNCTION public.bulk_update_job_sponsorship(updates jsonb)
+RETURNS integer
+LANGUAGE plpgsql AS $$
+DECLARE
+  updated integer;
+BEGIN
+  UPDATE public.jobs AS j
+  SET mentions_sponsorship = u.mentions_sponsorship,
+      sponsorship_input_hash = u.input_hash
+  FROM jsonb_to_recordset(updates) AS u(job_id uuid, mentions_sponsorship boolean, input_hash text)
+  WHERE j.id = u.job_id;
+  GET DIAGNOSTICS updated = ROW_COUNT;
+
+  -- A separate statement, so it sees the flags written above.
+  UPDATE public.companies AS c
+  SET offers_visa_sponsorship = EXISTS (
+    SELECT 1 FROM public.jobs AS j WHERE j.company_id = c.id AND j.mentions_sponsorship
+  )
+  WHERE c.id IN (
+    SELECT j.company_id FROM public.jobs AS j
+    JOIN jsonb_to_recordset(updates) AS u(job_id uuid) ON j.id = u.job_id
+  );
+
+  RETURN updated;
+END;
+$$;
+
+-- These functions are only meant for the scraper's service role.
+REVOKE EXECUTE ON FUNCTION public.companies_needing_tags(text, uuid, integer) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.jobs_needing_sponsorship_scan(text, uuid, integer) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.bulk_update_job_sponsorship(jsonb) FROM PUBLIC, anon, authenticated;
+
+-- Notify PostgREST to reload its schema cache
+NOTIFY pgrst, 'reload schema';
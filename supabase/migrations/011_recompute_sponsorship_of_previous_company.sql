@@ -0,0 +1,67 @@
+-- A job's sponsorship flag counts towards the company it was scanned under. When a job
+-- is re-linked to another company it is scanned again, but bulk_update_job_sponsorship
+-- only refreshed the new company, so the previous one could stay flagged because of a
+-- job it no longer has. Jobs now remember the company their flag was computed for, and
+-- both companies are refreshed.
+
+ALTER TABLE public.jobs
+ADD COLUMN IF NOT EXISTS sponsorship_company_id uuid;
+
+COMMENT ON COLUMN public.jobs.sponsorship_company_id IS 'The company the job was linked to when mentions_sponsorship was computed.';
+
+-- Flags stored so far were computed for the job's current company, as far as we know.
+UPDATE public.jobs
+SET sponsorship_company_id = company_id
+WHERE sponsorship_input_hash IS NOT NULL AND sponsorship_company_id IS NULL;
+
+-- Stores the sponsorship flag of many jobs. `updates` is a JSON array of
+-- {"job_id": ..., "mentions_sponsorship": ..., "input_hash": ...} objects.
+-- The companies of those jobs, and the companies they were previously scanned under,
+-- are then flagged if any of their jobs mentions sponsorship.
+-- Returns the number of jobs updated.
+CREATE OR REPLACE FUNCTION public.bulk_update_job_sponsorship(updates jsonb)
+RETURNS integer
+LANGUAGE plpgsql AS $$
+DECLARE
+  updated integer;
+  affected uuid[];
+BEGIN
+  WITH previous AS (
+    -- Read before the update below, so it sees the company each flag was computed for.
+    SELECT j.id, j.sponsorship_company_id AS company_id
+    FROM public.jobs AS j
+    JOIN jsonb_to_recordset(updates) AS u(job_id uuid) ON j.id = u.job_id
+  ),
+  changed AS (
+    UPDATE public.jobs AS j
+    SET mentions_sponsorship = u.mentions_sponsorship,
+        sponsorship_input_hash = u.input_hash,
+        sponsorship_company_id = j.company_id
+    FROM jsonb_to_recordset(updates) AS u(job_id uuid, mentions_sponsorship boolean, input_hash text)
+    WHERE j.id = u.job_id
+    RETURNING j.id, j.company_id
+  )
+  SELECT count(*)::integer,
+         array(
+           SELECT company_id FROM changed WHERE company_id IS NOT NULL
+           UNION
+           SELECT company_id FROM previous WHERE company_id IS NOT NULL
+         )
+  INTO updated, affected
+  FROM changed;
+
+  -- A separate statement, so it sees the flags written above.
+  UPDATE public.companies AS c
+  SET offers_visa_sponsorship = EXISTS (
+    SELECT 1 FROM public.jobs AS j WHERE j.company_id = c.id AND j.mentions_sponsorship
+  )
+  WHERE c.id = ANY(affected);
+
+  RETURN updated;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.bulk_update_job_sponsorship(jsonb) FROM PUBLIC, anon, authenticated;
+
+-- Notify PostgREST to reload its schema cache
+NOTIFY pgrst, 'reload schema';
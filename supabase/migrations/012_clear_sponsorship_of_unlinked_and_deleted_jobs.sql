@@ -0,0 +1,51 @@
+-- Two more ways a company could stay flagged because of a job it no longer has:
+-- jobs_needing_sponsorship_scan only returned linked jobs, so a job whose company_id
+-- became NULL was never scanned again and its previous company never refreshed; and
+-- deleting a job refreshed nothing. A full (non-incremental) analyzer run only ever
+-- sets flags, so it could not clear either.
+
+-- Jobs whose sponsorship flag is missing or stale for `keywords_version`, or was computed
+-- for another company than the job's current one (including jobs that lost their company),
+-- one keyset page at a time. Storing the flag of an unlinked job refreshes its previous company
+-- and sets sponsorship_company_id to NULL, so it drops out of the results.
+CREATE OR REPLACE FUNCTION public.jobs_needing_sponsorship_scan(keywords_version text, after uuid DEFAULT NULL, page_size integer DEFAULT 1000)
+RETURNS TABLE (id uuid, company_id uuid, description text)
+LANGUAGE sql STABLE AS $$
+  SELECT j.id, j.company_id, j.description
+  FROM public.jobs AS j
+  WHERE ((j.company_id IS NOT NULL
+          AND j.sponsorship_input_hash IS DISTINCT FROM
+              md5(keywords_version || ':' || j.company_id::text || ':' || coalesce(j.description, '')))
+         OR j.company_id IS DISTINCT FROM j.sponsorship_company_id)
+    AND (after IS NULL OR j.id > after)
+  ORDER BY j.id
+  LIMIT page_size;
+$$;
+
+-- Refreshes the sponsorship flag of the companies of deleted jobs that mentioned sponsorship.
+CREATE OR REPLACE FUNCTION public.refresh_sponsorship_after_job_delete()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+  UPDATE public.companies AS c
+  SET offers_visa_sponsorship = EXISTS (
+    SELECT 1 FROM public.jobs AS j WHERE j.company_id = c.id AND j.mentions_sponsorship
+  )
+  WHERE c.id IN (
+    SELECT d.company_id FROM deleted_jobs AS d WHERE d.company_id IS NOT NULL AND d.mentions_sponsorship
+  );
+  RETURN NULL;
+END;
+$$;
+
+-- Once per statement, so deleting many jobs refreshes each company once.
+DROP TRIGGER IF EXISTS jobs_refresh_sponsorship_after_delete ON public.jobs;
+CREATE TRIGGER jobs_refresh_sponsorship_after_delete
+AFTER DELETE ON public.jobs
+REFERENCING OLD TABLE AS deleted_jobs
+FOR EACH STATEMENT EXECUTE FUNCTION public.refresh_sponsorship_after_job_delete();
+
+REVOKE EXECUTE ON FUNCTION public.jobs_needing_sponsorship_scan(text, uuid, integer) FROM PUBLIC, anon, authenticated;
+
+-- Notify PostgREST to reload its schema cache
+NOTIFY pgrst, 'reload schema';